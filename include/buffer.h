@@ -29,6 +29,9 @@ public:
 
   Buffer &operator<<(std::ostream &(*manip)(std::ostream &));
 
+  // append raw bytes (used for binary records)
+  Buffer &write(const char *data, size_t size);
+
   void flush();
 
   void register_instance();
@@ -163,6 +163,17 @@ void configOptions(std::unique_ptr<DBEnv> &env, Options *options,
               << "]: Invalid memtable factory!" << std::endl;
   }
 
+  // DB::Open rejects concurrent memtable writes for reps that cannot take
+  // them (everything but the skiplist), so fall back to serialised writes.
+  if (options->allow_concurrent_memtable_write &&
+      !options->memtable_factory->IsInsertConcurrentlySupported()) {
+    std::cerr << "Warning: " << options->memtable_factory->Name()
+              << " does not support concurrent writes, disabling "
+                 "allow_concurrent_memtable_write"
+              << std::endl;
+    options->allow_concurrent_memtable_write = false;
+  }
+
   options->level_compaction_dynamic_level_bytes =
       env->level_compaction_dynamic_level_bytes;
 
@@ -32,6 +32,8 @@ private:
   bool iostat_stats_ = false;      // [iostat]
   bool destroy_database_ = true;   // [d]
   bool show_progress_bar_ = false; // [progress]
+  bool binary_stats_ = false;      // [binary_stats]
+  bool binary_workload_ = false;   // [binary_workload]
 
 public:
   static std::string kDBPath;
@@ -52,6 +54,8 @@ public:
   void SetIOStat(bool value) { iostat_stats_ = value; }
   void SetDestroyDatabase(bool value) { destroy_database_ = value; }
   void SetShowProgress(bool value) { show_progress_bar_ = value; }
+  void SetBinaryStats(bool value) { binary_stats_ = value; }
+  void SetBinaryWorkload(bool value) { binary_workload_ = value; }
 
   size_t GetBufferSize() const {
     // usually buffer_size = P * B * E
@@ -64,6 +68,8 @@ public:
   bool IsIOStatEnabled() const { return iostat_stats_; }
   bool IsDestroyDatabaseEnabled() const { return destroy_database_; }
   bool IsShowProgressEnabled() const { return show_progress_bar_; }
+  bool IsBinaryStatsEnabled() const { return binary_stats_; }
+  bool IsBinaryWorkloadEnabled() const { return binary_workload_; }
 
   long GetTargetFileSizeBase() const { return GetBufferSize(); }
 
@@ -405,6 +411,41 @@ public:
   // hash index can resolve the scan without a full-order seek.
   uint32_t common_prefix_len = 0;
 
+  // Per-op latency histograms in latency.hist: 0 off, 1 instead of the
+  // per-op records of stats.log / stats.bin, 2 in addition to them.
+  int latency_hist = 0;
+  // Dump (and reset) the histograms every this many ops; 0 dumps them once
+  // at the end of the run.
+  uint64_t latency_hist_interval = 0;
+
+  // Client threads replaying the workload (see threaded_replay.h); 1 replays
+  // it on the main thread.
+  int replay_threads = 1;
+  // How ops are split between replay threads: 0 by key hash, 1 round-robin
+  // ranges of thread_chunk consecutive lines.
+  int thread_partition = 0;
+  uint64_t thread_chunk = 1024;
+  // Query threads issuing the workload's P/Q/S ops (or those of
+  // query_workload) while the replay threads ingest the rest; 0 keeps the
+  // queries inline with the writes.
+  int reader_threads = 0;
+  std::string query_workload;
+
+  // Group consecutive I/U/D/M ops into WriteBatches of this many ops and/or
+  // bytes (0 for no limit); both 0 (or a size of 1) writes op by op.
+  uint64_t write_batch_size = 0;
+  uint64_t write_batch_bytes = 0;
+  // Issue up to this many consecutive point queries as one MultiGet; 0 (or
+  // 1) calls Get per query.
+  uint64_t multiget_batch_size = 0;
+
+  // Keep one iterator per kind of range scan and Refresh() it before each
+  // scan instead of creating a new one.
+  int scan_reuse_iterator = 0;
+  // Write the keys and bytes each range scan returned to scans.csv (values
+  // are only read for this).
+  int scan_stats = 0;
+
   // refer memtable.h (NewHashSkipListRepFactory)
   // Below option are picked from function default arguments
   int32_t skiplist_height = 4;
@@ -0,0 +1,225 @@
+#ifndef LATENCY_HISTOGRAM_H_
+#define LATENCY_HISTOGRAM_H_
+
+#include <algorithm>
+#include <array>
+#include <chrono>
+#include <cstdint>
+#include <cstring>
+#include <memory>
+#include <mutex>
+#include <string>
+#include <vector>
+
+#include "buffer.h"
+
+// HDR-style latency histograms (--hist 1|2), written to `latency.hist`.
+//
+// Latencies are counted in log-linear buckets: values below 2^kHistSubBits
+// get a bucket each, above that every power of two is split into
+// 2^kHistSubBits buckets, so a bucket is never wider than 1/256 of its
+// value (< 0.4% error on any quantile) and 0..2^64 ns fit in ~15k buckets.
+//
+// The harness keeps one histogram per op type and replay thread. They are
+// dumped as an interval every --hist_interval ops (and once more at the end
+// of the run) and reset, so intervals are disjoint and add up to the whole
+// run; the Python side (plot/latency_hist.py) merges intervals (and threads)
+// into phases or runs.
+//
+// File layout, packed and little-endian:
+//
+//   LatencyHistFileHeader
+//   { LatencyHistBlockHeader, LatencyHistBucket * num_buckets } * N
+//
+// with one block per op type and thread that saw ops in an interval, holding
+// only the non-empty buckets.
+
+constexpr char kLatencyHistMagic[8] = {'L', 'S', 'M', 'H', 'I', 'S', 'T', 'O'};
+constexpr uint32_t kLatencyHistVersion = 1;
+constexpr uint32_t kHistSubBits = 8;
+constexpr uint32_t kHistSubBuckets = 1u << kHistSubBits;
+constexpr uint32_t kHistNumBuckets = (64 - kHistSubBits + 1) * kHistSubBuckets;
+constexpr uint8_t kHistRoleReplay = 0;
+constexpr uint8_t kHistRoleReader = 1;
+
+#pragma pack(push, 1)
+struct LatencyHistFileHeader {
+  char magic[8];
+  uint32_t version;
+  uint32_t header_size;
+  uint32_t block_header_size;
+  uint32_t sub_bucket_bits;
+  uint64_t start_time_ns; // wall clock, ns since epoch
+};
+
+struct LatencyHistBlockHeader {
+  char op;              // I, U, D, Q, S, M
+  uint8_t thread;       // replay thread (--threads), 0 when single-threaded
+  uint8_t role;         // kHistRoleReplay, or kHistRoleReader for the
+                        // --reader_threads query threads
+  uint8_t reserved;
+  uint32_t num_buckets; // non-empty buckets following this header
+  uint64_t first_op;    // interval [first_op, last_op) of workload ops
+  uint64_t last_op;
+  uint64_t count;
+  uint64_t min_ns;
+  uint64_t max_ns;
+  uint64_t sum_ns;
+};
+
+struct LatencyHistBucket {
+  uint32_t index;
+  uint64_t count;
+};
+#pragma pack(pop)
+
+static_assert(sizeof(LatencyHistFileHeader) == 32,
+              "LatencyHistFileHeader must be packed");
+static_assert(sizeof(LatencyHistBlockHeader) == 56,
+              "LatencyHistBlockHeader must be packed");
+static_assert(sizeof(LatencyHistBucket) == 12,
+              "LatencyHistBucket must be packed");
+
+// Bucket of `value`; see plot/latency_hist.py for the inverse.
+inline uint32_t LatencyHistBucketIndex(uint64_t value) {
+  if (value < kHistSubBuckets)
+    return static_cast<uint32_t>(value);
+  const uint32_t exponent = 63 - __builtin_clzll(value);
+  const uint32_t shift = exponent - kHistSubBits;
+  return ((shift + 1) << kHistSubBits) +
+         static_cast<uint32_t>((value >> shift) - kHistSubBuckets);
+}
+
+class LatencyHistogram {
+public:
+  LatencyHistogram() : counts_(kHistNumBuckets, 0) {}
+
+  void Record(uint64_t value) {
+    ++counts_[LatencyHistBucketIndex(value)];
+    ++count_;
+    sum_ += value;
+    min_ = std::min(min_, value);
+    max_ = std::max(max_, value);
+  }
+
+  uint64_t Count() const { return count_; }
+
+  void Write(std::unique_ptr<Buffer> &out, char op, uint8_t thread,
+             uint8_t role, uint64_t first_op, uint64_t last_op) const {
+    LatencyHistBlockHeader header;
+    std::memset(&header, 0, sizeof(header));
+    header.op = op;
+    header.thread = thread;
+    header.role = role;
+    header.num_buckets = static_cast<uint32_t>(
+        counts_.size() - std::count(counts_.begin(), counts_.end(), 0));
+    header.first_op = first_op;
+    header.last_op = last_op;
+    header.count = count_;
+    header.min_ns = count_ ? min_ : 0;
+    header.max_ns = max_;
+    header.sum_ns = sum_;
+    out->write(reinterpret_cast<const char *>(&header), sizeof(header));
+    for (uint32_t i = 0; i < counts_.size(); ++i) {
+      if (counts_[i] == 0)
+        continue;
+      LatencyHistBucket bucket{i, counts_[i]};
+      out->write(reinterpret_cast<const char *>(&bucket), sizeof(bucket));
+    }
+  }
+
+  void Reset() {
+    std::fill(counts_.begin(), counts_.end(), 0);
+    count_ = sum_ = max_ = 0;
+    min_ = UINT64_MAX;
+  }
+
+private:
+  std::vector<uint64_t> counts_;
+  uint64_t count_ = 0;
+  uint64_t sum_ = 0;
+  uint64_t min_ = UINT64_MAX;
+  uint64_t max_ = 0;
+};
+
+// latency.hist; blocks from several threads are serialised by a mutex.
+class LatencyHistFile {
+public:
+  explicit LatencyHistFile(const std::string &path)
+      : out_(std::make_unique<Buffer>(path)) {
+    LatencyHistFileHeader header;
+    std::memset(&header, 0, sizeof(header));
+    std::memcpy(header.magic, kLatencyHistMagic, sizeof(header.magic));
+    header.version = kLatencyHistVersion;
+    header.header_size = sizeof(LatencyHistFileHeader);
+    header.block_header_size = sizeof(LatencyHistBlockHeader);
+    header.sub_bucket_bits = kHistSubBits;
+    header.start_time_ns =
+        std::chrono::duration_cast<std::chrono::nanoseconds>(
+            std::chrono::system_clock::now().time_since_epoch())
+            .count();
+    out_->write(reinterpret_cast<const char *>(&header), sizeof(header));
+  }
+
+  void Write(const LatencyHistogram &histogram, char op, uint8_t thread,
+             uint8_t role, uint64_t first_op, uint64_t last_op) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    histogram.Write(out_, op, thread, role, first_op, last_op);
+  }
+
+  void Flush() {
+    std::lock_guard<std::mutex> lock(mutex_);
+    out_->flush();
+  }
+
+private:
+  std::unique_ptr<Buffer> out_;
+  std::mutex mutex_;
+};
+
+// One histogram per op type, dumped interval by interval. Each replay
+// thread owns one, so recording never takes a lock.
+class OpLatencyHistograms {
+public:
+  static constexpr std::array<char, 6> kOps = {'I', 'U', 'D', 'Q', 'S', 'M'};
+
+  explicit OpLatencyHistograms(LatencyHistFile *file, uint8_t thread = 0,
+                               uint8_t role = kHistRoleReplay)
+      : file_(file), thread_(thread), role_(role) {}
+
+  void Record(char op, uint64_t latency_ns) {
+    histograms_[Slot(op)].Record(latency_ns);
+  }
+
+  // Writes the ops since the last dump as the interval [first, op_index).
+  void Dump(uint64_t op_index) {
+    for (size_t i = 0; i < kOps.size(); ++i) {
+      if (histograms_[i].Count() == 0)
+        continue;
+      file_->Write(histograms_[i], kOps[i], thread_, role_, interval_start_,
+                   op_index);
+      histograms_[i].Reset();
+    }
+    interval_start_ = op_index;
+  }
+
+private:
+  static size_t Slot(char op) {
+    switch (op) {
+    case 'I': return 0;
+    case 'U': return 1;
+    case 'D': return 2;
+    case 'Q': return 3;
+    case 'S': return 4;
+    default: return 5;
+    }
+  }
+
+  LatencyHistFile *file_;
+  uint8_t thread_;
+  uint8_t role_;
+  std::array<LatencyHistogram, 6> histograms_;
+  uint64_t interval_start_ = 0;
+};
+
+#endif // LATENCY_HISTOGRAM_H_
@@ -0,0 +1,563 @@
+#ifndef OP_EXECUTOR_H_
+#define OP_EXECUTOR_H_
+
+#include <rocksdb/db.h>
+#include <rocksdb/iterator.h>
+#include <rocksdb/options.h>
+#include <rocksdb/write_batch.h>
+
+#include <algorithm>
+#include <cassert>
+#include <chrono>
+#include <cstdint>
+#include <memory>
+#include <mutex>
+#include <string>
+#include <vector>
+
+#include "buffer.h"
+#include "db_env.h"
+#include "latency_histogram.h"
+#include "op_stats.h"
+#include "workload_monitor.h"
+#include "workload_reader.h"
+
+using namespace rocksdb;
+
+// Per-op-type execution time (ns), summed over the ops one executor ran,
+// and the keys its range scans returned; with --scan_stats also their bytes
+// (key + value), which are not read otherwise.
+struct OpExecTimes {
+  unsigned long inserts = 0, updates = 0, point_queries = 0,
+                point_deletes = 0, range_queries = 0, merges = 0;
+  unsigned long scan_keys = 0, scan_bytes = 0;
+
+  OpExecTimes &operator+=(const OpExecTimes &other) {
+    inserts += other.inserts;
+    updates += other.updates;
+    point_queries += other.point_queries;
+    point_deletes += other.point_deletes;
+    range_queries += other.range_queries;
+    merges += other.merges;
+    scan_keys += other.scan_keys;
+    scan_bytes += other.scan_bytes;
+    return *this;
+  }
+};
+
+// Per-scan records (--scan_stats 1), written to scans.csv as
+//   op_index,keys,bytes,latency_ns
+// Executors keep their records in memory and append them at the end of the
+// run, so scans never wait on the file.
+class ScanStatsFile {
+public:
+  struct Record {
+    uint64_t op_index, keys, bytes, latency_ns;
+  };
+
+  explicit ScanStatsFile(const std::string &path)
+      : out_(std::make_unique<Buffer>(path)) {
+    (*out_) << "op_index,keys,bytes,latency_ns" << std::endl;
+  }
+
+  void Write(const std::vector<Record> &records) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    for (const Record &r : records)
+      (*out_) << r.op_index << ',' << r.keys << ',' << r.bytes << ','
+              << r.latency_ns << '\n';
+    out_->flush();
+  }
+
+private:
+  std::unique_ptr<Buffer> out_;
+  std::mutex mutex_;
+};
+
+// Executes workload ops against the DB and times them (PER_OP_TIMER).
+//
+// runWorkload() drives a single executor over the whole workload; with
+// --threads N every replay thread drives its own (see threaded_replay.h), so
+// an executor is never shared between threads. Latencies go to the
+// executor's own stats file and/or histograms, either of which may be null.
+//
+// With --write_batch N (and/or --write_batch_bytes B) consecutive I/U/D/M
+// ops are grouped into one WriteBatch of up to N ops (or B bytes) applied
+// with a single db->Write. The batch is also applied before any other op,
+// so reads still see every earlier write, and when a --hist_interval
+// interval closes. Each op in a batch is charged an equal share of the
+// db->Write time, in stats.log, stats.bin and the histograms alike.
+//
+// --multiget K does the same for reads: up to K consecutive point queries
+// (P/Q) are issued as one db->MultiGet, applied before any other op, and
+// each query is charged an equal share of the MultiGet time.
+//
+// Range scans bound StartEnd scans with iterate_upper_bound, which points at
+// a reused end-key buffer, so the scan loop neither copies nor compares keys
+// itself, and values are only touched to count bytes for --scan_stats.
+// With --scan_reuse_iterator 1 one iterator per kind of scan is kept
+// for the executor's lifetime and Refresh()ed before every scan instead of
+// being created and destroyed; note that between scans it pins the
+// memtables and SST files it last saw.
+class OpExecutor {
+public:
+  OpExecutor(DB *db, std::unique_ptr<DBEnv> &env,
+             const WriteOptions &write_options,
+             const ReadOptions &read_options, std::shared_ptr<Buffer> log,
+             std::unique_ptr<Buffer> stats,
+             std::unique_ptr<OpLatencyHistograms> histograms,
+             ScanStatsFile *scan_stats = nullptr)
+      : db_(db), env_(env), write_options_(write_options),
+        read_options_(read_options), log_(std::move(log)),
+        stats_(std::move(stats)), histograms_(std::move(histograms)),
+        scan_stats_(scan_stats),
+        binary_stats_(env->IsBinaryStatsEnabled()),
+        hist_interval_(env->latency_hist_interval),
+        next_dump_(env->latency_hist_interval),
+        write_batch_size_(env->write_batch_size),
+        write_batch_bytes_(env->write_batch_bytes),
+        batching_(env->write_batch_size > 1 || env->write_batch_bytes > 0),
+        multiget_size_(env->multiget_batch_size > 1 ? env->multiget_batch_size
+                                                    : 0),
+        // Precompute whether to disable total_order_seek for prefix-bounded
+        // scans. When common_prefix_len == prefix_length, the scan is fully
+        // prefix-bounded and hash-based memtables can use the prefix
+        // extractor directly.
+        use_prefix_seek_(env->common_prefix_len > 0 &&
+                         env->common_prefix_len >= env->prefix_length),
+        reuse_scan_iterator_(env->scan_reuse_iterator != 0),
+        scan_options_(read_options) {
+    scan_options_.total_order_seek = !use_prefix_seek_;
+    bounded_scan_options_ = scan_options_;
+    bounded_scan_options_.iterate_upper_bound = &scan_upper_bound_;
+    if (multiget_size_ > 0) {
+      multiget_keys_.resize(multiget_size_);
+      multiget_slices_.resize(multiget_size_);
+      multiget_values_.resize(multiget_size_);
+      multiget_statuses_.resize(multiget_size_);
+      pending_gets_.reserve(multiget_size_);
+    }
+  }
+
+  // Runs `op`, the `op_index`-th (0-based) op of the workload.
+  Status Execute(const WorkloadOp &op, uint64_t op_index) {
+    Status s;
+    const Slice &key = op.key;
+
+#ifdef PER_OP_TIMER
+    // Close the --hist_interval interval(s) this op is past. A replay thread
+    // only sees some of the ops, so it may jump over whole intervals.
+    if (histograms_ && hist_interval_ != 0 && op_index >= next_dump_) {
+      FlushPending();
+      const uint64_t boundary = op_index / hist_interval_ * hist_interval_;
+      histograms_->Dump(boundary);
+      next_dump_ = boundary + hist_interval_;
+    }
+#endif // PER_OP_TIMER
+
+    // Pending reads go before a write and pending writes before a read, so
+    // batching never reorders ops.
+    if (multiget_size_ > 0 && !IsPointQuery(op.op))
+      FlushMultiGet();
+    if (batching_) {
+      if (IsBatchedWrite(op.op))
+        return AddToWriteBatch(op, op_index);
+      FlushWriteBatch();
+    }
+    if (multiget_size_ > 0 && IsPointQuery(op.op))
+      return AddToMultiGet(op, op_index);
+
+    switch (op.op) {
+      // [Insert]
+    case 'I': {
+#ifdef PER_OP_TIMER
+      auto start = std::chrono::high_resolution_clock::now();
+#endif // PER_OP_TIMER
+      s = db_->Put(write_options_, key, op.value);
+      GlobalWorkloadMonitor().RecordInsert();
+#ifdef PER_OP_TIMER
+      auto stop = std::chrono::high_resolution_clock::now();
+      auto duration =
+          std::chrono::duration_cast<std::chrono::nanoseconds>(stop - start);
+      LogLatency('I', duration.count(), op_index);
+      times_.inserts += duration.count();
+#endif // PER_OP_TIMER
+      break;
+    }
+      // [Update]
+    case 'U': {
+#ifdef PER_OP_TIMER
+      auto start = std::chrono::high_resolution_clock::now();
+#endif // PER_OP_TIMER
+      s = db_->Put(write_options_, key, op.value);
+      GlobalWorkloadMonitor().RecordUpdate();
+#ifdef PER_OP_TIMER
+      auto stop = std::chrono::high_resolution_clock::now();
+      auto duration =
+          std::chrono::duration_cast<std::chrono::nanoseconds>(stop - start);
+      LogLatency('U', duration.count(), op_index);
+      times_.updates += duration.count();
+#endif // PER_OP_TIMER
+      break;
+    }
+      // [PointDelete]
+    case 'D': {
+#ifdef PER_OP_TIMER
+      auto start = std::chrono::high_resolution_clock::now();
+#endif // PER_OP_TIMER
+      s = db_->Delete(write_options_, key);
+      GlobalWorkloadMonitor().RecordPointDelete();
+#ifdef PER_OP_TIMER
+      auto stop = std::chrono::high_resolution_clock::now();
+      auto duration =
+          std::chrono::duration_cast<std::chrono::nanoseconds>(stop - start);
+      LogLatency('D', duration.count(), op_index);
+      times_.point_deletes += duration.count();
+#endif // PER_OP_TIMER
+      break;
+    }
+      // [ProbePointQuery]
+    case 'P':
+    case 'Q': {
+#ifdef PER_OP_TIMER
+      auto start = std::chrono::high_resolution_clock::now();
+#endif // PER_OP_TIMER
+      s = db_->Get(read_options_, key, &value_);
+      GlobalWorkloadMonitor().RecordPointQuery();
+#ifdef PER_OP_TIMER
+      auto stop = std::chrono::high_resolution_clock::now();
+      auto duration =
+          std::chrono::duration_cast<std::chrono::nanoseconds>(stop - start);
+      LogLatency('Q', duration.count(), op_index);
+      times_.point_queries += duration.count();
+#endif // PER_OP_TIMER
+      break;
+    }
+      // [ScanRangeQuery]
+      // Handles two formats produced by Tectonic:
+      //   "S  <start_key> <end_key>"   — StartEnd  (key comparison termination)
+      //   "SC <start_key> <scan_len>"  — StartCount (YCSB-style fixed-length scan)
+      // The reader sets op.count_scan for "SC" and fills op.scan_len instead
+      // of the end key.
+    case 'S': {
+      const bool is_count_scan = op.count_scan;
+      const Slice &start_key = key;
+
+      // S <start_key> <end_key> — iterate until key >= end_key, which
+      // iterate_upper_bound (exclusive) enforces inside the iterator, so no
+      // key is copied or compared here.
+      if (!is_count_scan)
+        SetScanUpperBound(start_key, op.value);
+
+      // Not timed, like NewIterator before it.
+      Iterator *it = ScanIterator(is_count_scan);
+      assert(it->status().ok());
+      uint64_t keys = 0, bytes = 0;
+
+#ifdef PER_OP_TIMER
+      auto start = std::chrono::high_resolution_clock::now();
+#endif // PER_OP_TIMER
+
+      if (is_count_scan) {
+        // SC <start_key> <scan_len> — iterate exactly scan_len steps.
+        const uint64_t scan_len = op.scan_len;
+
+        for (it->Seek(start_key); it->Valid() && keys < scan_len; it->Next()) {
+          ++keys;
+          if (scan_stats_ != nullptr)
+            bytes += it->key().size() + it->value().size();
+        }
+      } else {
+        for (it->Seek(start_key); it->Valid(); it->Next()) {
+          ++keys;
+          if (scan_stats_ != nullptr)
+            bytes += it->key().size() + it->value().size();
+        }
+      }
+
+      if (!it->status().ok())
+        Log(it->status().ToString());
+#ifdef PER_OP_TIMER
+      auto stop = std::chrono::high_resolution_clock::now();
+      auto duration =
+          std::chrono::duration_cast<std::chrono::nanoseconds>(stop - start);
+      LogLatency('S', duration.count(), op_index);
+      times_.range_queries += duration.count();
+      if (scan_stats_ != nullptr)
+        scan_records_.push_back({op_index, keys, bytes,
+                                 static_cast<uint64_t>(duration.count())});
+#endif // PER_OP_TIMER
+      times_.scan_keys += keys;
+      times_.scan_bytes += bytes;
+      GlobalWorkloadMonitor().RecordRangeQuery();
+      if (!reuse_scan_iterator_)
+        delete it;
+      break;
+    }
+    // [RangeDelete]
+    case 'R': {
+      s = db_->DeleteRange(write_options_, key, op.value);
+      GlobalWorkloadMonitor().RecordRangeDelete();
+      break;
+    }
+    // [ReadModifyWrite]
+    case 'M': {
+#ifdef PER_OP_TIMER
+      auto start = std::chrono::high_resolution_clock::now();
+#endif // PER_OP_TIMER
+      s = db_->Merge(write_options_, key, op.value);
+      GlobalWorkloadMonitor().RecordUpdate();
+#ifdef PER_OP_TIMER
+      auto stop = std::chrono::high_resolution_clock::now();
+      auto duration =
+          std::chrono::duration_cast<std::chrono::nanoseconds>(stop - start);
+      LogLatency('M', duration.count(), op_index);
+      times_.merges += duration.count();
+#endif // PER_OP_TIMER
+      break;
+    }
+    default:
+      Log("ERROR: Case match NOT found !!");
+      break;
+    }
+
+    return s;
+  }
+
+  // Applies the pending write batch and MultiGet, if any; call it once the
+  // last op has been executed so they are part of the measured run.
+  Status FlushPending() {
+    Status s = FlushMultiGet();
+    Status write_status = FlushWriteBatch();
+    return s.ok() ? write_status : s;
+  }
+
+  // Dumps the last histogram interval, ending at `end_op`, and flushes.
+  void Finish(uint64_t end_op) {
+    FlushPending();
+    if (scan_stats_ != nullptr) {
+      scan_stats_->Write(scan_records_);
+      scan_records_.clear();
+    }
+    if (stats_)
+      stats_->flush();
+    if (histograms_)
+      histograms_->Dump(end_op);
+  }
+
+  const OpExecTimes &Times() const { return times_; }
+  uint64_t WriteBatches() const { return write_batches_; }
+  uint64_t MultiGets() const { return multigets_; }
+
+private:
+  struct PendingOp {
+    char op;
+    uint64_t op_index;
+  };
+
+  static bool IsBatchedWrite(char op) {
+    return op == 'I' || op == 'U' || op == 'D' || op == 'M';
+  }
+
+  static bool IsPointQuery(char op) { return op == 'P' || op == 'Q'; }
+
+  // Points scan_upper_bound_ at the end key of a StartEnd scan, synthesising
+  // a prefix-controlled end key when common_prefix_len > 0.
+  void SetScanUpperBound(const Slice &start_key, const Slice &end_key) {
+    if (env_->common_prefix_len > 0) {
+      const size_t prefix_bytes =
+          std::min((size_t)env_->common_prefix_len, start_key.size());
+      scan_end_.assign(start_key.data(), prefix_bytes);
+      if (end_key.size() > prefix_bytes)
+        scan_end_.append(end_key.data() + prefix_bytes,
+                         end_key.size() - prefix_bytes);
+    } else {
+      scan_end_.assign(end_key.data(), end_key.size());
+    }
+    scan_upper_bound_ = Slice(scan_end_);
+  }
+
+  // A new iterator, or the pooled one refreshed to the current DB state
+  // (recreated if Refresh is not supported).
+  Iterator *ScanIterator(bool count_scan) {
+    const ReadOptions &options =
+        count_scan ? scan_options_ : bounded_scan_options_;
+    if (!reuse_scan_iterator_)
+      return db_->NewIterator(options);
+
+    std::unique_ptr<Iterator> &pooled =
+        count_scan ? count_scan_iterator_ : bounded_scan_iterator_;
+    if (pooled && !pooled->Refresh().ok())
+      pooled.reset();
+    if (!pooled)
+      pooled.reset(db_->NewIterator(options));
+    return pooled.get();
+  }
+
+  Status FlushWriteBatch() {
+    if (pending_writes_.empty())
+      return Status::OK();
+#ifdef PER_OP_TIMER
+    auto start = std::chrono::high_resolution_clock::now();
+#endif // PER_OP_TIMER
+    Status s = db_->Write(write_options_, &write_batch_);
+#ifdef PER_OP_TIMER
+    auto stop = std::chrono::high_resolution_clock::now();
+    const uint64_t batch_ns =
+        std::chrono::duration_cast<std::chrono::nanoseconds>(stop - start)
+            .count();
+    const uint64_t n = pending_writes_.size();
+    for (uint64_t i = 0; i < n; ++i) {
+      const uint64_t share = batch_ns / n + (i < batch_ns % n ? 1 : 0);
+      LogLatency(pending_writes_[i].op, share, pending_writes_[i].op_index);
+      AddTime(pending_writes_[i].op, share);
+    }
+#endif // PER_OP_TIMER
+    if (!s.ok())
+      Log(s.ToString());
+    write_batch_.Clear();
+    pending_writes_.clear();
+    ++write_batches_;
+    return s;
+  }
+
+  Status FlushMultiGet() {
+    const size_t n = pending_gets_.size();
+    if (n == 0)
+      return Status::OK();
+    for (size_t i = 0; i < n; ++i)
+      multiget_slices_[i] = multiget_keys_[i];
+#ifdef PER_OP_TIMER
+    auto start = std::chrono::high_resolution_clock::now();
+#endif // PER_OP_TIMER
+    db_->MultiGet(read_options_, db_->DefaultColumnFamily(), n,
+                  multiget_slices_.data(), multiget_values_.data(),
+                  multiget_statuses_.data());
+#ifdef PER_OP_TIMER
+    auto stop = std::chrono::high_resolution_clock::now();
+    const uint64_t batch_ns =
+        std::chrono::duration_cast<std::chrono::nanoseconds>(stop - start)
+            .count();
+    for (size_t i = 0; i < n; ++i) {
+      const uint64_t share = batch_ns / n + (i < batch_ns % n ? 1 : 0);
+      LogLatency('Q', share, pending_gets_[i].op_index);
+      times_.point_queries += share;
+    }
+#endif // PER_OP_TIMER
+    Status s;
+    for (size_t i = 0; i < n; ++i) {
+      if (!multiget_statuses_[i].ok() && !multiget_statuses_[i].IsNotFound()) {
+        Log(multiget_statuses_[i].ToString());
+        s = multiget_statuses_[i];
+      }
+      multiget_values_[i].Reset();
+    }
+    pending_gets_.clear();
+    ++multigets_;
+    return s;
+  }
+
+  // Keys are copied: the text reader reuses its buffers on every op. The
+  // strings keep their capacity, so this stops allocating once warm.
+  Status AddToMultiGet(const WorkloadOp &op, uint64_t op_index) {
+    multiget_keys_[pending_gets_.size()].assign(op.key.data(), op.key.size());
+    pending_gets_.push_back({op.op, op_index});
+    GlobalWorkloadMonitor().RecordPointQuery();
+    if (pending_gets_.size() >= multiget_size_)
+      return FlushMultiGet();
+    return Status::OK();
+  }
+
+  Status AddToWriteBatch(const WorkloadOp &op, uint64_t op_index) {
+    switch (op.op) {
+    case 'I':
+      write_batch_.Put(op.key, op.value);
+      GlobalWorkloadMonitor().RecordInsert();
+      break;
+    case 'U':
+      write_batch_.Put(op.key, op.value);
+      GlobalWorkloadMonitor().RecordUpdate();
+      break;
+    case 'D':
+      write_batch_.Delete(op.key);
+      GlobalWorkloadMonitor().RecordPointDelete();
+      break;
+    case 'M':
+      write_batch_.Merge(op.key, op.value);
+      GlobalWorkloadMonitor().RecordUpdate();
+      break;
+    }
+    pending_writes_.push_back({op.op, op_index});
+    if ((write_batch_size_ > 0 && pending_writes_.size() >= write_batch_size_) ||
+        (write_batch_bytes_ > 0 &&
+         write_batch_.GetDataSize() >= write_batch_bytes_))
+      return FlushWriteBatch();
+    return Status::OK();
+  }
+
+  void AddTime(char op, uint64_t latency_ns) {
+    switch (op) {
+    case 'I': times_.inserts += latency_ns; break;
+    case 'U': times_.updates += latency_ns; break;
+    case 'D': times_.point_deletes += latency_ns; break;
+    case 'M': times_.merges += latency_ns; break;
+    }
+  }
+
+  void LogLatency(char op, uint64_t latency_ns, uint64_t op_index) {
+    if (histograms_)
+      histograms_->Record(op, latency_ns);
+    if (!stats_)
+      return;
+    if (binary_stats_) {
+      WriteOpStatsRecord(stats_, op, latency_ns, op_index);
+    } else {
+      (*stats_) << op << ": " << latency_ns << std::endl;
+    }
+  }
+
+  // workload.log is shared by every executor.
+  void Log(const std::string &message) {
+    static std::mutex mutex;
+    std::lock_guard<std::mutex> lock(mutex);
+    (*log_) << message << std::endl << std::flush;
+  }
+
+  DB *db_;
+  std::unique_ptr<DBEnv> &env_;
+  const WriteOptions &write_options_;
+  const ReadOptions &read_options_;
+  std::shared_ptr<Buffer> log_;
+  std::unique_ptr<Buffer> stats_;
+  std::unique_ptr<OpLatencyHistograms> histograms_;
+  ScanStatsFile *scan_stats_;
+  const bool binary_stats_;
+  const uint64_t hist_interval_;
+  uint64_t next_dump_;
+  const uint64_t write_batch_size_;
+  const uint64_t write_batch_bytes_;
+  const bool batching_;
+  const uint64_t multiget_size_;
+  const bool use_prefix_seek_;
+  const bool reuse_scan_iterator_;
+  ReadOptions scan_options_;
+  ReadOptions bounded_scan_options_;
+  std::string scan_end_;
+  Slice scan_upper_bound_;
+  std::unique_ptr<Iterator> count_scan_iterator_;
+  std::unique_ptr<Iterator> bounded_scan_iterator_;
+  std::vector<ScanStatsFile::Record> scan_records_;
+
+  OpExecTimes times_;
+  std::string value_;
+  WriteBatch write_batch_;
+  std::vector<PendingOp> pending_writes_;
+  uint64_t write_batches_ = 0;
+  std::vector<std::string> multiget_keys_;
+  std::vector<Slice> multiget_slices_;
+  std::vector<PinnableSlice> multiget_values_;
+  std::vector<Status> multiget_statuses_;
+  std::vector<PendingOp> pending_gets_;
+  uint64_t multigets_ = 0;
+};
+
+#endif // OP_EXECUTOR_H_
@@ -0,0 +1,82 @@
+#ifndef OP_STATS_H_
+#define OP_STATS_H_
+
+#include <chrono>
+#include <cstdint>
+#include <cstring>
+#include <memory>
+
+#include "buffer.h"
+#include "db_env.h"
+
+// Binary per-op latency format (--binary_stats 1), written to `stats.bin`
+// instead of the "X: <ns>" lines of `stats.log`.
+//
+// The file starts with one OpStatsHeader followed by a flat array of
+// OpStatsRecord. Both are packed and little-endian so the Python side
+// (plot/binary_stats.py) can memory-map the records as a NumPy structured
+// array. The number of records is (file_size - sizeof(header)) / record_size.
+
+constexpr char kOpStatsMagic[8] = {'L', 'S', 'M', 'O', 'P', 'L', 'A', 'T'};
+constexpr uint32_t kOpStatsVersion = 1;
+
+#pragma pack(push, 1)
+struct OpStatsHeader {
+  char magic[8];
+  uint32_t version;
+  uint32_t header_size;
+  uint32_t record_size;
+  uint16_t memtable_factory; // [m]
+  uint16_t compaction_style; // [C]
+  uint32_t entry_size;       // [E]
+  uint32_t entries_per_page; // [B]
+  uint32_t buffer_size_in_pages; // [P]
+  uint64_t buffer_size;      // [M]
+  double size_ratio;         // [T]
+  uint64_t bucket_count;     // [H]
+  uint32_t prefix_length;    // [X]
+  uint32_t reserved[2];
+  uint64_t start_time_ns;    // wall clock, ns since epoch
+};
+
+struct OpStatsRecord {
+  char op;             // workload opcode: I, U, D, Q, S, M
+  uint64_t latency_ns;
+  uint64_t op_index;   // 0-based line of the op in workload.txt
+};
+#pragma pack(pop)
+
+static_assert(sizeof(OpStatsHeader) == 80, "OpStatsHeader must be packed");
+static_assert(sizeof(OpStatsRecord) == 17, "OpStatsRecord must be packed");
+
+inline void WriteOpStatsHeader(std::unique_ptr<Buffer> &stats,
+                               std::unique_ptr<DBEnv> &env) {
+  OpStatsHeader header;
+  std::memset(&header, 0, sizeof(header));
+  std::memcpy(header.magic, kOpStatsMagic, sizeof(header.magic));
+  header.version = kOpStatsVersion;
+  header.header_size = sizeof(OpStatsHeader);
+  header.record_size = sizeof(OpStatsRecord);
+  header.memtable_factory = env->memtable_factory;
+  header.compaction_style = static_cast<uint16_t>(env->compaction_style);
+  header.entry_size = env->entry_size;
+  header.entries_per_page = env->entries_per_page;
+  header.buffer_size_in_pages = env->buffer_size_in_pages;
+  header.buffer_size = env->GetBufferSize();
+  header.size_ratio = env->size_ratio;
+  header.bucket_count = env->bucket_count;
+  header.prefix_length = env->prefix_length;
+  header.start_time_ns =
+      std::chrono::duration_cast<std::chrono::nanoseconds>(
+          std::chrono::system_clock::now().time_since_epoch())
+          .count();
+  stats->write(reinterpret_cast<const char *>(&header), sizeof(header));
+}
+
+inline void WriteOpStatsRecord(std::unique_ptr<Buffer> &stats, char op,
+                               uint64_t latency_ns, uint64_t op_index) {
+  OpStatsRecord record{op, latency_ns, op_index};
+  stats->write(reinterpret_cast<const char *>(&record), sizeof(record));
+}
+
+#endif // OP_STATS_H_
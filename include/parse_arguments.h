@@ -71,6 +71,80 @@ int parse_arguments(int argc, char *argv[], std::unique_ptr<DBEnv> &env) {
       "Enable RocksDB's internal RocksDB stats [def: 0]", {"stat"});
   args::ValueFlag<int> show_progress_cmd(
       group1, "show_progress_bar", "Shows progress bar [def: 0]", {"progress"});
+  args::ValueFlag<int> binary_stats_cmd(
+      group1, "binary_stats",
+      "Write per-op latencies as fixed-width binary records to stats.bin "
+      "instead of text lines to stats.log [def: 0]",
+      {"binary_stats"});
+  args::ValueFlag<int> binary_workload_cmd(
+      group1, "binary_workload",
+      "Replay workload.bin (see scripts/workload_bin.py) instead of "
+      "workload.txt [def: 0]",
+      {"binary_workload"});
+  args::ValueFlag<int> latency_hist_cmd(
+      group1, "hist",
+      "Per-op latency histograms in latency.hist (see plot/latency_hist.py): "
+      "1 instead of the per-op stats.log / stats.bin records, 2 in addition "
+      "to them [def: 0]",
+      {"hist"});
+  args::ValueFlag<long> latency_hist_interval_cmd(
+      group1, "hist_interval",
+      "Dump the latency histograms every this many ops; 0 dumps them once at "
+      "the end [def: 0]",
+      {"hist_interval"});
+  args::ValueFlag<int> replay_threads_cmd(
+      group1, "threads",
+      "Replay the workload on this many client threads; latencies are kept "
+      "in latency.hist per thread [def: 1]",
+      {"threads"});
+  args::ValueFlag<int> thread_partition_cmd(
+      group1, "thread_partition",
+      "Split the workload between replay threads by 0: key hash, 1: "
+      "round-robin ranges of --thread_chunk lines [def: 0]",
+      {"thread_partition"});
+  args::ValueFlag<long> thread_chunk_cmd(
+      group1, "thread_chunk",
+      "Lines per range with --thread_partition 1 [def: 1024]",
+      {"thread_chunk"});
+  args::ValueFlag<int> reader_threads_cmd(
+      group1, "reader_threads",
+      "Issue the workload's point and range queries from this many reader "
+      "threads while the replay threads ingest the other ops [def: 0]",
+      {"reader_threads"});
+  args::ValueFlag<std::string> query_workload_cmd(
+      group1, "query_workload",
+      "Query stream for the reader threads (text, or binary if it ends in "
+      ".bin); the workload's own queries then stay with the writers",
+      {"query_workload"});
+  args::ValueFlag<long> write_batch_size_cmd(
+      group1, "write_batch",
+      "Apply consecutive inserts/updates/deletes/merges as WriteBatches of "
+      "up to this many ops [def: 0]",
+      {"write_batch"});
+  args::ValueFlag<long> write_batch_bytes_cmd(
+      group1, "write_batch_bytes",
+      "Close a WriteBatch once it holds this many bytes [def: 0]",
+      {"write_batch_bytes"});
+  args::ValueFlag<long> multiget_batch_size_cmd(
+      group1, "multiget",
+      "Issue up to this many consecutive point queries as one MultiGet "
+      "[def: 0]",
+      {"multiget"});
+  args::ValueFlag<int> scan_reuse_iterator_cmd(
+      group1, "scan_reuse_iterator",
+      "Refresh() one pooled iterator per scan kind instead of creating an "
+      "iterator per range query [def: 0]",
+      {"scan_reuse_iterator"});
+  args::ValueFlag<int> scan_stats_cmd(
+      group1, "scan_stats",
+      "Record the keys and bytes returned by every range query in scans.csv "
+      "[def: 0]",
+      {"scan_stats"});
+  args::ValueFlag<int> concurrent_memtable_write_cmd(
+      group1, "concurrent_writes",
+      "allow_concurrent_memtable_write: let replay threads insert into the "
+      "memtable in parallel where it supports it (skiplist) [def: 0]",
+      {"concurrent_writes"});
 
   args::ValueFlag<long> num_inserts_cmd(
       group1, "inserts",
@@ -185,6 +259,53 @@ int parse_arguments(int argc, char *argv[], std::unique_ptr<DBEnv> &env) {
                           : env->IsRocksDBStatEnabled());
   env->SetShowProgress(show_progress_cmd ? args::get(show_progress_cmd)
                                          : env->IsShowProgressEnabled());
+  env->SetBinaryStats(binary_stats_cmd ? args::get(binary_stats_cmd)
+                                       : env->IsBinaryStatsEnabled());
+  env->SetBinaryWorkload(binary_workload_cmd
+                             ? args::get(binary_workload_cmd)
+                             : env->IsBinaryWorkloadEnabled());
+  env->latency_hist =
+      latency_hist_cmd ? args::get(latency_hist_cmd) : env->latency_hist;
+  env->latency_hist_interval = latency_hist_interval_cmd
+                                   ? args::get(latency_hist_interval_cmd)
+                                   : env->latency_hist_interval;
+  env->replay_threads =
+      replay_threads_cmd ? args::get(replay_threads_cmd) : env->replay_threads;
+  env->reader_threads =
+      reader_threads_cmd ? args::get(reader_threads_cmd) : env->reader_threads;
+  env->query_workload =
+      query_workload_cmd ? args::get(query_workload_cmd) : env->query_workload;
+  // latency.hist tags blocks with an 8-bit thread id.
+  if (env->replay_threads < 1 || env->reader_threads < 0 ||
+      env->replay_threads + env->reader_threads > 255) {
+    std::cerr << "--threads must be at least 1 and --threads + "
+                 "--reader_threads at most 255"
+              << std::endl;
+    return 1;
+  }
+  if (!env->query_workload.empty() && env->reader_threads == 0) {
+    std::cerr << "--query_workload needs --reader_threads" << std::endl;
+    return 1;
+  }
+  env->thread_partition = thread_partition_cmd ? args::get(thread_partition_cmd)
+                                               : env->thread_partition;
+  env->thread_chunk =
+      thread_chunk_cmd ? args::get(thread_chunk_cmd) : env->thread_chunk;
+  env->write_batch_size = write_batch_size_cmd ? args::get(write_batch_size_cmd)
+                                               : env->write_batch_size;
+  env->write_batch_bytes = write_batch_bytes_cmd
+                               ? args::get(write_batch_bytes_cmd)
+                               : env->write_batch_bytes;
+  env->multiget_batch_size = multiget_batch_size_cmd
+                                 ? args::get(multiget_batch_size_cmd)
+                                 : env->multiget_batch_size;
+  env->scan_reuse_iterator = scan_reuse_iterator_cmd
+                                 ? args::get(scan_reuse_iterator_cmd)
+                                 : env->scan_reuse_iterator;
+  env->scan_stats = scan_stats_cmd ? args::get(scan_stats_cmd) : env->scan_stats;
+  env->allow_concurrent_memtable_write =
+      concurrent_memtable_write_cmd ? args::get(concurrent_memtable_write_cmd)
+                                    : env->allow_concurrent_memtable_write;
 
   // LSM options
   env->num_inserts =
@@ -0,0 +1,344 @@
+#ifndef THREADED_REPLAY_H_
+#define THREADED_REPLAY_H_
+
+#include <atomic>
+#include <chrono>
+#include <condition_variable>
+#include <cstdint>
+#include <deque>
+#include <functional>
+#include <memory>
+#include <mutex>
+#include <string>
+#include <string_view>
+#include <thread>
+#include <vector>
+
+#include "op_executor.h"
+#include "workload_reader.h"
+
+// Multi-threaded replay (--threads N).
+//
+// The workload is streamed to the threads while they replay it: the main
+// thread reads it and deals every op to one thread,
+//
+//   --thread_partition 0  by key hash: every op on a key goes to the same
+//                         thread, so per-key order (insert before update
+//                         before delete) is kept;
+//   --thread_partition 1  round-robin ranges of --thread_chunk consecutive
+//                         lines, keeping the workload's phases interleaved.
+//
+// Ops are handed over in chunks of kReplayChunkOps through a queue of at most
+// kReplayQueueChunks chunks per thread, and replayed chunks are reused, so
+// only a bounded window of the workload is ever copied. The replay does not
+// add a copy of the workload (tens of GB for the large specs) to the RSS the
+// memtable measurements see. As in single-threaded replay, reading the
+// workload is part of the measured run.
+//
+// Each thread replays its partition with its own OpExecutor, so timers and
+// histograms are thread-local; histograms land in latency.hist tagged with
+// the thread and the per-op times are summed at the end.
+//
+// --reader_threads R adds R query threads for reader/writer interference
+// runs. They take the point and range queries (P/Q/S) of the workload as it
+// is read, or every op of --query_workload, round-robin, and issue them
+// against the live DB while the replay threads ingest the rest. Readers keep
+// their first kReaderCycleChunks chunks of queries (recycling the rest, so
+// their memory stays bounded too) and cycle through those until the last
+// replay thread is done, so the whole ingestion runs under read load. A
+// --query_workload is read before the run and held whole. Their
+// histograms are tagged kHistRoleReader and their intervals count the
+// reader's own queries rather than workload lines.
+
+constexpr size_t kReplayChunkOps = 4096;
+constexpr size_t kReplayQueueChunks = 4;
+constexpr size_t kReaderCycleChunks = 16;
+
+// An op of a partition; key and value are offsets into the partition arena.
+struct PartitionedOp {
+  char op;
+  bool count_scan;
+  uint32_t key_size;
+  uint32_t value_size;
+  uint64_t key_offset;
+  uint64_t scan_len;
+  uint64_t op_index; // 0-based line of the op in the workload
+};
+
+class WorkloadPartition {
+public:
+  void Add(const WorkloadOp &op, uint64_t op_index) {
+    PartitionedOp entry;
+    entry.op = op.op;
+    entry.count_scan = op.count_scan;
+    entry.key_size = static_cast<uint32_t>(op.key.size());
+    entry.value_size = static_cast<uint32_t>(op.value.size());
+    entry.key_offset = arena_.size();
+    entry.scan_len = op.scan_len;
+    entry.op_index = op_index;
+    arena_.append(op.key.data(), op.key.size());
+    arena_.append(op.value.data(), op.value.size());
+    ops_.push_back(entry);
+  }
+
+  size_t Size() const { return ops_.size(); }
+
+  uint64_t OpIndex(size_t i) const { return ops_[i].op_index; }
+
+  // Fills `op` with the i-th op; its Slices point into the arena.
+  void Get(size_t i, WorkloadOp *op) const {
+    const PartitionedOp &entry = ops_[i];
+    const char *key = arena_.data() + entry.key_offset;
+    op->op = entry.op;
+    op->count_scan = entry.count_scan;
+    op->key = Slice(key, entry.key_size);
+    op->value = Slice(key + entry.key_size, entry.value_size);
+    op->scan_len = entry.scan_len;
+  }
+
+  // Empties the partition, keeping its buffers for reuse.
+  void Clear() {
+    arena_.clear();
+    ops_.clear();
+  }
+
+private:
+  std::string arena_;
+  std::vector<PartitionedOp> ops_;
+};
+
+// Chunks of one thread's partition on their way from the dispatcher to the
+// thread. Push blocks while kReplayQueueChunks chunks are pending, so the
+// dispatcher never runs far ahead of the replay.
+class PartitionQueue {
+public:
+  void Push(std::unique_ptr<WorkloadPartition> chunk) {
+    std::unique_lock<std::mutex> lock(mutex_);
+    not_full_.wait(lock,
+                   [this] { return pending_.size() < kReplayQueueChunks; });
+    pending_.push_back(std::move(chunk));
+    not_empty_.notify_one();
+  }
+
+  // No more chunks will be pushed.
+  void Close() {
+    std::lock_guard<std::mutex> lock(mutex_);
+    closed_ = true;
+    not_empty_.notify_one();
+  }
+
+  // The next chunk; nullptr once the queue is closed and drained.
+  std::unique_ptr<WorkloadPartition> Pop() {
+    std::unique_lock<std::mutex> lock(mutex_);
+    not_empty_.wait(lock, [this] { return !pending_.empty() || closed_; });
+    if (pending_.empty())
+      return nullptr;
+    std::unique_ptr<WorkloadPartition> chunk = std::move(pending_.front());
+    pending_.pop_front();
+    not_full_.notify_one();
+    return chunk;
+  }
+
+  // Hands a replayed chunk back to the dispatcher.
+  void Recycle(std::unique_ptr<WorkloadPartition> chunk) {
+    chunk->Clear();
+    std::lock_guard<std::mutex> lock(mutex_);
+    free_.push_back(std::move(chunk));
+  }
+
+  // An empty chunk, a recycled one if there is any.
+  std::unique_ptr<WorkloadPartition> Acquire() {
+    std::lock_guard<std::mutex> lock(mutex_);
+    if (free_.empty())
+      return std::make_unique<WorkloadPartition>();
+    std::unique_ptr<WorkloadPartition> chunk = std::move(free_.back());
+    free_.pop_back();
+    return chunk;
+  }
+
+private:
+  std::mutex mutex_;
+  std::condition_variable not_empty_, not_full_;
+  std::deque<std::unique_ptr<WorkloadPartition>> pending_;
+  std::vector<std::unique_ptr<WorkloadPartition>> free_;
+  bool closed_ = false;
+};
+
+inline bool IsQueryOp(char op) { return op == 'P' || op == 'Q' || op == 'S'; }
+
+// Reads `workload` and deals its ops to the first `threads` queues (replay
+// threads) and the `readers` queues after them, which get the queries.
+// Returns the number of ops read; the caller closes the queues.
+inline uint64_t DispatchWorkload(WorkloadReader *workload, int threads,
+                                 int partition_mode, uint64_t chunk,
+                                 int readers,
+                                 std::vector<PartitionQueue> &queues) {
+  std::vector<std::unique_ptr<WorkloadPartition>> filling(threads + readers);
+  std::hash<std::string_view> hash;
+  if (chunk == 0)
+    chunk = 1;
+
+  WorkloadOp op;
+  uint64_t op_index = 0, queries = 0;
+  while (workload->Next(&op)) {
+    size_t owner;
+    if (readers > 0 && IsQueryOp(op.op))
+      owner = threads + queries++ % readers;
+    else if (partition_mode == 0)
+      owner = hash(std::string_view(op.key.data(), op.key.size())) % threads;
+    else
+      owner = (op_index / chunk) % threads;
+    std::unique_ptr<WorkloadPartition> &partition = filling[owner];
+    if (!partition)
+      partition = queues[owner].Acquire();
+    partition->Add(op, op_index);
+    if (partition->Size() == kReplayChunkOps)
+      queues[owner].Push(std::move(partition));
+    ++op_index;
+  }
+  for (size_t t = 0; t < filling.size(); ++t)
+    if (filling[t])
+      queues[t].Push(std::move(filling[t]));
+  return op_index;
+}
+
+// Splits the ops of a separate query stream (--query_workload) into
+// `readers` partitions, round-robin. Read before the clock starts.
+inline std::vector<WorkloadPartition> PartitionQueries(WorkloadReader *queries,
+                                                       int readers) {
+  std::vector<WorkloadPartition> partitions(readers);
+  WorkloadOp op;
+  uint64_t op_index = 0;
+  while (queries->Next(&op)) {
+    partitions[op_index % readers].Add(op, op_index);
+    ++op_index;
+  }
+  return partitions;
+}
+
+// Per-thread outcome of ReplayThreads().
+struct ThreadReplayResult {
+  OpExecTimes times;
+  uint64_t ops = 0;
+  uint64_t elapsed_ns = 0; // wall time from the start signal to the last op
+  uint64_t write_batches = 0;
+  uint64_t multigets = 0;
+  Status status;
+};
+
+// Replays `workload` on --threads replay threads and --reader_threads reader
+// threads, which take their queries from `reader_queries` when it is not
+// empty (--query_workload) and from the workload otherwise. All threads are
+// created before any starts, so thread start-up is not part of the
+// measurement; `*total_ops` is set to the number of workload ops.
+inline std::vector<ThreadReplayResult>
+ReplayThreads(DB *db, std::unique_ptr<DBEnv> &env,
+              const WriteOptions &write_options,
+              const ReadOptions &read_options, std::shared_ptr<Buffer> log,
+              LatencyHistFile *hist_file, ScanStatsFile *scan_stats,
+              WorkloadReader *workload,
+              std::vector<WorkloadPartition> reader_queries,
+              uint64_t *total_ops) {
+  const int replayers = env->replay_threads;
+  const int readers = env->reader_threads;
+  const int threads = replayers + readers;
+  std::vector<ThreadReplayResult> results(threads);
+  std::vector<PartitionQueue> queues(threads);
+  std::atomic<int> ready{0};
+  std::atomic<bool> go{false};
+  std::atomic<int> replaying{replayers};
+  std::atomic<uint64_t> workload_ops{0};
+
+  // A --query_workload is handed to the readers whole.
+  const bool query_stream = !reader_queries.empty();
+  for (int r = 0; query_stream && r < readers; ++r) {
+    queues[replayers + r].Push(
+        std::make_unique<WorkloadPartition>(std::move(reader_queries[r])));
+    queues[replayers + r].Close();
+  }
+
+  auto worker = [&](int t) {
+    const bool reader = t >= replayers;
+    std::unique_ptr<OpLatencyHistograms> histograms;
+    if (hist_file != nullptr)
+      histograms = std::make_unique<OpLatencyHistograms>(
+          hist_file, static_cast<uint8_t>(t),
+          reader ? kHistRoleReader : kHistRoleReplay);
+    OpExecutor executor(db, env, write_options, read_options, log, nullptr,
+                        std::move(histograms), scan_stats);
+    PartitionQueue &queue = queues[t];
+    ThreadReplayResult &result = results[t];
+    // The reader's queries cycled once the workload is exhausted.
+    std::vector<std::unique_ptr<WorkloadPartition>> kept;
+    WorkloadOp op;
+    uint64_t executed = 0;
+
+    auto execute = [&](const WorkloadPartition &chunk, size_t i) {
+      chunk.Get(i, &op);
+      Status s = executor.Execute(op, reader ? executed : chunk.OpIndex(i));
+      if (!s.ok() && !s.IsNotFound() && result.status.ok())
+        result.status = s;
+      ++executed;
+    };
+
+    ready.fetch_add(1);
+    while (!go.load(std::memory_order_acquire))
+      std::this_thread::yield();
+
+    auto start = std::chrono::high_resolution_clock::now();
+    for (std::unique_ptr<WorkloadPartition> chunk = queue.Pop(); chunk;
+         chunk = queue.Pop()) {
+      for (size_t i = 0; i < chunk->Size(); ++i)
+        execute(*chunk, i);
+      if (reader && kept.size() < kReaderCycleChunks)
+        kept.push_back(std::move(chunk));
+      else
+        queue.Recycle(std::move(chunk));
+    }
+    if (!reader) {
+      replaying.fetch_sub(1, std::memory_order_release);
+    } else {
+      // One pass done, keep querying while ingestion runs.
+      bool querying = executed > 0;
+      while (querying) {
+        for (const std::unique_ptr<WorkloadPartition> &chunk : kept)
+          for (size_t i = 0; i < chunk->Size() && querying; ++i) {
+            execute(*chunk, i);
+            querying = replaying.load(std::memory_order_acquire) > 0;
+          }
+      }
+    }
+    Status s = executor.FlushPending();
+    if (!s.ok() && result.status.ok())
+      result.status = s;
+    result.elapsed_ns =
+        std::chrono::duration_cast<std::chrono::nanoseconds>(
+            std::chrono::high_resolution_clock::now() - start)
+            .count();
+    result.ops = executed;
+    executor.Finish(reader ? executed : workload_ops.load());
+    result.times = executor.Times();
+    result.write_batches = executor.WriteBatches();
+    result.multigets = executor.MultiGets();
+  };
+
+  std::vector<std::thread> pool;
+  pool.reserve(threads);
+  for (int t = 0; t < threads; ++t)
+    pool.emplace_back(worker, t);
+  while (ready.load() < threads)
+    std::this_thread::yield();
+  go.store(true, std::memory_order_release);
+  workload_ops = DispatchWorkload(workload, replayers, env->thread_partition,
+                                  env->thread_chunk,
+                                  query_stream ? 0 : readers, queues);
+  // Replay threads read the op count once their queue is drained.
+  for (PartitionQueue &queue : queues)
+    queue.Close();
+  for (std::thread &thread : pool)
+    thread.join();
+  *total_ops = workload_ops;
+  return results;
+}
+
+#endif // THREADED_REPLAY_H_
@@ -0,0 +1,223 @@
+#ifndef WORKLOAD_READER_H_
+#define WORKLOAD_READER_H_
+
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+#include <cstddef>
+#include <cstdint>
+#include <cstring>
+#include <fstream>
+#include <iostream>
+#include <memory>
+#include <sstream>
+#include <string>
+
+#include <rocksdb/slice.h>
+
+// Workload sources for runWorkload().
+//
+// workload.txt is the text format written by Tectonic / generate_workload.py,
+// one op per line. workload.bin (--binary_workload 1) holds the same ops as
+// length-prefixed records, written by scripts/workload_bin.py:
+//
+//   WorkloadFileHeader
+//   { WorkloadRecordHeader, key bytes, value bytes } * num_ops
+//
+// Everything is packed and little-endian. The value holds the value of I/U/M,
+// the end key of S/R, and the scan length (uint64) of a StartCount scan
+// (op 'S' with kWorkloadCountScan set). The binary file is mmap'ed and ops
+// hand out Slices pointing into the mapping, so replaying it does no parsing
+// and no allocation.
+
+constexpr char kWorkloadMagic[8] = {'L', 'S', 'M', 'W', 'L', 'O', 'A', 'D'};
+constexpr uint32_t kWorkloadVersion = 1;
+constexpr uint8_t kWorkloadCountScan = 0x1;
+
+#pragma pack(push, 1)
+struct WorkloadFileHeader {
+  char magic[8];
+  uint32_t version;
+  uint32_t header_size;
+  uint64_t num_ops;
+  uint64_t data_size; // bytes of records following the header
+};
+
+struct WorkloadRecordHeader {
+  char op;           // I, U, D, P, S, R, M
+  uint8_t flags;     // kWorkloadCountScan
+  uint16_t key_size;
+  uint32_t value_size;
+};
+#pragma pack(pop)
+
+static_assert(sizeof(WorkloadFileHeader) == 32,
+              "WorkloadFileHeader must be packed");
+static_assert(sizeof(WorkloadRecordHeader) == 8,
+              "WorkloadRecordHeader must be packed");
+
+struct WorkloadOp {
+  char op = 0;
+  bool count_scan = false; // "SC <start_key> <scan_len>"
+  rocksdb::Slice key;      // key, or start key of S/R
+  rocksdb::Slice value;    // value, or end key of S/R
+  uint64_t scan_len = 0;
+};
+
+class WorkloadReader {
+public:
+  virtual ~WorkloadReader() = default;
+  // Fills `op` with the next op; false at the end of the workload.
+  virtual bool Next(WorkloadOp *op) = 0;
+  // Number of ops, 0 if unknown.
+  virtual size_t Size() = 0;
+  // False if the workload cannot be read (missing, unmappable, wrong
+  // version) or a malformed record was met.
+  bool Valid() const { return valid_; }
+
+protected:
+  bool valid_ = false;
+};
+
+// Line-based reader of workload.txt; an empty line ends the workload.
+class TextWorkloadReader : public WorkloadReader {
+public:
+  explicit TextWorkloadReader(const std::string &path)
+      : path_(path), file_(path) {
+    valid_ = static_cast<bool>(file_);
+    if (!valid_)
+      std::cerr << "Cannot open " << path << std::endl;
+  }
+
+  bool Next(WorkloadOp *op) override {
+    if (!std::getline(file_, line_) || line_.empty())
+      return false;
+
+    std::istringstream stream(line_);
+    stream >> op->op;
+    // "SC": the next char on the stream is 'C' with no whitespace between.
+    op->count_scan = (op->op == 'S' && stream.peek() == 'C');
+    if (op->count_scan)
+      stream.get();
+
+    key_.clear();
+    value_.clear();
+    stream >> key_;
+    if (op->count_scan)
+      stream >> op->scan_len;
+    else
+      stream >> value_;
+    op->key = key_;
+    op->value = value_;
+    return true;
+  }
+
+  size_t Size() override {
+    if (size_ == 0) {
+      std::ifstream counter(path_);
+      std::string line;
+      while (std::getline(counter, line))
+        ++size_;
+    }
+    return size_;
+  }
+
+private:
+  std::string path_;
+  std::ifstream file_;
+  std::string line_, key_, value_;
+  size_t size_ = 0;
+};
+
+// mmap'ed reader of workload.bin.
+class BinaryWorkloadReader : public WorkloadReader {
+public:
+  explicit BinaryWorkloadReader(const std::string &path) {
+    int fd = open(path.c_str(), O_RDONLY);
+    if (fd < 0) {
+      std::cerr << "Cannot open " << path << std::endl;
+      return;
+    }
+    struct stat st;
+    if (fstat(fd, &st) == 0 && st.st_size >= (off_t)sizeof(WorkloadFileHeader)) {
+      size_ = st.st_size;
+      void *addr = mmap(nullptr, size_, PROT_READ, MAP_PRIVATE, fd, 0);
+      if (addr != MAP_FAILED) {
+        base_ = static_cast<const char *>(addr);
+#ifdef MADV_SEQUENTIAL
+        madvise(addr, size_, MADV_SEQUENTIAL);
+#endif
+      }
+    }
+    close(fd);
+    if (base_ == nullptr) {
+      std::cerr << "Cannot map " << path << std::endl;
+      return;
+    }
+
+    WorkloadFileHeader header;
+    std::memcpy(&header, base_, sizeof(header));
+    if (std::memcmp(header.magic, kWorkloadMagic, sizeof(header.magic)) != 0 ||
+        header.version != kWorkloadVersion ||
+        header.header_size + header.data_size > size_) {
+      std::cerr << path << " is not a version " << kWorkloadVersion
+                << " binary workload" << std::endl;
+      end_ = cursor_ = base_;
+      return;
+    }
+    num_ops_ = header.num_ops;
+    cursor_ = base_ + header.header_size;
+    end_ = cursor_ + header.data_size;
+    valid_ = true;
+  }
+
+  ~BinaryWorkloadReader() override {
+    if (base_ != nullptr)
+      munmap(const_cast<char *>(base_), size_);
+  }
+
+  bool Next(WorkloadOp *op) override {
+    if (end_ - cursor_ < (ptrdiff_t)sizeof(WorkloadRecordHeader))
+      return false;
+    WorkloadRecordHeader record;
+    std::memcpy(&record, cursor_, sizeof(record));
+    const char *payload = cursor_ + sizeof(record);
+    cursor_ = payload + record.key_size + record.value_size;
+    if (cursor_ > end_) {
+      std::cerr << "Truncated workload record" << std::endl;
+      valid_ = false;
+      return false;
+    }
+
+    op->op = record.op;
+    op->count_scan = (record.flags & kWorkloadCountScan) != 0;
+    op->key = rocksdb::Slice(payload, record.key_size);
+    if (op->count_scan) {
+      if (record.value_size < sizeof(op->scan_len)) {
+        std::cerr << "Count scan record without a scan length" << std::endl;
+        valid_ = false;
+        cursor_ = end_;
+        return false;
+      }
+      std::memcpy(&op->scan_len, payload + record.key_size,
+                  sizeof(op->scan_len));
+      op->value = rocksdb::Slice();
+    } else {
+      op->value = rocksdb::Slice(payload + record.key_size, record.value_size);
+    }
+    return true;
+  }
+
+  size_t Size() override { return num_ops_; }
+
+private:
+  const char *base_ = nullptr;
+  const char *cursor_ = nullptr;
+  const char *end_ = nullptr;
+  size_t size_ = 0;
+  size_t num_ops_ = 0;
+};
+
+#endif // WORKLOAD_READER_H_
@@ -41,6 +41,7 @@ THRESHOLD_TO_CONVERT_TO_SKIPLIST=$(( PAGE_SIZE * PAGES_PER_FILE / ENTRY_SIZE ))
 REPO_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
 BIN="$REPO_ROOT/bin/working_version"
 TECTONIC_CLI="$REPO_ROOT/bin/tectonic-cli"
+GENSPECS="$REPO_ROOT/scripts/generate_specs.py"
 
 BASE_DIR="$REPO_ROOT/.vstats/${TAG}"
 mkdir -p "$BASE_DIR"
@@ -66,62 +67,23 @@ INSERTS_WARMUP=$(( INSERTS / 10 ))
 INSERTS_MAIN=$(( INSERTS - INSERTS_WARMUP ))
 
 # Sequential: each op type in its own group → tectonic emits them one after another
-python3 - <<EOF
-import json
-spec = {
-  "sections": [{
-    "groups": [
-      {
-        "inserts": {
-          "op_count": $INSERTS,
-          "key": {"uniform": {"len": $KEY_LEN}},
-          "val": {"uniform": {"len": $VAL_LEN}}
-        }
-      },
-      { "empty_point_queries": { "op_count": $EMPTY_PQ, "key": {"uniform": {"len": $KEY_LEN}} } },
-      { "point_queries":       { "op_count": $NONEMPTY_PQ, "selection": {"uniform": {"min": 0, "max": 1}} } },
-      { "range_queries":       { "op_count": $RQ, "selectivity": $SELECTIVITY, "selection": {"uniform": {"min": 0, "max": 1}}, "range_format": "StartEnd" } }
-    ]
-  }]
-}
-with open("$BASE_DIR/workload-sequential.specs.json", "w") as f:
-    json.dump(spec, f, indent=2)
-print("Wrote workload-sequential.specs.json")
-EOF
+python3 "$GENSPECS" -E "$ENTRY_SIZE" -L "$LAMBDA" -Y "$SELECTIVITY" \
+    --phase "I=$INSERTS" \
+    --phase "EQ=$EMPTY_PQ" \
+    --phase "Q=$NONEMPTY_PQ" \
+    --phase "S=$RQ" \
+    -o "$BASE_DIR/workload-sequential.specs.json"
+echo "Wrote workload-sequential.specs.json"
 
 # Mixed: 10% inserts first (warmup so non-empty PQs have keys to hit),
 # then 90% inserts interleaved with all queries in a second group.
 # Groups share the keyset within the section, so PQs/RQs in group 2
 # draw from keys inserted in group 1.
-python3 - <<EOF
-import json
-spec = {
-  "sections": [{
-    "groups": [
-      {
-        "inserts": {
-          "op_count": $INSERTS_WARMUP,
-          "key": {"uniform": {"len": $KEY_LEN}},
-          "val": {"uniform": {"len": $VAL_LEN}}
-        }
-      },
-      {
-        "inserts": {
-          "op_count": $INSERTS_MAIN,
-          "key": {"uniform": {"len": $KEY_LEN}},
-          "val": {"uniform": {"len": $VAL_LEN}}
-        },
-        "empty_point_queries": { "op_count": $EMPTY_PQ, "key": {"uniform": {"len": $KEY_LEN}} },
-        "point_queries":       { "op_count": $NONEMPTY_PQ, "selection": {"uniform": {"min": 0, "max": 1}} },
-        "range_queries":       { "op_count": $RQ, "selectivity": $SELECTIVITY, "selection": {"uniform": {"min": 0, "max": 1}}, "range_format": "StartEnd" }
-      }
-    ]
-  }]
-}
-with open("$BASE_DIR/workload-mixed.specs.json", "w") as f:
-    json.dump(spec, f, indent=2)
-print("Wrote workload-mixed.specs.json")
-EOF
+python3 "$GENSPECS" -E "$ENTRY_SIZE" -L "$LAMBDA" -Y "$SELECTIVITY" \
+    --phase "I=$INSERTS_WARMUP" \
+    --phase "I=$INSERTS_MAIN,EQ=$EMPTY_PQ,Q=$NONEMPTY_PQ,S=$RQ" \
+    -o "$BASE_DIR/workload-mixed.specs.json"
+echo "Wrote workload-mixed.specs.json"
 
 pushd "$BASE_DIR" > /dev/null
 echo "Generating sequential workload..."
@@ -32,6 +32,11 @@ SCALE_ENTRIES=("4x:4:1" ) # "1x:1:1" "2x:2:1" "4x:4:1" "8x:8:1")
 REPO_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
 BIN="$REPO_ROOT/bin/working_version"
 TECTONIC_CLI="$REPO_ROOT/bin/tectonic-cli"
+GENSPECS="$REPO_ROOT/scripts/generate_specs.py"
+GENWORKLOAD="$REPO_ROOT/scripts/generate_workload.py"
+INSPECT="$REPO_ROOT/scripts/inspect_workload.py"
+WORKLOAD_SEED=0
+GEN_JOBS=$(nproc)
 
 BASE_DIR="$REPO_ROOT/.vstats/${TAG}"
 mkdir -p "$BASE_DIR"
@@ -167,60 +172,23 @@ for SCALE_ENTRY in "${SCALE_ENTRIES[@]}"; do
     echo "========================================"
 
     # Generate a scaled workload for this scale factor
-    python3 - <<EOF
-import json, math
-scale = $SCALE_NUM / $SCALE_DEN
-# Base: 80M bulk inserts | 10M inserts + 10K PQs | 10M inserts + 1K RQs
-g1_ins = round(80_000_000 * scale)
-g2_ins = round(10_000_000 * scale)
-g2_pq  = round(10_000     * scale)
-g3_ins = round(10_000_000 * scale)
-g3_rq  = round(1_000      * scale)
-spec = {
-  "sections": [{
-    "groups": [
-      {
-        "inserts": {
-          "op_count": g1_ins,
-          "key": {"uniform": {"len": $KEY_LEN}},
-          "val": {"uniform": {"len": $VAL_LEN}}
-        }
-      },
-      {
-        "inserts": {
-          "op_count": g2_ins,
-          "key": {"uniform": {"len": $KEY_LEN}},
-          "val": {"uniform": {"len": $VAL_LEN}}
-        },
-        "point_queries": {
-          "op_count": g2_pq,
-          "selection": {"uniform": {"min": 0, "max": 1}}
-        }
-      },
-      {
-        "inserts": {
-          "op_count": g3_ins,
-          "key": {"uniform": {"len": $KEY_LEN}},
-          "val": {"uniform": {"len": $VAL_LEN}}
-        },
-        "range_queries": {
-          "op_count": g3_rq,
-          "selection": {"uniform": {"min": 0, "max": 1}},
-          "selectivity": 0.0000001,
-          "range_format": "StartEnd"
-        }
-      }
-    ]
-  }]
-}
-with open("$SDIR/workload.specs.json", "w") as f:
-    json.dump(spec, f, indent=2)
-print(f"  Wrote workload.specs.json  (ins={g1_ins+g2_ins+g3_ins:,}  PQ={g2_pq:,}  RQ={g3_rq:,})")
-EOF
-
-    pushd "$SDIR" > /dev/null
-    "$TECTONIC_CLI" generate -w workload.specs.json
-    popd > /dev/null
+    # Base: 80M bulk inserts | 10M inserts + 10K PQs | 10M inserts + 1K RQs
+    python3 "$GENSPECS" -E "$ENTRY_SIZE" -L "$LAMBDA" -Y 0.0000001 \
+        --scale "$SCALE_NUM/$SCALE_DEN" \
+        --phase "I=80e6" \
+        --phase "I=10e6,Q=10e3" \
+        --phase "I=10e6,S=1e3" \
+        -o "$SDIR/workload.specs.json"
+    echo "  Wrote workload.specs.json"
+
+    # Sharded over GEN_JOBS processes; identical output for any GEN_JOBS
+    python3 "$GENWORKLOAD" -w "$SDIR/workload.specs.json" -o "$SDIR/workload.txt" \
+        --seed "$WORKLOAD_SEED" -j "$GEN_JOBS"
+    # Writes workload.txt.index.json (op counts, op mix, key stats)
+    python3 "$INSPECT" "$SDIR/workload.txt"
+    # pushd "$SDIR" > /dev/null
+    # "$TECTONIC_CLI" generate -w workload.specs.json
+    # popd > /dev/null
 
     run_all_memtables "$SDIR/workload.txt" "$SDIR"
 
@@ -0,0 +1,356 @@
+"""
+Split, concatenate, interleave and mix existing workload files.
+
+    # phases one after another
+    python3 compose_workload.py concat load.txt shift.txt -o workload.txt
+    # round-robin, 1000 ops from each input in turn
+    python3 compose_workload.py interleave inserts.txt queries.txt -g 1000 -o workload.txt
+    # random mix, blocks of 100 ops, inputs picked 9:1 (default: by ops left)
+    python3 compose_workload.py mix inserts.txt queries.txt -g 100 -w 9,1 --seed 3 -o workload.txt
+    # cut a workload at op 1M and 2M, or into 4 equal phases, or per opcode
+    python3 compose_workload.py split workload.txt --at 1e6,2e6 -o phase.txt
+    python3 compose_workload.py split workload.txt --parts 4 -o phase.txt
+    python3 compose_workload.py split workload.txt --by-op -o phase.txt
+
+Inputs are streamed, so memory use does not depend on their size.  As in the
+harness, an input ends at its first empty line.
+
+Every output ``X`` gets a phase-boundary index ``X.phases.json``:
+
+    {"ops": N, "phases": [{"name", "first_op", "ops", "sources": {path: ops}}, ...]}
+
+``concat`` makes each input a phase (inlining the phases of inputs that have
+an index themselves, so composed workloads nest); ``interleave`` and ``mix``
+produce a single phase fed by all inputs.  ``split`` writes ``phase-1.txt``,
+``phase-2.txt``, ... (``phase-I.txt``, ... with ``--by-op``), each with its
+own index.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+from itertools import chain, islice
+
+import numpy as np
+
+PHASES_SUFFIX = ".phases.json"
+INDEX_VERSION = 1
+BUFFER_BYTES = 8 << 20
+# Lines interleaved per batch by ``interleave`` / ``mix``.
+_BATCH_LINES = 1 << 18
+
+
+def numexpr(text):
+    return int(float(text))
+
+
+class Source:
+    """Line reader over one input workload."""
+
+    def __init__(self, path):
+        self.path = path
+        self.f = open(path, "rb", buffering=BUFFER_BYTES)
+        self.done = False
+        self.ops = 0
+
+    def take(self, n):
+        """Up to ``n`` newline-terminated lines; sets ``done`` at the end."""
+        lines = list(islice(self.f, n))
+        if len(lines) < n:
+            self.done = True
+        if b"\n" in lines:
+            lines = lines[:lines.index(b"\n")]
+            self.done = True
+        if lines and not lines[-1].endswith(b"\n"):
+            lines[-1] += b"\n"
+        self.ops += len(lines)
+        if self.done:
+            self.f.close()
+        return lines
+
+    def copy_to(self, out):
+        """Copy everything left to ``out`` (returns the number of lines)."""
+        n = 0
+        while not self.done:
+            lines = self.take(1 << 16)
+            out.writelines(lines)
+            n += len(lines)
+        return n
+
+
+def count_lines(path):
+    """Ops in a workload file (up to its first empty line)."""
+    n = 0
+    tail = b"\n"
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(BUFFER_BYTES)
+            if not block:
+                break
+            joined = tail + block
+            empty = joined.find(b"\n\n")
+            if empty >= 0:
+                return n + joined.count(b"\n", 1, empty + 1)
+            n += block.count(b"\n")
+            tail = block[-1:]
+    return n + (tail != b"\n")
+
+
+# --- phase index ----------------------------------------------------------------
+
+def phases_path(path):
+    return f"{path}{PHASES_SUFFIX}"
+
+
+def read_phases(path):
+    """Phases of ``path`` from its index, or None without one."""
+    try:
+        with open(phases_path(path)) as f:
+            return json.load(f)["phases"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def write_phases(path, phases, **meta):
+    index = {"version": INDEX_VERSION, "ops": sum(p["ops"] for p in phases),
+             **meta, "phases": phases}
+    with open(phases_path(path), "w") as f:
+        json.dump(index, f, indent=1)
+    return index
+
+
+def _phase(name, first_op, ops, sources):
+    return {"name": name, "first_op": first_op, "ops": ops, "sources": sources}
+
+
+def _phase_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+# --- modes ----------------------------------------------------------------------
+
+def concat(inputs, output):
+    phases, first = [], 0
+    with open(output, "wb", buffering=BUFFER_BYTES) as out:
+        for path in inputs:
+            n = Source(path).copy_to(out)
+            nested = read_phases(path)
+            if nested and sum(p["ops"] for p in nested) == n:
+                for p in nested:
+                    phases.append(_phase(p["name"], first + p["first_op"], p["ops"], p["sources"]))
+            else:
+                phases.append(_phase(_phase_name(path), first, n, {path: n}))
+            first += n
+    return write_phases(output, phases, mode="concat")
+
+
+def _emit(sources, picks, granularity, out):
+    """Write one block of ``granularity`` ops per entry of ``picks`` (source
+    indices), in order.  Each source is read once for the whole batch; blocks
+    a drained source cannot fill are cut short or dropped."""
+    n_src = len(sources)
+    want = np.bincount(picks, minlength=n_src) * granularity
+    blocks = [sources[s].take(int(want[s])) if want[s] else [] for s in range(n_src)]
+    sizes = np.array([len(b) for b in blocks], dtype=np.int64)
+    offsets = np.cumsum(sizes) - sizes
+
+    # k-th pick of a source -> its k-th block of lines
+    ordinal = np.empty(len(picks), dtype=np.int64)
+    for s in range(n_src):
+        mask = picks == s
+        ordinal[mask] = np.arange(np.count_nonzero(mask))
+    start = offsets[picks] + ordinal * granularity
+    limit = (offsets + sizes)[picks]
+    if granularity == 1:
+        idx = start[start < limit]
+    else:
+        idx = (start[:, None] + np.arange(granularity)).ravel()
+        idx = idx[idx < np.repeat(limit, granularity)]
+
+    lines = np.empty(int(sizes.sum()), dtype=object)
+    lines[:] = list(chain.from_iterable(blocks))
+    out.writelines(lines[idx].tolist())
+    return sizes
+
+
+def _blocks_per_batch(granularity):
+    return max(1, _BATCH_LINES // granularity)
+
+
+def interleave(inputs, output, granularity):
+    """Round-robin ``granularity`` ops from each input until all are drained."""
+    sources = [Source(p) for p in inputs]
+    rounds = max(1, _blocks_per_batch(granularity) // len(sources))
+    with open(output, "wb", buffering=BUFFER_BYTES) as out:
+        while True:
+            active = [s for s in sources if not s.done]
+            if not active:
+                break
+            picks = np.tile(np.arange(len(active)), rounds)
+            _emit(active, picks, granularity, out)
+    total = sum(s.ops for s in sources)
+    return write_phases(output, [_phase("interleave", 0, total, {s.path: s.ops for s in sources})],
+                        mode="interleave", granularity=granularity)
+
+
+def mix(inputs, output, granularity, weights=None, seed=0):
+    """Blocks of ``granularity`` ops from inputs drawn at random.
+
+    Inputs are drawn in proportion to ``weights``, or to the ops they have
+    left, which spreads every input evenly over the whole output.  Drained
+    inputs drop out; the rest keep their relative weights.
+    """
+    sources = [Source(p) for p in inputs]
+    remaining = None
+    if weights is None:
+        remaining = np.array([count_lines(p) for p in inputs], dtype=np.float64)
+    elif len(weights) != len(inputs):
+        raise ValueError(f"{len(weights)} weights for {len(inputs)} inputs")
+    rng = np.random.default_rng(seed)
+
+    with open(output, "wb", buffering=BUFFER_BYTES) as out:
+        while True:
+            alive = np.array([not s.done for s in sources])
+            w = (np.maximum(remaining, 0) if remaining is not None
+                 else np.asarray(weights, dtype=np.float64)) * alive
+            if w.sum() <= 0:
+                # weights of 0 or stale counts: drain whatever is left in order
+                for s in sources:
+                    s.copy_to(out)
+                break
+            picks = rng.choice(len(sources), size=_blocks_per_batch(granularity), p=w / w.sum())
+            taken = _emit(sources, picks, granularity, out)
+            if remaining is not None:
+                remaining -= taken
+
+    total = sum(s.ops for s in sources)
+    return write_phases(output, [_phase("mix", 0, total, {s.path: s.ops for s in sources})],
+                        mode="mix", granularity=granularity, seed=seed,
+                        weights=list(weights) if weights is not None else "remaining")
+
+
+def _numbered(output, label):
+    root, ext = os.path.splitext(output)
+    return f"{root}-{label}{ext or '.txt'}"
+
+
+def split(path, output, at=None, parts=None, by_op=False):
+    """Cut ``path`` at op indices ``at`` (or into ``parts`` equal phases, or
+    one file per opcode); returns the written paths."""
+    if by_op:
+        return _split_by_op(path, output)
+    if parts:
+        total = count_lines(path)
+        at = [total * i // parts for i in range(1, parts)]
+    bounds = sorted(set(int(a) for a in at or []))
+
+    src = Source(path)
+    written, first = [], 0
+    for i, end in enumerate(bounds + [None]):
+        out_path = _numbered(output, i + 1)
+        with open(out_path, "wb", buffering=BUFFER_BYTES) as out:
+            if end is None:
+                n = src.copy_to(out)
+            else:
+                n = 0
+                while n < end - first and not src.done:
+                    lines = src.take(min(1 << 16, end - first - n))
+                    out.writelines(lines)
+                    n += len(lines)
+        write_phases(out_path, [_phase(f"{_phase_name(path)}[{first}:{first + n}]", 0, n, {path: n})],
+                     mode="split", first_op=first)
+        written.append(out_path)
+        first += n
+    return written
+
+
+def _split_by_op(path, output):
+    outs, counts = {}, {}
+    src = Source(path)
+    try:
+        while not src.done:
+            for line in src.take(1 << 16):
+                op = line.split(b" ", 1)[0].decode()
+                if op not in outs:
+                    outs[op] = open(_numbered(output, op), "wb", buffering=BUFFER_BYTES)
+                    counts[op] = 0
+                outs[op].write(line)
+                counts[op] += 1
+    finally:
+        for f in outs.values():
+            f.close()
+    written = []
+    for op, n in counts.items():
+        out_path = _numbered(output, op)
+        write_phases(out_path, [_phase(op, 0, n, {path: n})], mode="split", op=op)
+        written.append(out_path)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split, concatenate, interleave or mix workloads.")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    p = sub.add_parser("concat", help="inputs one after another, one phase each")
+    p.add_argument("inputs", nargs="+")
+    p.add_argument("-o", "--output", type=str, default="workload.txt")
+
+    p = sub.add_parser("interleave", help="round-robin blocks of the inputs")
+    p.add_argument("inputs", nargs="+")
+    p.add_argument("-g", "--granularity", type=numexpr, default=1,
+                   help="ops taken from an input per turn [def: 1]")
+    p.add_argument("-o", "--output", type=str, default="workload.txt")
+
+    p = sub.add_parser("mix", help="randomly chosen blocks of the inputs")
+    p.add_argument("inputs", nargs="+")
+    p.add_argument("-g", "--granularity", type=numexpr, default=1,
+                   help="ops per block [def: 1]")
+    p.add_argument("-w", "--weights", type=str, default=None,
+                   help="relative weight of each input, e.g. 9,1 [def: ops left]")
+    p.add_argument("--seed", type=int, default=0, help="RNG seed [def: 0]")
+    p.add_argument("-o", "--output", type=str, default="workload.txt")
+
+    p = sub.add_parser("split", help="cut one workload into phases")
+    p.add_argument("input")
+    group = p.add_mutually_exclusive_group(required=True)
+    group.add_argument("--at", type=str, help="op indices to cut at, e.g. 1e6,2e6")
+    group.add_argument("--parts", type=int, help="number of equal phases")
+    group.add_argument("--by-op", action="store_true", help="one output per opcode")
+    p.add_argument("-o", "--output", type=str, default="phase.txt",
+                   help="output name; phase-1.txt, phase-2.txt, ... [def: phase.txt]")
+
+    args = parser.parse_args()
+    paths = [args.input] if args.mode == "split" else args.inputs
+    for path in paths:
+        if not os.path.isfile(path):
+            sys.exit(f"Error: {path} not found")
+    out_dir = os.path.dirname(os.path.abspath(args.output))
+    os.makedirs(out_dir, exist_ok=True)
+
+    if args.mode == "split":
+        at = [numexpr(a) for a in args.at.split(",") if a.strip()] if args.at else None
+        for out_path in split(args.input, args.output, at, args.parts, args.by_op):
+            with open(phases_path(out_path)) as f:
+                print(f"{out_path}: {json.load(f)['ops']:,} ops")
+        return
+
+    # write next to the output and rename, so an input can also be the output
+    tmp = os.path.join(out_dir, f".{os.path.basename(args.output)}.tmp")
+    if args.mode == "concat":
+        index = concat(args.inputs, tmp)
+    elif args.mode == "interleave":
+        index = interleave(args.inputs, tmp, args.granularity)
+    else:
+        weights = [float(w) for w in args.weights.split(",")] if args.weights else None
+        index = mix(args.inputs, tmp, args.granularity, weights, args.seed)
+    os.replace(tmp, args.output)
+    shutil.move(phases_path(tmp), phases_path(args.output))
+    for phase in index["phases"]:
+        print(f"{phase['name']}: ops {phase['first_op']:,}..{phase['first_op'] + phase['ops']:,}")
+    print(f"{args.output}: {index['ops']:,} ops")
+
+
+if __name__ == "__main__":
+    main()
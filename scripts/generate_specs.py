@@ -1,72 +1,205 @@
-import json
+"""
+Build Tectonic workload specs (workload.specs.json).
+
+Single-phase (as before): inserts, then point queries / updates / deletes,
+then range queries, each in its own group:
+
+    python3 generate_specs.py -I 1000000 -Q 10000 -S 1000 -Y 0.1 -E 128 -L 0.0625
+
+Interleaved: a warmup group of inserts, then every op type mixed in one group:
+
+    python3 generate_specs.py -I 1000000 -e 50000 -Q 50000 -S 1000 --layout interleaved
+
+Multi-phase / shifting workloads: one group per ``--phase``.  A phase is a
+comma separated op mix ``OP=count``, optionally prefixed with ``name:`` and
+followed by ``;sel=<dist>`` to override the key selection of that phase:
+
+    python3 generate_specs.py -E 32 -L 0.25 -Y 1e-7 --scale 4 \\
+        --phase "bulk:I=80e6" --phase "I=10e6,Q=1e4" --phase "I=10e6,S=1e3;sel=zipf"
+
+Ops: I inserts, U updates, D point deletes, ED empty point deletes,
+Q point queries (existing keys), EQ empty point queries, S range queries,
+R range deletes, M merges.  Groups share one section, so queries draw from
+keys inserted by earlier phases.
+"""
+
 import argparse
+import json
+from fractions import Fraction
+
+OP_FIELDS = {
+    "I": "inserts",
+    "U": "updates",
+    "D": "point_deletes",
+    "ED": "empty_point_deletes",
+    "Q": "point_queries",
+    "EQ": "empty_point_queries",
+    "S": "range_queries",
+    "R": "range_deletes",
+    "M": "merges",
+}
+
+SELECTIONS = ("uniform", "zipf", "normal", "beta")
+
+
+def numexpr(n, scale=1):
+    return int(round(float(n) * scale))
+
+
+def parse_scale(text):
+    """``"4"``, ``"0.25"`` or ``"1/4"``."""
+    return float(Fraction(text))
+
+
+def selection(args, dist=None):
+    dist = dist or args.selection
+    if dist == "uniform":
+        return {"uniform": {"min": 0, "max": 1}}
+    if dist == "zipf":
+        return {"zipf": {"n": args.zipf_n, "s": args.zipf_s}}
+    if dist == "normal":
+        return {"normal": {"mean": args.normal_mean, "std_dev": args.normal_std}}
+    if dist == "beta":
+        return {"beta": {"alpha": args.beta_alpha, "beta": args.beta_beta}}
+    raise ValueError(f"Unknown selection distribution: {dist}")
+
+
+def op_spec(op, count, args, dist=None):
+    key_size = int(args.entry_size * args.lmbda)
+    val_size = int(args.entry_size * (1 - args.lmbda))
+    key = {"uniform": {"len": key_size}}
+    val = {"uniform": {"len": val_size}}
+
+    spec = {"op_count": count}
+    if op == "I":
+        spec.update(key=key, val=val)
+    elif op in ("U", "M"):
+        spec.update(val=val, selection=selection(args, dist))
+    elif op in ("D", "Q"):
+        spec["selection"] = selection(args, dist)
+    elif op in ("ED", "EQ"):
+        spec["key"] = key
+    elif op == "S":
+        spec.update(selectivity=args.range_selectivity, selection=selection(args, dist),
+                    range_format=args.range_format)
+    elif op == "R":
+        spec.update(selectivity=args.range_delete_selectivity,
+                    selection=selection(args, dist), range_format=args.range_format)
+    return spec
+
+
+def build_group(mix, args, dist=None, name=None):
+    group = {}
+    if name:
+        group["name"] = name
+    for op, n in mix:
+        count = numexpr(n, args.scale)
+        if count > 0:
+            group[OP_FIELDS[op]] = op_spec(op, count, args, dist)
+    return group
+
+
+def parse_phase(text):
+    """``"name:I=1e6,Q=1e4;sel=zipf"`` -> ``(name, [(op, n), ...], dist)``."""
+    body, _, opts = text.partition(";")
+    name, sep, mix_text = body.partition(":")
+    if not sep:
+        name, mix_text = None, body
+
+    mix = []
+    for item in mix_text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        op, _, n = item.partition("=")
+        op = op.strip().upper()
+        if op not in OP_FIELDS:
+            raise ValueError(f"Unknown op {op!r} in phase {text!r} (expected one of {list(OP_FIELDS)})")
+        mix.append((op, float(n)))
+
+    dist = None
+    for opt in opts.split(";"):
+        key, _, value = opt.partition("=")
+        if key.strip() == "sel":
+            dist = value.strip()
+            if dist not in SELECTIONS:
+                raise ValueError(f"Unknown selection {dist!r} in phase {text!r}")
+    return name, mix, dist
+
+
+def single_phase_mix(args):
+    return [
+        ("I", args.inserts),
+        ("U", args.updates),
+        ("D", args.point_deletes),
+        ("ED", args.empty_point_deletes),
+        ("Q", args.point_queries),
+        ("EQ", args.empty_point_queries),
+        ("S", args.range_queries),
+        ("R", args.range_deletes),
+        ("M", args.merges),
+    ]
 
 
 def build_specs(args):
-    def numexpr(n):
-        return float(n)
-
-    key_size = args.entry_size * args.lmbda
-    val_size = args.entry_size * (1 - args.lmbda)
-
-    group1 = {
-        "inserts": {
-            "op_count": numexpr(args.inserts),
-            "key": {"uniform": {"len": key_size}},
-            "val": {"uniform": {"len": val_size}},
-        },
-    }
-    group2 = {
-        "point_queries": {
-            "op_count": numexpr(args.point_queries),
-        },
-        # "updates": {
-        #     "op_count": numexpr(args.updates),
-        #     "val": {"uniform": {"len": val_size}},
-        #     "selection": {"uniform": {"min": 0, "max": 1}},
-        # },
-        # "point_deletes": {
-        #     "op_count": numexpr(args.point_deletes),
-        # },
-        # "range_deletes": {
-        #     "op_count": numexpr(args.range_deletes),
-        #     "selectivity": numexpr(args.range_delete_selectivity),
-        #     "range_format": "StartEnd",
-        # },
-    }
-    group3 = {
-        "range_queries": {
-            "op_count": numexpr(args.range_queries),
-            "selectivity": numexpr(args.range_selectivity),
-            "range_format": "StartEnd",
-        },
-    }
-
-    group1 = {
-        k: v for k, v in group1.items() if v and args.__dict__[k.replace("-", "_")] > 0
-    }
-    group2 = {
-        k: v for k, v in group2.items() if v and args.__dict__[k.replace("-", "_")] > 0
-    }
-    group3 = {
-        k: v for k, v in group3.items() if v and args.__dict__[k.replace("-", "_")] > 0
-    }
-
-    return {"sections": [{"groups": [group1, group2, group3]}]}
+    if args.phase:
+        phases = [parse_phase(p) for p in args.phase]
+        groups = [build_group(mix, args, dist, name) for name, mix, dist in phases]
+    elif args.layout == "interleaved":
+        mix = dict(single_phase_mix(args))
+        warmup = mix["I"] * args.warmup
+        mix["I"] -= warmup
+        groups = [build_group([("I", warmup)], args),
+                  build_group(list(mix.items()), args)]
+    elif args.layout == "sequential":
+        groups = [build_group([(op, n)], args) for op, n in single_phase_mix(args)]
+    else:
+        mix = dict(single_phase_mix(args))
+        groups = [
+            build_group([("I", mix["I"])], args),
+            build_group([(op, mix[op]) for op in ("Q", "EQ", "U", "D", "ED", "R", "M")], args),
+            build_group([("S", mix["S"])], args),
+        ]
+
+    groups = [g for g in groups if any(f in g for f in OP_FIELDS.values())]
+    return {"sections": [{"groups": groups}]}
 
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("-I", "--inserts", type=int, default=0)
-    parser.add_argument("-U", "--updates", type=int, default=0)
-    parser.add_argument("-S", "--range_queries", type=int, default=0)
+    parser.add_argument("-I", "--inserts", type=float, default=0)
+    parser.add_argument("-U", "--updates", type=float, default=0)
+    parser.add_argument("-S", "--range_queries", type=float, default=0)
     parser.add_argument("-Y", "--range_selectivity", type=float, default=0.1)
-    parser.add_argument("-Q", "--point_queries", type=int, default=0)
-    parser.add_argument("-D", "--point_deletes", type=int, default=0)
-    parser.add_argument("-R", "--range_deletes", type=int, default=0)
+    parser.add_argument("-Q", "--point_queries", type=float, default=0)
+    parser.add_argument("-e", "--empty_point_queries", type=float, default=0)
+    parser.add_argument("-D", "--point_deletes", type=float, default=0)
+    parser.add_argument("--empty_point_deletes", type=float, default=0)
+    parser.add_argument("-R", "--range_deletes", type=float, default=0)
     parser.add_argument("-y", "--range_delete_selectivity", type=float, default=0.05)
+    parser.add_argument("-M", "--merges", type=float, default=0)
     parser.add_argument("-E", "--entry_size", type=int, default=8)
     parser.add_argument("-L", "--lmbda", type=float, default=0.5)
+    parser.add_argument("--range_format", choices=("StartEnd", "StartCount"), default="StartEnd")
+
+    parser.add_argument("--layout", choices=("single", "sequential", "interleaved"), default="single",
+                        help="group layout for the -I/-Q/... counts (ignored with --phase)")
+    parser.add_argument("--warmup", type=float, default=0.1,
+                        help="fraction of inserts in the warmup group of --layout interleaved")
+    parser.add_argument("--phase", action="append", default=[],
+                        help='one group per phase, e.g. "I=9e6,Q=5e4,EQ=5e4,S=1e3" (repeatable)')
+    parser.add_argument("--scale", type=parse_scale, default=1.0,
+                        help="multiply every op count, e.g. 4 or 1/4")
+
+    parser.add_argument("--selection", choices=SELECTIONS, default="uniform",
+                        help="key selection for ops on existing keys")
+    parser.add_argument("--zipf_n", type=int, default=1_000_000)
+    parser.add_argument("--zipf_s", type=float, default=0.99)
+    parser.add_argument("--normal_mean", type=float, default=0.5)
+    parser.add_argument("--normal_std", type=float, default=0.15)
+    parser.add_argument("--beta_alpha", type=float, default=2.0)
+    parser.add_argument("--beta_beta", type=float, default=5.0)
+
     parser.add_argument("-o", "--output", type=str, default="workload.specs.json")
     args = parser.parse_args()
 
@@ -77,4 +210,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,511 @@
+"""
+Write workload.txt straight from a Tectonic spec (workload.specs.json),
+without ``bin/tectonic-cli``.
+
+    python3 generate_specs.py -I 1000000 -Q 10000 -S 100 -o workload.specs.json
+    python3 generate_workload.py -w workload.specs.json -o workload.txt --seed 7
+
+Output lines use the format ``run_workload.cc`` replays:
+
+    I <key> <value>     U <key> <value>     M <key> <value>
+    D <key>             P <key>
+    S <start> <end>     SC <start> <count>  R <start> <end>
+
+Ops are generated in batches with NumPy.  Each line type has a fixed width
+per group, so a batch is assembled as one byte buffer by scattering
+fixed-width rows at their offsets and written with a single ``write``.
+
+Semantics follow Tectonic where it matters for the experiments:
+
+- groups of a section share one keyset; ops of a group are randomly
+  interleaved and ops that touch existing keys (updates, deletes, point
+  queries, merges) select among the keys inserted before them according
+  to ``selection`` (uniform, normal, beta or zipf over [0, 1));
+- empty point queries / deletes use fresh random keys;
+- range bounds are picked from the keyset as it stands at the end of the
+  group, ``selectivity`` of it wide (StartEnd) or as a step count
+  (StartCount);
+- deleted keys stay selectable, keys are fixed length per section.
+
+Every batch draws from its own RNG derived from ``(seed, section, group,
+batch)`` and the i-th inserted key of a section is a pure function of
+``(seed, section, i)``, so batches are independent of each other.  That
+makes each batch a shard: with ``-j N`` shards are rendered by N worker
+processes, each writing at the shard's precomputed offset, and the file is
+byte-identical for any N (it depends on the spec, ``--seed`` and
+``--batch`` only).
+
+    python3 generate_workload.py -w workload.specs.json -o workload.txt -j 32
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+BATCH_OPS = 1 << 20
+
+# Random strings use the 64 printable characters 0x30 ('0') .. 0x6F ('o'):
+# masking every byte of a random uint64 to 6 bits and adding 0x30 maps
+# random bits to characters without a lookup.
+_CHAR_MASK = np.uint64(0x3F3F3F3F3F3F3F3F)
+_CHAR_BASE = np.uint64(0x3030303030303030)
+
+# Spec field -> line opcode.  The order fixes the opcode ids used below.
+OPS = {
+    "inserts": "I",
+    "updates": "U",
+    "merges": "M",
+    "point_deletes": "D",
+    "empty_point_deletes": "D",
+    "point_queries": "P",
+    "empty_point_queries": "P",
+    "range_queries": "S",
+    "range_deletes": "R",
+}
+OP_FIELDS = list(OPS)
+_SELECTING = {"updates", "merges", "point_deletes", "point_queries"}
+_EMPTY = {"empty_point_deletes", "empty_point_queries"}
+_RANGES = {"range_queries", "range_deletes"}
+_WITH_VALUE = {"inserts", "updates", "merges"}
+
+# Stream id of the counter-based key generator.
+_KEY_STREAM = 1
+
+
+# --- counter-based random strings ---------------------------------------------
+
+_M1 = np.uint64(0xBF58476D1CE4E5B9)
+_M2 = np.uint64(0x94D049BB133111EB)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _splitmix64(x):
+    with np.errstate(over="ignore"):
+        z = x + _GOLDEN
+        z = (z ^ (z >> np.uint64(30))) * _M1
+        z = (z ^ (z >> np.uint64(27))) * _M2
+    return z ^ (z >> np.uint64(31))
+
+
+def stream_key(seed, *ids):
+    """64-bit key of one string stream, e.g. ``(seed, section, _KEY_STREAM)``."""
+    z = np.uint64(seed & 0xFFFFFFFFFFFFFFFF)
+    for i in ids:
+        z = _splitmix64(z ^ np.uint64(i))
+    return z
+
+
+def random_strings(key, indices, length):
+    """``(len(indices), length)`` uint8 strings; row i depends only on
+    ``(key, indices[i])``."""
+    indices = np.asarray(indices, dtype=np.uint64)
+    if length == 0 or len(indices) == 0:
+        return np.empty((len(indices), length), dtype=np.uint8)
+    words = -(-length // 8)
+    counters = indices[:, None] * np.uint64(words) + np.arange(words, dtype=np.uint64)
+    chars = (_splitmix64(counters ^ key) & _CHAR_MASK) + _CHAR_BASE
+    return chars.view(np.uint8).reshape(len(indices), words * 8)[:, :length]
+
+
+# --- spec parsing -------------------------------------------------------------
+
+def _number(expr, what):
+    if isinstance(expr, (int, float)):
+        return expr
+    raise ValueError(f"{what}: only plain numbers are supported, got {expr!r}")
+
+
+def _string_len(expr, what):
+    if isinstance(expr, (int, float)):
+        return int(expr)
+    if isinstance(expr, dict) and "uniform" in expr and "len" in expr["uniform"]:
+        return int(_number(expr["uniform"]["len"], what))
+    raise ValueError(f"{what}: expected {{'uniform': {{'len': n}}}}, got {expr!r}")
+
+
+class Selection:
+    """Maps ops to positions in [0, 1) of the keys inserted so far."""
+
+    def __init__(self, spec):
+        spec = spec or {"uniform": {"min": 0, "max": 1}}
+        (self.kind, self.params), = spec.items()
+        if self.kind == "zipf":
+            n = int(self.params["n"])
+            weights = 1.0 / np.arange(1, n + 1, dtype=np.float64) ** float(self.params["s"])
+            self._cdf = np.cumsum(weights)
+            self._cdf /= self._cdf[-1]
+        elif self.kind not in ("uniform", "normal", "beta"):
+            raise ValueError(f"Unsupported selection distribution: {self.kind}")
+
+    def sample(self, rng, n):
+        p = self.params
+        if self.kind == "uniform":
+            u = rng.uniform(p.get("min", 0), p.get("max", 1), n)
+        elif self.kind == "normal":
+            u = rng.normal(p["mean"], p["std_dev"], n)
+        elif self.kind == "beta":
+            u = rng.beta(p["alpha"], p["beta"], n)
+        else:
+            rank = np.searchsorted(self._cdf, rng.random(n))
+            u = (rank + rng.random(n)) / len(self._cdf)
+        return np.clip(u, 0.0, np.nextafter(1.0, 0.0))
+
+
+class OpSpec:
+    def __init__(self, field, spec, key_len):
+        self.field = field
+        self.code = OPS[field]
+        self.count = int(_number(spec.get("op_count", 0), f"{field}.op_count"))
+        self.key_len = _string_len(spec["key"], f"{field}.key") if "key" in spec else key_len
+        self.val_len = _string_len(spec["val"], f"{field}.val") if field in _WITH_VALUE else 0
+        self.selection = Selection(spec.get("selection"))
+        self.selectivity = float(spec.get("selectivity", 0))
+        self.range_format = spec.get("range_format", "StartEnd")
+        if self.range_format not in ("StartEnd", "StartCount"):
+            raise ValueError(f"{field}: unknown range_format {self.range_format!r}")
+        if self.range_format == "StartCount" and field != "range_queries":
+            raise ValueError(f"{field}: StartCount is only supported for range_queries")
+
+
+def parse_group(group, key_len):
+    ops = []
+    for field in OP_FIELDS:
+        if field in group:
+            op = OpSpec(field, group[field], key_len)
+            if op.count > 0:
+                ops.append(op)
+    return ops
+
+
+def section_key_len(section):
+    lens = {
+        _string_len(group["inserts"]["key"], "inserts.key")
+        for group in section.get("groups", [])
+        if "inserts" in group and "key" in group["inserts"]
+    }
+    if len(lens) > 1:
+        raise ValueError(f"All inserts of a section must share one key length, got {sorted(lens)}")
+    return lens.pop() if lens else 8
+
+
+# --- plan ---------------------------------------------------------------------
+
+class GroupPlan:
+    """Everything a batch of one group needs, computed once per group."""
+
+    def __init__(self, seed, sec_idx, grp_idx, ops, prior_keys, key_len, batch_ops):
+        self.seed, self.sec_idx, self.grp_idx = seed, sec_idx, grp_idx
+        self.ops = ops
+        self.key_len = key_len
+        self.prior_keys = prior_keys
+        self.total = sum(op.count for op in ops)
+        self.inserts = sum(op.count for op in ops if op.field == "inserts")
+        self.keys_at_end = prior_keys + self.inserts
+
+        # Split the op counts over batches (sequential multivariate
+        # hypergeometric draws) so shuffling inside each batch yields a
+        # uniformly random order of the whole group.
+        rng = np.random.default_rng([seed, sec_idx, grp_idx])
+        remaining = np.array([op.count for op in ops], dtype=np.int64)
+        self.batches = []
+        done = inserts_done = 0
+        while done < self.total:
+            n = min(batch_ops, self.total - done)
+            counts = (remaining.copy() if n == remaining.sum()
+                      else rng.multivariate_hypergeometric(remaining, n))
+            remaining -= counts
+            self.batches.append((done, inserts_done, counts))
+            done += n
+            inserts_done += sum(c for c, op in zip(counts, ops) if op.field == "inserts")
+
+        self.key_stream = stream_key(seed, sec_idx, _KEY_STREAM)
+        self.sorted_keys = None
+
+    def line_width(self, op):
+        """Bytes per line of ``op``; every line of an op has the same width."""
+        if op.field in _RANGES:
+            if op.range_format == "StartCount":
+                return 5 + self.key_len + len(str(self.range_span(op)))
+            return 4 + 2 * self.key_len
+        width = 3 + (op.key_len if op.field in _EMPTY else self.key_len)
+        return width + 1 + op.val_len if op.field in _WITH_VALUE else width
+
+    def batch_bytes(self, batch_idx):
+        counts = self.batches[batch_idx][2]
+        return sum(int(c) * self.line_width(op) for c, op in zip(counts, self.ops))
+
+    def range_span(self, op):
+        return max(1, int(round(op.selectivity * self.keys_at_end)))
+
+    def needs_sorted_keys(self):
+        return any(op.field in _RANGES for op in self.ops)
+
+    def build_sorted_keys(self):
+        keys = random_strings(self.key_stream, np.arange(self.keys_at_end), self.key_len)
+        flat = keys.view(f"S{self.key_len}").ravel()
+        self.sorted_keys = np.sort(flat).view(np.uint8).reshape(-1, self.key_len)
+
+
+def plan_workload(spec, seed, batch_ops=BATCH_OPS):
+    plans = []
+    for sec_idx, section in enumerate(spec.get("sections", [])):
+        key_len = section_key_len(section)
+        prior = 0
+        for grp_idx, group in enumerate(section.get("groups", [])):
+            ops = parse_group(group, key_len)
+            if not ops:
+                continue
+            plan = GroupPlan(seed, sec_idx, grp_idx, ops, prior, key_len, batch_ops)
+            plans.append(plan)
+            prior = plan.keys_at_end
+    return plans
+
+
+# --- batch rendering ----------------------------------------------------------
+
+def _random_chars(rng, n, length):
+    raw = rng.bit_generator.random_raw(-(-n * length // 8))
+    chars = (raw & _CHAR_MASK) + _CHAR_BASE
+    return chars.view(np.uint8)[:n * length].reshape(n, length)
+
+
+def _rows(parts, n, rng):
+    """``(n, width)`` line matrix from constant ``bytes``, ``(n, k)`` arrays
+    and ``int`` widths of random characters drawn from ``rng``."""
+    widths = [len(p) if isinstance(p, bytes) else p if isinstance(p, int) else p.shape[1]
+              for p in parts]
+    width = sum(widths)
+    if any(isinstance(p, int) for p in parts):
+        rows = _random_chars(rng, n, width)
+    else:
+        rows = np.empty((n, width), dtype=np.uint8)
+    col = 0
+    for p, w in zip(parts, widths):
+        if isinstance(p, bytes):
+            rows[:, col:col + w] = np.frombuffer(p, dtype=np.uint8)
+        elif not isinstance(p, int):
+            rows[:, col:col + w] = p
+        col += w
+    return rows
+
+
+def render_batch(plan, batch_idx):
+    """The bytes of batch ``batch_idx`` of ``plan``."""
+    start, inserts_before, counts = plan.batches[batch_idx]
+    rng = np.random.default_rng([plan.seed, plan.sec_idx, plan.grp_idx, batch_idx + 1])
+
+    codes = np.repeat(np.arange(len(plan.ops), dtype=np.int8), counts)
+    if np.count_nonzero(counts) > 1:
+        rng.shuffle(codes)
+    n = len(codes)
+
+    ins_id = next((i for i, op in enumerate(plan.ops) if op.field == "inserts"), -1)
+    is_insert = codes == ins_id
+    inserted_before = np.cumsum(is_insert) - is_insert + inserts_before
+    available = plan.prior_keys + inserted_before
+
+    rows, widths = {}, np.zeros(len(plan.ops), dtype=np.int64)
+    for i, op in enumerate(plan.ops):
+        mask = codes == i
+        m = int(mask.sum())
+        if m == 0:
+            continue
+        code = op.code.encode()
+        value = [b" ", op.val_len] if op.field in _WITH_VALUE else []
+
+        if op.field == "inserts":
+            key = random_strings(plan.key_stream, available[mask], plan.key_len)
+            r = _rows([code + b" ", key, *value, b"\n"], m, rng)
+        elif op.field in _SELECTING:
+            avail = available[mask]
+            idx = (op.selection.sample(rng, m) * avail).astype(np.int64)
+            key = random_strings(plan.key_stream, idx, plan.key_len)
+            missing = avail == 0
+            if missing.any():
+                key[missing] = _random_chars(rng, int(missing.sum()), plan.key_len)
+            r = _rows([code + b" ", key, *value, b"\n"], m, rng)
+        elif op.field in _EMPTY:
+            r = _rows([code + b" ", op.key_len, b"\n"], m, rng)
+        else:
+            r = _render_ranges(plan, op, rng, m)
+        rows[i] = (mask, r)
+        widths[i] = r.shape[1]
+
+    if len(rows) == 1:
+        (_, r), = rows.values()
+        return r.ravel()
+
+    # Lay every line out left-aligned in an (n, widest) matrix, then keep
+    # only the bytes that belong to a line.
+    lengths = widths[codes]
+    full = np.empty((n, int(widths.max())), dtype=np.uint8)
+    for i, (mask, r) in rows.items():
+        full[np.flatnonzero(mask), :r.shape[1]] = r
+    return full[np.arange(full.shape[1]) < lengths[:, None]]
+
+
+def _render_ranges(plan, op, rng, m):
+    n_keys = plan.keys_at_end
+    if n_keys == 0:
+        raise ValueError(f"{op.field} in section {plan.sec_idx} group {plan.grp_idx} "
+                         "but no keys have been inserted")
+    if plan.sorted_keys is None:
+        plan.build_sorted_keys()
+    span = plan.range_span(op)
+    first = (op.selection.sample(rng, m) * max(n_keys - span, 1)).astype(np.int64)
+    start_key = plan.sorted_keys[first]
+    if op.range_format == "StartCount":
+        return _rows([b"SC ", start_key, f" {span}\n".encode()], m, rng)
+    end_key = plan.sorted_keys[np.minimum(first + span, n_keys - 1)]
+    return _rows([op.code.encode() + b" ", start_key, b" ", end_key, b"\n"], m, rng)
+
+
+# --- driver -------------------------------------------------------------------
+
+def shard_layout(plans):
+    """``(plan_idx, batch_idx, offset, n_bytes, n_ops)`` of every shard in
+    output order; line widths are fixed, so offsets are known up front."""
+    shards, offset = [], 0
+    for p, plan in enumerate(plans):
+        for b in range(len(plan.batches)):
+            n_bytes = plan.batch_bytes(b)
+            shards.append((p, b, offset, n_bytes, int(plan.batches[b][2].sum())))
+            offset += n_bytes
+    return shards
+
+
+# Per-worker state of a parallel run, set up by _init_worker.
+_worker = {}
+
+
+def _init_worker(spec, seed, batch_ops, out_path, sorted_paths):
+    plans = plan_workload(spec, seed, batch_ops)
+    for p, path in sorted_paths.items():
+        plans[p].sorted_keys = np.load(path, mmap_mode="r")
+    _worker["plans"] = plans
+    _worker["fd"] = os.open(out_path, os.O_WRONLY)
+
+
+def _render_shard(plan_idx, batch_idx, offset, n_bytes):
+    data = render_batch(_worker["plans"][plan_idx], batch_idx)
+    if data.nbytes != n_bytes:
+        raise RuntimeError(f"shard {plan_idx}/{batch_idx}: rendered {data.nbytes} bytes, "
+                           f"expected {n_bytes}")
+    view = memoryview(data)
+    while view:
+        view = view[os.pwrite(_worker["fd"], view, offset + (n_bytes - len(view))):]
+    return plan_idx, batch_idx
+
+
+class _Progress:
+    def __init__(self, total, enabled):
+        self.total, self.enabled = total, enabled
+        self.done = 0
+        self.t0 = time.time()
+
+    def add(self, n_ops):
+        self.done += n_ops
+        if self.enabled:
+            rate = self.done / max(time.time() - self.t0, 1e-9)
+            print(f"\r  {self.done:,}/{self.total:,} ops  ({rate / 1e6:.1f}M ops/s)",
+                  end="", file=sys.stderr, flush=True)
+
+    def close(self):
+        if self.enabled:
+            print(file=sys.stderr)
+
+
+def _generate_serial(plans, shards, tmp_path, progress):
+    with open(tmp_path, "wb", buffering=0) as f:
+        for p, b, _, _, n_ops in shards:
+            f.write(memoryview(render_batch(plans[p], b)))
+            progress.add(n_ops)
+
+
+def _generate_parallel(spec, seed, batch_ops, plans, shards, tmp_path, jobs, progress):
+    """Render shards in a process pool; each worker ``pwrite``s its shard at
+    the shard's offset, so the result does not depend on scheduling."""
+    with open(tmp_path, "wb") as f:
+        f.truncate(sum(s[3] for s in shards))
+
+    work_dir = tempfile.mkdtemp(prefix=".genwl-", dir=os.path.dirname(os.path.abspath(tmp_path)))
+    try:
+        # Range groups need the sorted keyset; sort it once here and let the
+        # workers map it instead of sorting it in every process.
+        sorted_paths = {}
+        for p, plan in enumerate(plans):
+            if plan.needs_sorted_keys():
+                plan.build_sorted_keys()
+                sorted_paths[p] = os.path.join(work_dir, f"sorted-{p}.npy")
+                np.save(sorted_paths[p], plan.sorted_keys)
+                plan.sorted_keys = None
+
+        n_ops = {(p, b): n for p, b, _, _, n in shards}
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(spec, seed, batch_ops, tmp_path, sorted_paths)) as pool:
+            futures = [pool.submit(_render_shard, p, b, offset, n_bytes)
+                       for p, b, offset, n_bytes, _ in shards]
+            for future in as_completed(futures):
+                progress.add(n_ops[future.result()])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def generate_workload(spec, out_path, seed=0, batch_ops=BATCH_OPS, progress=True, jobs=1):
+    """Write the workload of ``spec`` to ``out_path``; returns the op count.
+
+    The output only depends on ``(spec, seed, batch_ops)``, not on ``jobs``.
+    """
+    plans = plan_workload(spec, seed, batch_ops)
+    shards = shard_layout(plans)
+    total = sum(s[4] for s in shards)
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(shards)))
+    tmp_path = f"{out_path}.tmp"
+    bar = _Progress(total, progress)
+    try:
+        if jobs == 1:
+            _generate_serial(plans, shards, tmp_path, bar)
+        else:
+            _generate_parallel(spec, seed, batch_ops, plans, shards, tmp_path, jobs, bar)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        bar.close()
+    os.replace(tmp_path, out_path)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate workload.txt from a Tectonic spec.")
+    parser.add_argument("-w", "--workload", type=str, default="workload.specs.json",
+                        help="spec file [def: workload.specs.json]")
+    parser.add_argument("-o", "--output", type=str, default="workload.txt",
+                        help="output file [def: workload.txt]")
+    parser.add_argument("--seed", type=int, default=0, help="RNG seed [def: 0]")
+    parser.add_argument("--batch", type=int, default=BATCH_OPS,
+                        help=f"ops per batch [def: {BATCH_OPS}]")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="worker processes; the output does not depend on it [def: cpu count]")
+    parser.add_argument("-q", "--quiet", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.workload) as f:
+        spec = json.load(f)
+    t0 = time.time()
+    total = generate_workload(spec, args.output, args.seed, args.batch, not args.quiet,
+                              args.jobs)
+    if not args.quiet:
+        print(f"Wrote {total:,} ops to {args.output} in {time.time() - t0:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,483 @@
+"""
+Summarise what a workload.txt contains and save it as a sidecar index.
+
+    python3 inspect_workload.py workload.txt
+    python3 inspect_workload.py workload.txt --field counts.I        # for scripts
+    python3 inspect_workload.py workload.txt --expect I=1e6,P=1e4    # exit 1 on mismatch
+
+One streaming pass with bounded memory collects:
+
+- op counts and the op mix per window of ops (windows are merged pairwise
+  when there are more than ``--max-windows``, so long workloads get wider
+  windows instead of more of them);
+- key and value length histograms, scan lengths of ``SC`` ops;
+- distinct keys (all keys and inserted keys) with HyperLogLog, and the
+  duplicate inserts that implies;
+- sortedness of the inserts: fraction of consecutive inserts in ascending
+  key order and the number of ascending runs;
+- the fraction of point queries whose key was inserted earlier, using a
+  Bloom filter over inserted keys (deletes are not taken into account, the
+  expected false positive rate is reported);
+- a reservoir sample of lines.
+
+The result is written to ``<workload>.index.json`` and reused while the
+workload's size and mtime are unchanged; ``plot/workload_index.py`` reads it
+from the notebooks.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+from workload_bin import CHUNK_BYTES, read_chunks, split_lines
+
+INDEX_SUFFIX = ".index.json"
+INDEX_VERSION = 1
+
+# Opcodes of the index; 'Q' lines count as 'P', "SC" lines as 'SC'.
+OPS = ("I", "U", "D", "P", "S", "SC", "R", "M")
+_OP_ID = np.full(256, -1, dtype=np.int8)
+for _i, _op in enumerate(OPS):
+    if len(_op) == 1:
+        _OP_ID[ord(_op)] = _i
+_OP_ID[ord("Q")] = OPS.index("P")
+_SC = OPS.index("SC")
+_I, _P = OPS.index("I"), OPS.index("P")
+
+WINDOW_OPS = 100_000
+MAX_WINDOWS = 1024
+SAMPLE_LINES = 20
+HLL_P = 14
+BLOOM_MB = 128
+BLOOM_K = 7
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_M1 = np.uint64(0xBF58476D1CE4E5B9)
+_M2 = np.uint64(0x94D049BB133111EB)
+
+
+def _mix64(z):
+    with np.errstate(over="ignore"):
+        z = (z ^ (z >> np.uint64(30))) * _M1
+        z = (z ^ (z >> np.uint64(27))) * _M2
+    return z ^ (z >> np.uint64(31))
+
+
+def hash_keys(keys):
+    """64-bit hashes of the rows of a ``(n, length)`` uint8 key matrix."""
+    n, length = keys.shape
+    words = -(-length // 8)
+    padded = np.zeros((n, words * 8), dtype=np.uint8)
+    padded[:, :length] = keys
+    padded = padded.view("<u8")
+    with np.errstate(over="ignore"):
+        h = np.full(n, np.uint64(length) * _GOLDEN, dtype=np.uint64)
+        for w in range(words):
+            h = _mix64((h ^ padded[:, w]) + _GOLDEN)
+    return h
+
+
+class HyperLogLog:
+    def __init__(self, p=HLL_P):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def add(self, hashes):
+        if len(hashes) == 0:
+            return
+        idx = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = (hashes << np.uint64(self.p)) | np.uint64(1 << (self.p - 1))
+        # rank = leading zeros of the remaining bits + 1; shifted so the
+        # float conversion is exact
+        top = np.floor(np.log2((rest >> np.uint64(11)).astype(np.float64))).astype(np.int64)
+        rank = 64 - 11 - top
+        # max rank per register without ufunc.at: mark (register, rank)
+        # pairs, then take the highest marked rank of every register
+        seen = np.zeros((len(self.registers), 64), dtype=bool)
+        seen[idx, rank] = True
+        highest = 63 - np.argmax(seen[:, ::-1], axis=1)
+        highest[~seen.any(axis=1)] = 0
+        np.maximum(self.registers, highest.astype(np.uint8), out=self.registers)
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(2.0 ** -self.registers.astype(np.float64))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class BloomFilter:
+    """Blocked Bloom filter: the ``k`` bits of a key live in one 64-bit
+    word, so every lookup touches a single cache line."""
+
+    def __init__(self, n_bytes, k=BLOOM_K):
+        self.words = np.zeros(max(1, n_bytes // 8), dtype=np.uint64)
+        self.k = k
+        self.n = 0
+
+    def _locate(self, hashes):
+        word = (hashes % np.uint64(len(self.words))).astype(np.int64)
+        h2 = _mix64(hashes)
+        mask = np.zeros(len(hashes), dtype=np.uint64)
+        for i in range(self.k):
+            mask |= np.uint64(1) << ((h2 >> np.uint64(6 * i)) & np.uint64(63))
+        return word, mask
+
+    def add(self, hashes):
+        if len(hashes) == 0:
+            return
+        word, mask = self._locate(hashes)
+        # Fancy |= keeps one write per word; repeat for the keys lost to
+        # words hit twice (few, and fewer every round).
+        while len(word):
+            self.words[word] |= mask
+            lost = (self.words[word] & mask) != mask
+            word, mask = word[lost], mask[lost]
+        self.n += len(hashes)
+
+    def contains(self, hashes):
+        if len(hashes) == 0:
+            return np.zeros(0, dtype=bool)
+        word, mask = self._locate(hashes)
+        return (self.words[word] & mask) == mask
+
+    def false_positive_rate(self):
+        """Standard Bloom estimate; blocking makes the real rate slightly higher."""
+        m = len(self.words) * 64.0
+        return (1 - math.exp(-self.k * self.n / m)) ** self.k
+
+
+class WorkloadInspector:
+    """Accumulates the statistics of a workload chunk by chunk."""
+
+    def __init__(self, window=WINDOW_OPS, max_windows=MAX_WINDOWS,
+                 sample=SAMPLE_LINES, bloom_mb=BLOOM_MB, seed=0):
+        self.window, self.max_windows = window, max_windows
+        self.windows = np.zeros((0, len(OPS)), dtype=np.int64)
+        self.counts = np.zeros(len(OPS), dtype=np.int64)
+        self.key_lengths, self.value_lengths = {}, {}
+        self.scan_lengths = {"min": None, "max": None, "sum": 0}
+        self.all_keys, self.insert_keys = HyperLogLog(), HyperLogLog()
+        self.bloom = BloomFilter(bloom_mb << 20)
+        self.pq_hits = 0
+        self.ascending = 0
+        self.runs = 0
+        self.last_insert = None
+        self.n_ops = 0
+        self.rng = np.random.default_rng(seed)
+        self.sample_size = sample
+        self.sample = []
+
+    # -- per chunk -----------------------------------------------------------
+
+    def add_chunk(self, chunk):
+        lines = split_lines(chunk)
+        n = len(lines)
+        if n == 0:
+            return lines.stop
+        codes = _OP_ID[lines.op].astype(np.int64)
+        codes[lines.count_scan] = _SC
+        if (codes < 0).any():
+            bad = int(np.flatnonzero(codes < 0)[0])
+            raise ValueError(f"Unknown opcode in line {self.n_ops + bad + 1}: "
+                             f"{bytes(lines.buf[lines.starts[bad]:lines.ends[bad]])!r}")
+
+        self.counts += np.bincount(codes, minlength=len(OPS))
+        self._add_windows(codes)
+        _add_hist(self.key_lengths, lines.key_len)
+        has_value = (codes != _SC) & (lines.val_len > 0)
+        _add_hist(self.value_lengths, lines.val_len[has_value])
+
+        # keys left-aligned and zero-padded to the longest key of the chunk
+        keys = np.zeros((n, int(lines.key_len.max())), dtype=np.uint8)
+        hashes = np.empty(n, dtype=np.uint64)
+        for rows, w, a, b in lines.classes():
+            block = lines.matrix(rows, w)
+            rows = slice(None) if rows is None else rows
+            keys[rows, :b - a - 1] = block[:, a + 1:b]
+            hashes[rows] = hash_keys(block[:, a + 1:b])
+            if lines.count_scan[rows].any():
+                self._add_scans(block[:, b + 1:w])
+
+        is_insert = codes == _I
+        self.all_keys.add(hashes)
+        self.insert_keys.add(hashes[is_insert])
+        self._add_point_queries(hashes, codes)
+        self._add_sortedness(keys[is_insert])
+        self._add_sample(lines)
+        self.n_ops += n
+        return lines.stop
+
+    def _add_windows(self, codes):
+        first = self.n_ops // self.window
+        win = (self.n_ops + np.arange(len(codes))) // self.window - first
+        counts = np.bincount(win * len(OPS) + codes, minlength=(int(win[-1]) + 1) * len(OPS))
+        counts = counts.reshape(-1, len(OPS))
+        need = first + len(counts)
+        if len(self.windows) < need:
+            grown = np.zeros((need, len(OPS)), dtype=np.int64)
+            grown[:len(self.windows)] = self.windows
+            self.windows = grown
+        self.windows[first:need] += counts
+        while len(self.windows) > self.max_windows:
+            if len(self.windows) % 2:
+                self.windows = np.vstack([self.windows, np.zeros((1, len(OPS)), np.int64)])
+            self.windows = self.windows.reshape(-1, 2, len(OPS)).sum(axis=1)
+            self.window *= 2
+
+    def _add_scans(self, digits):
+        counts = np.array([int(bytes(row)) for row in digits], dtype=np.int64)
+        s = self.scan_lengths
+        lo, hi = int(counts.min()), int(counts.max())
+        s["min"] = lo if s["min"] is None else min(s["min"], lo)
+        s["max"] = hi if s["max"] is None else max(s["max"], hi)
+        s["sum"] += int(counts.sum())
+
+    def _add_point_queries(self, hashes, codes):
+        is_insert, is_pq = codes == _I, codes == _P
+        pq_pos = np.flatnonzero(is_pq)
+        if len(pq_pos):
+            hit = self.bloom.contains(hashes[pq_pos])
+            # inserts earlier in this chunk are not in the filter yet
+            ins_pos = np.flatnonzero(is_insert)
+            if len(ins_pos):
+                uniq, first = np.unique(hashes[ins_pos], return_index=True)
+                j = np.minimum(np.searchsorted(uniq, hashes[pq_pos]), len(uniq) - 1)
+                hit |= (uniq[j] == hashes[pq_pos]) & (ins_pos[first[j]] < pq_pos)
+            self.pq_hits += int(hit.sum())
+        self.bloom.add(hashes[is_insert])
+
+    def _add_sortedness(self, ins):
+        if len(ins) == 0:
+            return
+        ins = np.ascontiguousarray(ins).view(f"S{ins.shape[1]}").ravel()
+        up = ins[1:] >= ins[:-1]
+        n_up = int(up.sum())
+        if self.last_insert is None:
+            self.runs = 1
+        elif ins[0] >= self.last_insert:
+            n_up += 1
+        else:
+            self.runs += 1
+        self.ascending += n_up
+        self.runs += len(up) - int(up.sum())
+        self.last_insert = bytes(ins[-1])
+
+    def _add_sample(self, lines):
+        """Reservoir sampling (algorithm R) of whole lines."""
+        n = len(lines)
+        idx = self.n_ops + np.arange(n)
+        fill = max(0, min(n, self.sample_size - len(self.sample)))
+        for r in range(fill):
+            self.sample.append(bytes(lines.buf[lines.starts[r]:lines.ends[r]]).decode())
+        rest = np.arange(fill, n)
+        if len(rest) == 0:
+            return
+        accept = self.rng.random(len(rest)) < self.sample_size / (idx[rest] + 1)
+        for r in rest[accept]:
+            slot = int(self.rng.integers(self.sample_size))
+            self.sample[slot] = bytes(lines.buf[lines.starts[r]:lines.ends[r]]).decode()
+
+    # -- result --------------------------------------------------------------
+
+    def result(self):
+        counts = {op: int(c) for op, c in zip(OPS, self.counts)}
+        inserts, pqs = counts["I"], counts["P"]
+        distinct_inserts = min(self.insert_keys.count(), inserts)
+        scans = self.scan_lengths
+        return {
+            "ops": int(self.n_ops),
+            "counts": counts,
+            "key_length": _hist_json(self.key_lengths),
+            "value_length": _hist_json(self.value_lengths),
+            "scan_length": {
+                "min": scans["min"], "max": scans["max"],
+                "mean": scans["sum"] / counts["SC"] if counts["SC"] else None,
+            },
+            "distinct_keys": self.all_keys.count(),
+            "distinct_insert_keys": distinct_inserts,
+            "duplicate_inserts": inserts - distinct_inserts,
+            "insert_sortedness": {
+                "ascending_fraction": self.ascending / (inserts - 1) if inserts > 1 else 1.0,
+                "runs": self.runs,
+            },
+            "point_queries": {
+                "existing": self.pq_hits,
+                "missing": pqs - self.pq_hits,
+                "existing_fraction": self.pq_hits / pqs if pqs else None,
+                "bloom_false_positive_rate": self.bloom.false_positive_rate(),
+            },
+            "windows": {
+                "size": self.window,
+                "ops": list(OPS),
+                "counts": self.windows.tolist(),
+            },
+            "sample": self.sample,
+        }
+
+
+def _add_hist(hist, values):
+    if len(values) == 0:
+        return
+    lengths, counts = np.unique(values, return_counts=True)
+    for length, c in zip(lengths.tolist(), counts.tolist()):
+        hist[length] = hist.get(length, 0) + c
+
+
+def _hist_json(hist):
+    return {str(k): hist[k] for k in sorted(hist)}
+
+
+# --- sidecar index --------------------------------------------------------------
+
+def index_path(workload_path):
+    return f"{workload_path}{INDEX_SUFFIX}"
+
+
+def _source(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def load_index(workload_path):
+    """The sidecar index of ``workload_path`` if it is still fresh, else None."""
+    try:
+        with open(index_path(workload_path)) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get("version") != INDEX_VERSION or index.get("source") != _source(workload_path):
+        return None
+    return index
+
+
+def inspect_workload(workload_path, chunk_bytes=CHUNK_BYTES, progress=True, **kwargs):
+    """Statistics of ``workload_path`` (one pass), without touching the index."""
+    inspector = WorkloadInspector(**kwargs)
+    total = os.path.getsize(workload_path)
+    t0 = time.time()
+    for chunk, bytes_read in read_chunks(workload_path, chunk_bytes):
+        stop = inspector.add_chunk(chunk)
+        if progress:
+            rate = inspector.n_ops / max(time.time() - t0, 1e-9)
+            print(f"\r  {bytes_read / max(total, 1):6.1%}  {inspector.n_ops:,} ops  "
+                  f"({rate / 1e6:.1f}M ops/s)", end="", file=sys.stderr, flush=True)
+        if stop:
+            break
+    if progress:
+        print(file=sys.stderr)
+    return inspector.result()
+
+
+def build_index(workload_path, rebuild=False, progress=True, **kwargs):
+    """The index of ``workload_path``, computed and saved unless a fresh one exists."""
+    if not rebuild:
+        index = load_index(workload_path)
+        if index is not None:
+            return index
+    source = _source(workload_path)
+    index = {"version": INDEX_VERSION, "source": source,
+             **inspect_workload(workload_path, progress=progress, **kwargs)}
+    tmp = f"{index_path(workload_path)}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp, index_path(workload_path))
+    return index
+
+
+# --- CLI ------------------------------------------------------------------------
+
+def get_field(index, dotted):
+    value = index
+    for part in dotted.split("."):
+        value = value[part]
+    return value
+
+
+def parse_expect(text):
+    """``"I=1e6,P=1e4"`` -> ``{"I": 1000000, "P": 10000}``."""
+    expect = {}
+    for item in text.split(","):
+        if item.strip():
+            op, _, n = item.partition("=")
+            op = op.strip().upper()
+            if op not in OPS:
+                raise ValueError(f"Unknown op {op!r} (expected one of {list(OPS)})")
+            expect[op] = int(float(n))
+    return expect
+
+
+def print_summary(path, index):
+    n = index["ops"]
+    print(f"{path}: {n:,} ops")
+    for op, c in index["counts"].items():
+        if c:
+            print(f"  {op:>2}: {c:>14,}  ({c / max(n, 1):6.2%})")
+    print(f"  key length   : {index['key_length']}")
+    print(f"  value length : {index['value_length']}")
+    if index["counts"]["SC"]:
+        print(f"  scan length  : {index['scan_length']}")
+    print(f"  distinct keys: ~{index['distinct_keys']:,}  "
+          f"(inserted ~{index['distinct_insert_keys']:,}, "
+          f"~{index['duplicate_inserts']:,} duplicate inserts)")
+    s = index["insert_sortedness"]
+    print(f"  inserts      : {s['ascending_fraction']:.2%} ascending pairs, {s['runs']:,} runs")
+    pq = index["point_queries"]
+    if pq["existing_fraction"] is not None:
+        print(f"  point queries: {pq['existing_fraction']:.2%} on inserted keys "
+              f"(bloom fpr {pq['bloom_false_positive_rate']:.1e})")
+    w = index["windows"]
+    print(f"  op mix       : {len(w['counts'])} windows of {w['size']:,} ops")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect a workload.txt and save its index.")
+    parser.add_argument("workload", help="workload.txt")
+    parser.add_argument("--rebuild", action="store_true", help="ignore an existing index")
+    parser.add_argument("--window", type=int, default=WINDOW_OPS,
+                        help=f"ops per op-mix window [def: {WINDOW_OPS}]")
+    parser.add_argument("--max-windows", type=int, default=MAX_WINDOWS,
+                        help=f"merge windows past this many [def: {MAX_WINDOWS}]")
+    parser.add_argument("--bloom-mb", type=int, default=BLOOM_MB,
+                        help=f"Bloom filter size for point query hits [def: {BLOOM_MB}]")
+    parser.add_argument("--field", type=str, default=None,
+                        help="print one field of the index, e.g. counts.I, and nothing else")
+    parser.add_argument("--expect", type=str, default=None,
+                        help="exit with status 1 unless the op counts match, e.g. I=1e6,P=1e4")
+    parser.add_argument("--json", action="store_true", help="print the whole index as JSON")
+    parser.add_argument("-q", "--quiet", action="store_true")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.workload):
+        sys.exit(f"Error: {args.workload} not found")
+    quiet = args.quiet or args.field is not None
+    index = build_index(args.workload, rebuild=args.rebuild, progress=not quiet,
+                        window=args.window, max_windows=args.max_windows,
+                        bloom_mb=args.bloom_mb)
+
+    if args.field is not None:
+        print(json.dumps(get_field(index, args.field)))
+    elif args.json:
+        print(json.dumps(index, indent=1))
+    elif not args.quiet:
+        print_summary(args.workload, index)
+
+    if args.expect:
+        wrong = {op: (n, index["counts"][op]) for op, n in parse_expect(args.expect).items()
+                 if index["counts"][op] != n}
+        for op, (want, got) in wrong.items():
+            print(f"{args.workload}: expected {want:,} {op} ops, found {got:,}", file=sys.stderr)
+        if wrong:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,226 @@
+"""
+Sort a workload.txt by key with a chunked external merge sort.
+
+    python sort_workload.py workload.txt -o sorted/workload.txt
+    python sort_workload.py workload.txt --ops I --memory 4096 -j 16
+    python sort_workload.py workload.txt --key-min aaaa --key-max mmmm
+
+The input is split into byte ranges that worker processes sort independently
+into run files; the runs are then k-way merged with ``heapq.merge``.  Memory
+use is bounded by ``--memory`` regardless of the workload size.
+
+Lines are ordered by their key (the second whitespace separated field, as in
+``I <key> <value>``), compared bytewise.  The sort is stable: lines with equal
+keys keep their input order.
+
+With ``--ops`` and/or ``--key-min``/``--key-max`` only the matching lines are
+sorted; they are written back into the slots they occupied, and every other
+line stays exactly where it was.  ``--ops I`` on an interleaved workload
+therefore gives sorted inserts with the original op mix.
+"""
+
+import argparse
+import heapq
 import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+MB = 1024 * 1024
+
+# Python keeps several times the raw line bytes alive while sorting a chunk
+# (bytes objects, list, keys); runs are sized so all workers fit the budget.
+_SORT_OVERHEAD = 6
+# Max runs merged at once; more runs are merged in several passes.
+_MAX_FAN_IN = 256
+
+
+def line_key(line):
+    parts = line.split(None, 2)
+    return parts[1] if len(parts) > 1 else b""
+
+
+class Selector:
+    """Which lines take part in the sort."""
+
+    def __init__(self, ops=None, key_min=None, key_max=None):
+        self.ops = {op.encode() for op in ops} if ops else None
+        self.key_min = key_min.encode() if key_min is not None else None
+        self.key_max = key_max.encode() if key_max is not None else None
+
+    @property
+    def everything(self):
+        return self.ops is None and self.key_min is None and self.key_max is None
+
+    def __call__(self, line):
+        parts = line.split(None, 2)
+        if len(parts) < 2:
+            return False
+        if self.ops is not None and parts[0] not in self.ops:
+            return False
+        key = parts[1]
+        if self.key_min is not None and key < self.key_min:
+            return False
+        if self.key_max is not None and key > self.key_max:
+            return False
+        return True
+
+
+def split_ranges(path, chunk_bytes):
+    """Byte ranges of ``path`` of ~``chunk_bytes`` each, cut at newlines."""
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, "rb") as f:
+        start = 0
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _lines(buf):
+    lines = buf.splitlines(keepends=True)
+    if lines and not lines[-1].endswith(b"\n"):
+        lines[-1] += b"\n"
+    return lines
+
 
-def sort_workload():
-    # 1. Define Paths
-    input_path = '/home/cc/LSMMemoryProfiling/.result/skiplist_compare_feb11_nothrottling-lowpri_true-I100000-U0-Q0-S0-Y0-T5-P131072-B32-E128/workload.txt'
-    
-    # The output directory requested
-    output_dir = '/home/cc/LSMMemoryProfiling/.result/sorted_workload'
-    # The final filename
-    output_path = os.path.join(output_dir, 'workload.txt')
+def sort_run(path, start, end, run_path, selector):
+    """Sort the selected lines of ``path[start:end]`` into ``run_path``."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        lines = _lines(f.read(end - start))
+    if not selector.everything:
+        lines = [line for line in lines if selector(line)]
+    lines.sort(key=line_key)
+    with open(run_path, "wb") as f:
+        f.writelines(lines)
+    return run_path, len(lines)
 
-    print(f"Reading from: {input_path}")
+
+def _sort_run_args(args):
+    return sort_run(*args)
+
+
+def merge_runs(run_paths, out_path, buffer_bytes):
+    files = [open(p, "rb", buffering=buffer_bytes) for p in run_paths]
+    try:
+        with open(out_path, "wb", buffering=buffer_bytes) as out:
+            out.writelines(heapq.merge(*files, key=line_key))
+    finally:
+        for f in files:
+            f.close()
+
+
+def merge_all(run_paths, tmp_dir, memory_bytes):
+    """Merge runs in passes of at most ``_MAX_FAN_IN``; returns the last run."""
+    generation = 0
+    while len(run_paths) > 1:
+        merged = []
+        for i in range(0, len(run_paths), _MAX_FAN_IN):
+            group = run_paths[i:i + _MAX_FAN_IN]
+            if len(group) == 1:
+                merged.append(group[0])
+                continue
+            out = os.path.join(tmp_dir, f"merge-{generation}-{i // _MAX_FAN_IN}.txt")
+            merge_runs(group, out, max(64 * 1024, memory_bytes // (len(group) + 1)))
+            for p in group:
+                os.remove(p)
+            merged.append(out)
+        run_paths = merged
+        generation += 1
+    return run_paths[0]
+
+
+def write_output(input_path, sorted_path, out_path, selector, buffer_bytes):
+    """Copy ``input_path`` to ``out_path``, replacing selected lines in order."""
+    if selector.everything:
+        os.replace(sorted_path, out_path)
+        return
+    with open(input_path, "rb", buffering=buffer_bytes) as src, \
+         open(sorted_path, "rb", buffering=buffer_bytes) as srt, \
+         open(out_path, "wb", buffering=buffer_bytes) as out:
+        for line in src:
+            if not line.endswith(b"\n"):
+                line += b"\n"
+            out.write(srt.readline() if selector(line) else line)
+
+
+def sort_workload(input_path, output_path, memory_mb=1024, jobs=None,
+                  selector=None, tmp_dir=None):
+    selector = selector or Selector()
+    jobs = jobs or os.cpu_count() or 1
+    memory_bytes = memory_mb * MB
+    chunk_bytes = max(MB, memory_bytes // (jobs * _SORT_OVERHEAD))
+
+    out_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(out_dir, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix=".sort-", dir=tmp_dir or out_dir)
 
     try:
-        # 2. Read the file
-        with open(input_path, 'r') as f:
-            lines = f.readlines()
-        
-        print(f"Loaded {len(lines)} rows. Sorting...")
-
-        # 3. Sort the lines
-        # Lambda function splits the line by space and selects index 1 (the Key)
-        # Structure: [0]=Operation, [1]=Key, [2]=Value
-        lines.sort(key=lambda line: line.split()[1])
-
-        # 4. Ensure output directory exists
-        os.makedirs(output_dir, exist_ok=True)
-
-        # 5. Write the sorted file
-        with open(output_path, 'w') as f:
-            f.writelines(lines)
-
-        print(f"Success! Sorted workload saved to: {output_path}")
-        
-        # Optional: Print first 3 lines to verify
-        print("\nFirst 3 sorted lines preview:")
-        for line in lines[:3]:
-            print(line.strip())
-
-    except FileNotFoundError:
-        print(f"Error: The file at {input_path} was not found.")
-    except IndexError:
-        print("Error: A line in the file did not have enough columns to sort by.")
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+        t0 = time.time()
+        ranges = split_ranges(input_path, chunk_bytes)
+        tasks = [
+            (input_path, start, end, os.path.join(work_dir, f"run-{i:06d}.txt"), selector)
+            for i, (start, end) in enumerate(ranges)
+        ]
+        print(f"Sorting {input_path}: {len(tasks)} runs of ~{chunk_bytes // MB} MB on {jobs} workers")
+
+        if jobs == 1 or len(tasks) <= 1:
+            results = [_sort_run_args(t) for t in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+                results = list(pool.map(_sort_run_args, tasks))
+        n_sorted = sum(n for _, n in results)
+        print(f"  runs sorted in {time.time() - t0:.1f}s ({n_sorted} lines)")
+
+        t0 = time.time()
+        if results:
+            merged = merge_all([p for p, _ in results], work_dir, memory_bytes)
+        else:
+            merged = os.path.join(work_dir, "empty.txt")
+            open(merged, "wb").close()
+        tmp_out = os.path.join(work_dir, "output.txt")
+        write_output(input_path, merged, tmp_out, selector,
+                     max(64 * 1024, memory_bytes // 4))
+        os.replace(tmp_out, output_path)
+        print(f"  merged in {time.time() - t0:.1f}s -> {output_path}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="External merge sort of a workload by key.")
+    parser.add_argument("input", help="workload.txt to sort")
+    parser.add_argument("-o", "--output", type=str, default=None,
+                        help="output path [def: <input dir>/workload.sorted.txt]")
+    parser.add_argument("-m", "--memory", type=int, default=1024,
+                        help="memory budget in MB [def: 1024]")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="sort worker processes [def: cpu count]")
+    parser.add_argument("--ops", type=str, default=None,
+                        help="only sort these opcodes, e.g. I or I,U [def: all]")
+    parser.add_argument("--key-min", type=str, default=None,
+                        help="only sort keys >= this (bytewise)")
+    parser.add_argument("--key-max", type=str, default=None,
+                        help="only sort keys <= this (bytewise)")
+    parser.add_argument("--tmp-dir", type=str, default=None,
+                        help="directory for run files [def: next to the output]")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.input):
+        sys.exit(f"Error: {args.input} not found")
+    output = args.output or os.path.join(os.path.dirname(args.input) or ".", "workload.sorted.txt")
+    ops = [op.strip() for op in args.ops.split(",") if op.strip()] if args.ops else None
+
+    sort_workload(args.input, output, memory_mb=args.memory, jobs=args.jobs,
+                  selector=Selector(ops, args.key_min, args.key_max), tmp_dir=args.tmp_dir)
+
 
 if __name__ == "__main__":
-    sort_workload()
\ No newline at end of file
+    main()
@@ -0,0 +1,713 @@
+"""
+Run an experiment sweep described by a sweep file, instead of a copy of one
+of the ``scripts/run`` / ``scripts/buffer`` shell scripts.
+
+    python3 sweep.py sweeps/vary-buffer.json --dry-run    # print the runs
+    python3 sweep.py sweeps/vary-buffer.json              # run them
+    python3 sweep.py sweeps/vary-buffer.json --only 64KB  # a subset
+
+A sweep file is JSON:
+
+    {
+      "tag": "vary-buffersize-overhead-exp",
+      "grid": {
+        "buffer": ["skiplist", "vector-preallocated", "hashlinkedlist"],
+        "buffer_size_kb": [64, 256, 1024],
+        "entry_size": 128,
+        "lambda": 0.0625,
+        "size_ratio": 6,
+        "bucket_count": 100000,
+        "prefix_length": 6,
+        "num_flushes": 10
+      },
+      "workload": {
+        "specs": {"-I": "=buffer_size_kb * 1024 * num_flushes // entry_size"},
+        "generator": "generate_workload",
+        "seed": 0
+      },
+      "flags": {"--lowpri": 0, "--stat": 1, "--progress": 1}
+    }
+
+Every ``grid`` entry is a list of values or a single value; the sweep is the
+cross product.  Besides the parameters below, any name can be used (like
+``num_flushes``) to feed the workload specs and the layout.  Strings starting
+with ``=`` are expressions over the parameters of the run.
+
+    buffer           names of ``BUFFERS``; the run directory name
+    buffer_size_kb   memtable size, gives -P (pages per file)
+    entry_size       -E, and -B (entries per page) with page_size
+    lambda           key size / entry size of the generated workload
+    size_ratio       -T
+    bucket_count     --bucket_count of the hash buffers
+    prefix_length    --prefix_length of the hash buffers
+    page_size        [def: 4096]
+
+``bucket_count`` and ``prefix_length`` only apply to the hash buffers, whose
+run directories are named ``hashskiplist-H<bucket_count>-X<prefix_length>``;
+the other buffers run once per value of the remaining parameters.
+
+Runs are laid out like the shell scripts lay them out, which is what
+``plot/loader.py`` parses: ``.vstats/<tag>/<group>/<buffer dir>`` where the
+group has one level per grid parameter with more than one value, in grid
+order (``64KB``, ``128B``, ``T6``, ``sel-0.1``, ``<name>-<value>``).  An
+explicit ``"layout": "{buffer_size_kb}KB/{buffer_dir}"`` overrides this.
+
+``workload.specs`` holds ``generate_specs.py`` options (-E and -L default to
+the run's entry_size and lambda).  Each distinct workload is generated once
+into ``.vstats/<tag>/.workloads/<hash>/`` with ``generate_workload.py``
+(or ``bin/tectonic-cli`` with ``"generator": "tectonic"``), indexed with
+``inspect_workload.py`` and linked into every run that replays it.
+
+Each run replays the workload (symlinked as ``workload.txt``) with
+``bin/working_version`` in its run directory, writing ``rocksdb_stats.log``
+and ``LOG`` as before, plus ``run.json`` with the parameters, the command
+line and the outcome.
+
+Sweeps are resumable.  A run that completes gets a ``manifest.json`` with
+the hash of its configuration: the build id of the harness binary, its
+command line and the SHA-256 of the workload it replayed.  Runs whose
+manifest matches (and whose outputs are still there) are skipped on the
+next invocation, so rerunning a sweep that died halfway only runs the
+missing cells; ``--force`` reruns everything.
+
+With ``--parallel N`` up to N runs execute at once, each pinned to its own
+``--cpus-per-run`` CPUs and with its own DB directory (``ROCKSDB_DB_PATH``,
+optionally under ``--db-dir`` to spread runs over disks).  Runs are admitted
+against ``--memory-budget``; a run is estimated at ``MEMORY_BASE_MB`` plus
+two memtables of twice the buffer size, or ``"memory_mb"`` of the sweep
+file (an expression like ``"=64 + buffer_size_kb // 256"``).  ``run.json``
+records the slot, the CPUs and the runs that overlapped it, which
+``plot/loader.py`` reports as ``concurrency`` and ``co_scheduled``.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import socket
+import struct
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import namedtuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = os.path.join(REPO_ROOT, "scripts")
+
+RUN_FILE = "run.json"
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+OUTPUT_FILES = ("rocksdb_stats.log", "LOG", "workload.log", "stats.log", "stats.bin",
+                "latency.hist", "scans.csv")
+WORKLOAD_DIR = ".workloads"
+WORKLOAD_FILE = "workload.txt"
+BINARY_WORKLOAD_FILE = "workload.bin"
+INDEX_SUFFIX = ".index.json"
+
+Buffer = namedtuple("Buffer", "factory hashed flags", defaults=(False, ()))
+
+# Run directory name -> memtable factory of bin/working_version.
+BUFFERS = {
+    "skiplist": Buffer(1),
+    "simpleskiplist": Buffer(8),
+    "vector-preallocated": Buffer(2),
+    "unsortedvector-preallocated": Buffer(5),
+    "sortedvector-preallocated": Buffer(6),
+    "vector-dynamic": Buffer(2, flags=(("-A", 0),)),
+    "unsortedvector-dynamic": Buffer(5, flags=(("-A", 0),)),
+    "sortedvector-dynamic": Buffer(6, flags=(("-A", 0),)),
+    "linkedlist": Buffer(7),
+    "hashskiplist": Buffer(3, hashed=True),
+    "hashvector": Buffer(9, hashed=True),
+    "hashlinkedlist": Buffer(4, hashed=True),
+}
+
+DEFAULTS = {
+    "buffer_size_kb": 1024,
+    "entry_size": 128,
+    "lambda": 0.0625,
+    "size_ratio": 6,
+    "bucket_count": 100000,
+    "prefix_length": 6,
+    "page_size": 4096,
+}
+HASH_PARAMS = ("bucket_count", "prefix_length")
+
+DEFAULT_FLAGS = {"--lowpri": 0, "--stat": 1, "--progress": 1}
+
+# Memory a run is admitted with: the active and the immutable memtable
+# (max_write_buffer_number) at up to twice the buffer size each, on top of
+# what RocksDB and the harness need anyway.
+MEMTABLES = 2
+MEMORY_BASE_MB = 256
+
+# Group directory of a grid parameter, see the layout notes above.
+GROUP_DIRS = {
+    "buffer_size_kb": "{}KB",
+    "entry_size": "{}B",
+    "size_ratio": "T{}",
+    "selectivity": "sel-{}",
+}
+
+
+def evaluate(value, params):
+    """``value``, or the result of the expression ``value[1:]`` over
+    ``params`` when it is a string starting with ``=``."""
+    if isinstance(value, list):
+        return [evaluate(v, params) for v in value]
+    if isinstance(value, str) and value.startswith("="):
+        names = {"int": int, "float": float, "min": min, "max": max, "round": round}
+        names.update(params)
+        return eval(value[1:], {"__builtins__": {}}, names)
+    return value
+
+
+def _format_number(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def buffer_dir(params):
+    """Run directory name of the buffer of ``params``."""
+    name = params["buffer"]
+    if BUFFERS[name].hashed:
+        name += f"-H{params['bucket_count']}-X{params['prefix_length']}"
+    return name
+
+
+def memory_estimate_mb(params):
+    return MEMORY_BASE_MB + MEMTABLES * 2 * params["buffer_size_kb"] // 1024
+
+
+def default_layout(grid):
+    """Layout with one group level per varied grid parameter."""
+    levels = []
+    for name, values in grid.items():
+        if name == "buffer" or name in HASH_PARAMS or len(values) < 2:
+            continue
+        levels.append(GROUP_DIRS.get(name, name + "-{}").replace("{}", "{" + name + "}"))
+    return "/".join(levels + ["{buffer_dir}"])
+
+
+class Run:
+    """One invocation of bin/working_version."""
+
+    def __init__(self, params, run_dir, workload, argv, memory_mb):
+        self.params = params
+        self.run_dir = run_dir
+        self.workload = workload
+        self.argv = argv
+        self.memory_mb = memory_mb
+
+    def describe(self):
+        return {"params": self.params, "argv": self.argv, "workload": self.workload.key}
+
+
+class Workload:
+    """A workload generated once and replayed by every run that needs it."""
+
+    def __init__(self, key, specs_argv, generator, seed, directory):
+        self.key = key
+        self.specs_argv = specs_argv
+        self.generator = generator
+        self.seed = seed
+        self.directory = directory
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, WORKLOAD_FILE)
+
+
+def specs_argv(specs):
+    """generate_specs.py options of a resolved ``workload.specs`` dict."""
+    argv = []
+    for option, value in specs.items():
+        for v in value if isinstance(value, list) else [value]:
+            argv += [option, _format_number(v)]
+    return argv
+
+
+def harness_argv(params, flags):
+    """bin/working_version options of a run."""
+    buffer = BUFFERS[params["buffer"]]
+    page_size, entry_size = params["page_size"], params["entry_size"]
+    entries_per_page = page_size // entry_size
+    pages_per_file = params["buffer_size_kb"] * 1024 // page_size
+
+    argv = [f"--memtable_factory={buffer.factory}"]
+    if buffer.hashed:
+        argv += [f"--bucket_count={params['bucket_count']}",
+                 f"--prefix_length={params['prefix_length']}"]
+    for flag, value in buffer.flags:
+        argv += [flag, _format_number(value)]
+    argv += ["-E", str(entry_size), "-B", str(entries_per_page),
+             "-P", str(pages_per_file), "-T", str(params["size_ratio"])]
+    for flag, value in flags.items():
+        argv += [flag, _format_number(evaluate(value, params))]
+    if params["buffer"] == "hashlinkedlist":
+        threshold = page_size * pages_per_file // entry_size
+        argv += ["--threshold_use_skiplist", str(threshold)]
+    return argv
+
+
+def load_sweep(path):
+    with open(path) as f:
+        sweep = json.load(f)
+    for field in ("tag", "grid", "workload"):
+        if field not in sweep:
+            raise ValueError(f"{path}: missing {field!r}")
+    grid = {name: v if isinstance(v, list) else [v] for name, v in sweep["grid"].items()}
+    unknown = [b for b in grid.get("buffer", []) if b not in BUFFERS]
+    if "buffer" not in grid or unknown:
+        raise ValueError(f"{path}: grid.buffer must list buffers of {sorted(BUFFERS)}"
+                         + (f", got {unknown}" if unknown else ""))
+    sweep["grid"] = grid
+    return sweep
+
+
+def expand(sweep, vstats_dir):
+    """Runs of ``sweep`` in grid order."""
+    grid = sweep["grid"]
+    base_dir = os.path.join(vstats_dir, sweep["tag"])
+    layout = sweep.get("layout") or default_layout(grid)
+    flags = dict(DEFAULT_FLAGS, **sweep.get("flags", {}))
+    spec = sweep["workload"]
+    generator = spec.get("generator", "generate_workload")
+    if generator not in ("generate_workload", "tectonic"):
+        raise ValueError(f"Unknown workload generator {generator!r}")
+
+    runs, workloads = {}, {}
+    for values in itertools.product(*grid.values()):
+        params = dict(DEFAULTS, **dict(zip(grid, values)))
+        if not BUFFERS[params["buffer"]].hashed:
+            for name in HASH_PARAMS:
+                params.pop(name)
+
+        specs = {"-E": params["entry_size"], "-L": params["lambda"]}
+        specs.update({opt: evaluate(v, params) for opt, v in spec.get("specs", {}).items()})
+        specs_args = specs_argv(specs)
+        seed = spec.get("seed", 0)
+        key = hashlib.sha1(json.dumps([specs_args, generator, seed]).encode()).hexdigest()[:12]
+        if key not in workloads:
+            workloads[key] = Workload(key, specs_args, generator, seed,
+                                      os.path.join(base_dir, WORKLOAD_DIR, key))
+
+        run_dir = os.path.join(base_dir, layout.format(buffer_dir=buffer_dir(params), **params))
+        memory_mb = evaluate(sweep.get("memory_mb"), params) or memory_estimate_mb(params)
+        run = Run(params, run_dir, workloads[key], harness_argv(params, flags), memory_mb)
+        if run_dir in runs:
+            if runs[run_dir].describe() != run.describe():
+                raise ValueError(f"Runs with different settings share {run_dir}; "
+                                 "add the varied parameter to the layout")
+            continue
+        runs[run_dir] = run
+    return list(runs.values())
+
+
+def build_id(path):
+    """GNU build id of the ELF binary ``path``, or the SHA-256 of the file
+    when it has none."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:6] == b"\x7fELF\x02\x01":  # 64-bit little-endian
+        shoff, = struct.unpack_from("<Q", data, 0x28)
+        shentsize, shnum, shstrndx = struct.unpack_from("<HHH", data, 0x3A)
+        sections = [struct.unpack_from("<IIQQQQ", data, shoff + i * shentsize)
+                    for i in range(shnum)]
+        strtab = sections[shstrndx][4] if shnum else 0
+        for name, sh_type, _, _, offset, size in sections:
+            end = data.index(b"\0", strtab + name)
+            if sh_type == 7 and data[strtab + name:end] == b".note.gnu.build-id":
+                namesz, descsz, _ = struct.unpack_from("<III", data, offset)
+                desc = offset + 12 + (namesz + 3) // 4 * 4
+                return "gnu:" + data[desc:desc + descsz].hex()
+    return "sha256:" + hashlib.sha256(data).hexdigest()
+
+
+def workload_checksum(path):
+    """SHA-256 of the workload at ``path``, cached next to it while its
+    size and mtime are unchanged."""
+    st = os.stat(path)
+    source = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    cache = f"{path}.sha256.json"
+    try:
+        with open(cache) as f:
+            cached = json.load(f)
+        if cached["source"] == source:
+            return cached["sha256"]
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    digest = digest.hexdigest()
+    _write_json(cache, {"source": source, "sha256": digest})
+    return digest
+
+
+def config_hash(build, argv, checksum):
+    """Hash identifying what a run measured."""
+    return hashlib.sha256(json.dumps([build, argv, checksum]).encode()).hexdigest()
+
+
+def _outputs(run_dir):
+    return {name: os.path.getsize(os.path.join(run_dir, name))
+            for name in OUTPUT_FILES if os.path.isfile(os.path.join(run_dir, name))}
+
+
+def is_complete(run, build):
+    """Whether the manifest of ``run`` shows it completed with the same
+    binary, flags and workload.  The workload checksum is only compared
+    while the generated workload still exists; otherwise its spec hash
+    stands in for it."""
+    try:
+        with open(os.path.join(run.run_dir, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return False
+    if manifest.get("version") != MANIFEST_VERSION:
+        return False
+    if (manifest["build_id"], manifest["argv"], manifest["workload"]["key"]) != (
+            build, run.argv, run.workload.key):
+        return False
+    if os.path.isfile(run.workload.path):
+        checksum = workload_checksum(run.workload.path)
+        if manifest["config_hash"] != config_hash(build, run.argv, checksum):
+            return False
+    outputs = _outputs(run.run_dir)
+    return all(outputs.get(name) == size for name, size in manifest["outputs"].items())
+
+
+def _write_json(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _symlink(src, dst):
+    if os.path.lexists(dst):
+        os.remove(dst)
+    os.symlink(os.path.abspath(src), dst)
+
+
+def prepare_workload(workload, binary, jobs):
+    """Generate (and index) ``workload`` unless it already exists."""
+    if os.path.isfile(workload.path) and (not binary or os.path.isfile(
+            os.path.join(workload.directory, BINARY_WORKLOAD_FILE))):
+        return
+    os.makedirs(workload.directory, exist_ok=True)
+    specs = os.path.join(workload.directory, "workload.specs.json")
+    subprocess.run([sys.executable, os.path.join(SCRIPTS, "generate_specs.py"),
+                    *workload.specs_argv, "-o", specs], check=True)
+    if workload.generator == "tectonic":
+        subprocess.run([os.path.join(REPO_ROOT, "bin", "tectonic-cli"), "generate",
+                        "-w", "workload.specs.json"], cwd=workload.directory, check=True)
+    else:
+        subprocess.run([sys.executable, os.path.join(SCRIPTS, "generate_workload.py"),
+                        "-w", specs, "-o", workload.path, "--seed", str(workload.seed),
+                        "-j", str(jobs)], check=True)
+    subprocess.run([sys.executable, os.path.join(SCRIPTS, "inspect_workload.py"),
+                    workload.path, "-q"], check=True)
+    if binary:
+        subprocess.run([sys.executable, os.path.join(SCRIPTS, "workload_bin.py"), workload.path,
+                        "-o", os.path.join(workload.directory, BINARY_WORKLOAD_FILE), "-q"],
+                       check=True)
+
+
+Slot = namedtuple("Slot", "index cpus db_root")
+
+
+def make_slots(parallel, cpus_per_run, db_dirs):
+    """``parallel`` slots with disjoint CPU sets of ``cpus_per_run`` CPUs
+    (fewer slots if the CPUs run out) and DB roots round-robin over
+    ``db_dirs``.  A single slot is not pinned."""
+    cpus = sorted(os.sched_getaffinity(0))
+    n = max(1, min(parallel, len(cpus) // max(cpus_per_run, 1)))
+    if n < parallel:
+        print(f"Only {len(cpus)} CPUs: running {n} runs at a time", file=sys.stderr)
+    slots = []
+    for i in range(n):
+        pinned = cpus[i * cpus_per_run:(i + 1) * cpus_per_run] if n > 1 else None
+        db_root = db_dirs[i % len(db_dirs)] if db_dirs else None
+        slots.append(Slot(i, pinned, db_root))
+    return slots
+
+
+def available_memory_mb():
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1 << 20)
+
+
+class ActiveRun:
+    """A harness process started by ``launch``."""
+
+    def __init__(self, run, slot, proc, record, db_path, workload_link):
+        self.run = run
+        self.slot = slot
+        self.proc = proc
+        self.record = record
+        self.db_path = db_path
+        self.workload_link = workload_link
+        self.t0 = time.time()
+        self.co_scheduled = set()
+        self.max_concurrent = 1
+
+
+def launch(run, slot, binary_path, context):
+    """Start replaying the workload of ``run`` in its run directory, with
+    its own DB directory, pinned to the CPUs of ``slot``."""
+    os.makedirs(run.run_dir, exist_ok=True)
+    workload_name = BINARY_WORKLOAD_FILE if context["binary"] else WORKLOAD_FILE
+    workload_link = os.path.join(run.run_dir, workload_name)
+    _symlink(os.path.join(run.workload.directory, workload_name), workload_link)
+    index = run.workload.path + INDEX_SUFFIX
+    if os.path.isfile(index):
+        shutil.copyfile(index, os.path.join(run.run_dir, WORKLOAD_FILE + INDEX_SUFFIX))
+
+    if slot.db_root:
+        db_path = os.path.join(os.path.abspath(slot.db_root), f"db-{os.getpid()}-{slot.index}")
+    else:
+        db_path = os.path.join(os.path.abspath(run.run_dir), "db")
+    shutil.rmtree(db_path, ignore_errors=True)
+
+    manifest = os.path.join(run.run_dir, MANIFEST_FILE)
+    if os.path.exists(manifest):
+        os.remove(manifest)
+    checksum = workload_checksum(run.workload.path)
+    record = dict(run.describe(), binary=binary_path, status="running",
+                  started=time.strftime("%Y-%m-%dT%H:%M:%S"), **context["meta"])
+    record.update(build_id=context["build_id"], workload_sha256=checksum,
+                  config_hash=config_hash(context["build_id"], run.argv, checksum))
+    record["schedule"] = {"slot": slot.index, "cpus": slot.cpus, "db_path": db_path,
+                          "memory_mb": run.memory_mb}
+    _write_json(os.path.join(run.run_dir, RUN_FILE), record)
+
+    env = dict(os.environ, ROCKSDB_DB_PATH=db_path)
+    pin = (lambda: os.sched_setaffinity(0, slot.cpus)) if slot.cpus else None
+    with open(os.path.join(run.run_dir, "rocksdb_stats.log"), "w") as log:
+        proc = subprocess.Popen([binary_path, *run.argv], cwd=run.run_dir, stdout=log,
+                                env=env, preexec_fn=pin)
+    return ActiveRun(run, slot, proc, record, db_path, workload_link)
+
+
+def finish(active, status=None):
+    """Collect the DB LOG of a finished run, clean up and complete its
+    run.json; returns the exit status of the harness."""
+    run_dir, returncode = active.run.run_dir, active.proc.returncode
+    if os.path.isfile(os.path.join(active.db_path, "LOG")):
+        shutil.move(os.path.join(active.db_path, "LOG"), os.path.join(run_dir, "LOG"))
+    shutil.rmtree(active.db_path, ignore_errors=True)
+    if os.path.lexists(active.workload_link):
+        os.remove(active.workload_link)
+
+    active.record.update(status=status or ("ok" if returncode == 0 else "failed"),
+                         returncode=returncode, seconds=round(time.time() - active.t0, 3))
+    active.record["schedule"].update(co_scheduled=sorted(active.co_scheduled),
+                                     max_concurrent=active.max_concurrent)
+    _write_json(os.path.join(run_dir, RUN_FILE), active.record)
+    if active.record["status"] == "ok":
+        _write_json(os.path.join(run_dir, MANIFEST_FILE), {
+            "version": MANIFEST_VERSION,
+            "config_hash": active.record["config_hash"],
+            "build_id": active.record["build_id"],
+            "argv": active.run.argv,
+            "workload": {"key": active.run.workload.key,
+                         "sha256": active.record["workload_sha256"]},
+            "completed": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "outputs": _outputs(run_dir),
+        })
+    return returncode
+
+
+class Scheduler:
+    """Runs ``runs`` in order on ``slots``.
+
+    A run starts when a slot is free and its ``memory_mb`` fits in what
+    ``memory_budget_mb`` leaves after the runs in flight; a run larger than
+    the whole budget runs alone.  A slot rests ``cooldown`` seconds between
+    runs (the ``sleep 5`` of the shell scripts).  Every run records which
+    runs overlapped it, so co-scheduled runs can be told apart later.
+    """
+
+    POLL_SECONDS = 0.2
+
+    def __init__(self, slots, memory_budget_mb=None, cooldown=5, keep_going=False):
+        self.slots = slots
+        self.memory_budget_mb = memory_budget_mb
+        self.cooldown = cooldown
+        self.keep_going = keep_going
+
+    def _fits(self, run, active):
+        if not active or self.memory_budget_mb is None:
+            return True
+        used = sum(a.run.memory_mb for a in active)
+        return used + run.memory_mb <= self.memory_budget_mb
+
+    def run(self, runs, start, done):
+        """Execute ``runs`` with ``start(run, slot) -> ActiveRun`` and
+        ``done(active, status=None) -> returncode``; returns the runs that
+        failed."""
+        queue = list(runs)
+        ready_at = {slot.index: 0.0 for slot in self.slots}
+        free = list(self.slots)
+        active, failed = [], []
+        n_started = 0
+        try:
+            while queue or active:
+                now = time.time()
+                while queue and not (failed and not self.keep_going):
+                    slot = next((s for s in free if ready_at[s.index] <= now), None)
+                    if slot is None or not self._fits(queue[0], active):
+                        break
+                    run = queue.pop(0)
+                    free.remove(slot)
+                    n_started += 1
+                    print(f"[{n_started}/{len(runs)}] Running {run.run_dir} "
+                          f"(slot {slot.index})...", flush=True)
+                    new = start(run, slot)
+                    for a in active:
+                        a.co_scheduled.add(run.run_dir)
+                        new.co_scheduled.add(a.run.run_dir)
+                    active.append(new)
+                    for a in active:
+                        a.max_concurrent = max(a.max_concurrent, len(active))
+                if failed and not self.keep_going:
+                    queue.clear()
+
+                time.sleep(self.POLL_SECONDS)
+                for a in [a for a in active if a.proc.poll() is not None]:
+                    active.remove(a)
+                    free.append(a.slot)
+                    ready_at[a.slot.index] = time.time() + self.cooldown
+                    if done(a) != 0:
+                        print(f"  failed: see {a.run.run_dir}/rocksdb_stats.log", file=sys.stderr)
+                        failed.append(a.run)
+        except KeyboardInterrupt:
+            for a in active:
+                a.proc.terminate()
+            for a in active:
+                a.proc.wait()
+                done(a, status="interrupted")
+            raise
+        return failed
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def notify(message):
+    """Post ``message`` to SLACK_WEBHOOK_URL (from the environment or .env)."""
+    url = os.environ.get("SLACK_WEBHOOK_URL")
+    env_file = os.path.join(REPO_ROOT, ".env")
+    if not url and os.path.isfile(env_file):
+        with open(env_file) as f:
+            for line in f:
+                name, _, value = line.strip().partition("=")
+                if name.removeprefix("export ").strip() == "SLACK_WEBHOOK_URL":
+                    url = value.strip().strip("\"'")
+    if not url:
+        print("SLACK_WEBHOOK_URL not set; skipping notification", file=sys.stderr)
+        return
+    request = urllib.request.Request(url, data=json.dumps({"text": message}).encode(),
+                                     headers={"Content-type": "application/json"})
+    urllib.request.urlopen(request, timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an experiment sweep file.")
+    parser.add_argument("sweep", help="sweep file (JSON)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="print the runs and their command lines, run nothing")
+    parser.add_argument("--only", action="append", default=[],
+                        help="only runs whose directory contains this string (repeatable)")
+    parser.add_argument("--force", action="store_true",
+                        help="rerun runs that already completed")
+    parser.add_argument("-k", "--keep-going", action="store_true",
+                        help="continue after a failed run")
+    parser.add_argument("--cooldown", type=float, default=5,
+                        help="seconds between runs on the same slot [def: 5]")
+    parser.add_argument("-p", "--parallel", type=int, default=1,
+                        help="runs at a time, each pinned to its own CPUs [def: 1]")
+    parser.add_argument("--cpus-per-run", type=int, default=2,
+                        help="CPUs pinned to each run with --parallel [def: 2]")
+    parser.add_argument("--memory-budget", type=int, default=None,
+                        help="MB the runs in flight may use [def: 80%% of available memory]")
+    parser.add_argument("--db-dir", action="append", default=[],
+                        help="directory for the DBs of the runs instead of the run directory; "
+                             "repeat to spread runs over disks")
+    parser.add_argument("--bin", type=str, default=os.path.join(REPO_ROOT, "bin", "working_version"))
+    parser.add_argument("--vstats", type=str, default=os.path.join(REPO_ROOT, ".vstats"),
+                        help="root of the run directories [def: .vstats]")
+    parser.add_argument("-j", "--gen-jobs", type=int, default=os.cpu_count() or 1,
+                        help="processes for workload generation [def: cpu count]")
+    parser.add_argument("--notify", action="store_true",
+                        help="post to SLACK_WEBHOOK_URL when the sweep is done")
+    args = parser.parse_args()
+    # The harness runs inside its run directory.
+    args.bin, args.vstats = os.path.abspath(args.bin), os.path.abspath(args.vstats)
+
+    try:
+        sweep = load_sweep(args.sweep)
+        runs = expand(sweep, args.vstats)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Error: {e}")
+    if args.only:
+        runs = [r for r in runs if any(s in r.run_dir for s in args.only)]
+    binary = int(sweep.get("flags", {}).get("--binary_workload", 0)) != 0
+
+    build = build_id(args.bin) if os.path.isfile(args.bin) else None
+    pending = runs if args.force else [r for r in runs if not is_complete(r, build)]
+    print(f"{sweep['tag']}: {len(runs)} runs, {len(runs) - len(pending)} already done, "
+          f"{len({r.workload.key for r in pending})} workloads")
+
+    if args.dry_run:
+        for run in pending:
+            print(f"\n{run.run_dir}\n  workload {run.workload.directory}"
+                  f"\n  generate_specs.py {' '.join(run.workload.specs_argv)}"
+                  f"\n  {args.bin} {' '.join(run.argv)}")
+        return
+    if not pending:
+        return
+    if not os.path.isfile(args.bin):
+        sys.exit(f"Error: {args.bin} not found; build it with scripts/rebuild.sh")
+
+    for workload in {r.workload.key: r.workload for r in pending}.values():
+        prepare_workload(workload, binary, args.gen_jobs)
+
+    context = {"binary": binary, "build_id": build, "meta": {"sweep": os.path.abspath(args.sweep),
+                                          "host": socket.gethostname(),
+                                          "git": _git_revision()}}
+    slots = make_slots(args.parallel, args.cpus_per_run, args.db_dir)
+    budget = args.memory_budget or int(available_memory_mb() * 0.8)
+    scheduler = Scheduler(slots, budget if len(slots) > 1 else None,
+                          args.cooldown, args.keep_going)
+    failed = scheduler.run(pending, lambda run, slot: launch(run, slot, args.bin, context),
+                           finish)
+
+    print(f"Done: {len(pending) - len(failed)} ok, {len(failed)} failed")
+    if args.notify:
+        notify(f"{sweep['tag']} experiments completed on {socket.gethostname()}"
+               + (f" ({len(failed)} failed)" if failed else ""))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Convert between workload.txt and the binary workload.bin the harness
+replays with ``--binary_workload 1``.
+
+    python3 workload_bin.py workload.txt -o workload.bin
+    python3 workload_bin.py workload.bin -o workload.txt    # back to text
+
+The direction is picked from the input: files starting with the workload.bin
+magic are decoded to text, anything else is encoded.
+
+workload.bin (see ``include/workload_reader.h``) is a 32-byte header followed
+by one length-prefixed record per op, all little-endian:
+
+    header:  magic "LSMWLOAD", u32 version, u32 header_size, u64 num_ops,
+             u64 data_size
+    record:  char op, u8 flags, u16 key_size, u32 value_size, key, value
+
+The value is the value of I/U/M, the end key of S/R, and the scan length as
+a u64 for ``SC`` lines (op ``S`` with the count-scan flag).  The harness maps
+the file and hands keys and values to RocksDB without copying or parsing.
+
+Text is encoded in chunks with NumPy, so it expects the single-space
+separated lines Tectonic and ``generate_workload.py`` write.  Like the
+harness, conversion stops at the first empty line.
+"""
+
+import argparse
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+MAGIC = b"LSMWLOAD"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQ")
+RECORD = struct.Struct("<cBHI")
+COUNT_SCAN = 0x1
+
+RECORD_DTYPE = np.dtype([("op", "S1"), ("flags", "u1"), ("key_size", "<u2"),
+                         ("value_size", "<u4")])
+assert RECORD_DTYPE.itemsize == RECORD.size
+
+CHUNK_BYTES = 16 << 20
+
+_NL, _SPACE = ord("\n"), ord(" ")
+
+
+def is_binary_workload(path):
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def read_header(f):
+    magic, version, header_size, num_ops, data_size = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{getattr(f, 'name', f)} is not a binary workload")
+    if version != VERSION:
+        raise ValueError(f"Unsupported binary workload version {version}")
+    f.seek(header_size)
+    return num_ops, data_size
+
+
+class Lines:
+    """Line layout of a chunk of workload.txt, as arrays over its lines.
+
+    ``sp1`` / ``sp2`` are the line-relative positions of the separator after
+    the opcode and after the key (the line end when there is no value).
+    """
+
+    def __init__(self, buf, starts, ends, sp1, sp2, stop):
+        self.buf, self.starts, self.ends = buf, starts, ends
+        self.sp1, self.sp2, self.stop = sp1, sp2, stop
+        self.width = ends - starts
+        self.op = buf[starts]
+        self.count_scan = ((sp1 == 2) & (self.op == ord("S"))
+                           & (buf[np.minimum(starts + 1, len(buf) - 1)] == ord("C")))
+        self.key_len = sp2 - sp1 - 1
+        self.val_len = np.maximum(self.width - sp2 - 1, 0)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def classes(self):
+        """``(rows, width, sp1, sp2)`` for every group of lines sharing one
+        layout; ``rows`` is None when a single group covers every line,
+        which is the common case."""
+        if len(self) == 0:
+            return
+        layout = (self.width << 40) | (self.sp1 << 20) | self.sp2
+        if np.all(layout == layout[0]):
+            yield None, int(self.width[0]), int(self.sp1[0]), int(self.sp2[0])
+            return
+        classes, inverse = np.unique(layout, return_inverse=True)
+        for c in range(len(classes)):
+            rows = np.flatnonzero(inverse == c)
+            r0 = rows[0]
+            yield rows, int(self.width[r0]), int(self.sp1[r0]), int(self.sp2[r0])
+
+    def matrix(self, rows, width):
+        """``(len(rows), width)`` bytes of the lines ``rows`` as yielded by
+        ``classes``."""
+        if rows is None:
+            n = len(self)
+            return self.buf[:n * (width + 1)].reshape(n, width + 1)[:, :width]
+        return self.buf[self.starts[rows, None] + np.arange(width)]
+
+
+def split_lines(chunk):
+    """``Lines`` of ``chunk`` (bytes ending with a newline), up to the first
+    empty line (``Lines.stop`` is then set)."""
+    buf = np.frombuffer(chunk, dtype=np.uint8)
+    ends = np.flatnonzero(buf == _NL)
+    starts = np.concatenate(([0], ends[:-1] + 1)) if len(ends) else ends
+
+    stop = False
+    empty = np.flatnonzero(ends == starts)
+    if len(empty):
+        ends, starts, stop = ends[:empty[0]], starts[:empty[0]], True
+    if len(starts) == 0:
+        return Lines(buf, starts, ends, starts, starts, stop)
+
+    spaces = np.flatnonzero(buf[:ends[-1]] == _SPACE)
+    first = np.searchsorted(spaces, starts)
+    n_spaces = np.searchsorted(spaces, ends) - first
+    if not np.all((n_spaces == 1) | (n_spaces == 2)):
+        bad = int(np.flatnonzero((n_spaces != 1) & (n_spaces != 2))[0])
+        raise ValueError(f"Malformed line: {bytes(buf[starts[bad]:ends[bad]])!r}")
+    sp1 = spaces[first] - starts
+    sp2 = np.where(n_spaces == 2, spaces[np.minimum(first + 1, len(spaces) - 1)], ends) - starts
+    return Lines(buf, starts, ends, sp1, sp2, stop)
+
+
+def read_chunks(path, chunk_bytes=CHUNK_BYTES):
+    """Yield ``(chunk, bytes_read)``: whole lines of ``path``, the last one
+    newline-terminated even if the file is not."""
+    with open(path, "rb") as f:
+        carry = b""
+        while True:
+            block = f.read(chunk_bytes)
+            chunk = carry + block
+            if not block:
+                if chunk and not chunk.endswith(b"\n"):
+                    chunk += b"\n"
+                if chunk:
+                    yield chunk, f.tell()
+                return
+            cut = chunk.rfind(b"\n") + 1
+            chunk, carry = chunk[:cut], chunk[cut:]
+            if chunk:
+                yield chunk, f.tell()
+
+
+def encode_chunk(chunk):
+    """Records of the lines in ``chunk`` (bytes ending with a newline).
+    Returns ``(records, n_ops, stop)``; ``stop`` is set when an empty line
+    ended the workload."""
+    lines = split_lines(chunk)
+    n = len(lines)
+    if n == 0:
+        return b"", 0, lines.stop
+    count_scan, key_len = lines.count_scan, lines.key_len
+    val_len = np.where(count_scan, 8, lines.val_len)
+
+    header = np.empty(n, dtype=RECORD_DTYPE)
+    header["op"] = lines.op.view("S1")
+    header["flags"] = np.where(count_scan, COUNT_SCAN, 0)
+    header["key_size"] = key_len
+    header["value_size"] = val_len
+    header = header.view(np.uint8).reshape(n, RECORD.size)
+
+    # Lines with the same layout (width and separator positions) become
+    # records of the same layout; copy each class as a 2-D block.
+    sizes = RECORD.size + key_len + val_len
+    offsets = np.cumsum(sizes) - sizes
+    out = np.empty(int(sizes.sum()), dtype=np.uint8)
+
+    for rows, w, a, b in lines.classes():
+        block = lines.matrix(rows, w)
+        r0 = 0 if rows is None else rows[0]
+        size = int(sizes[r0])
+        rec = np.empty((len(block), size), dtype=np.uint8)
+        rec[:, :RECORD.size] = header if rows is None else header[rows]
+        rec[:, RECORD.size:RECORD.size + b - a - 1] = block[:, a + 1:b]
+        if count_scan[r0]:
+            for i, line in enumerate(block):
+                count = int(bytes(line[b + 1:w]))
+                rec[i, size - 8:] = np.frombuffer(struct.pack("<Q", count), np.uint8)
+        else:
+            rec[:, RECORD.size + b - a - 1:] = block[:, b + 1:w]
+        if rows is None:
+            out = rec.ravel()
+        else:
+            out[offsets[rows, None] + np.arange(size)] = rec
+    return memoryview(out), n, lines.stop
+
+
+def encode(src_path, dst_path, chunk_bytes=CHUNK_BYTES, progress=True):
+    """Write ``src_path`` (text) as a binary workload; returns the op count."""
+    total_bytes = os.path.getsize(src_path)
+    num_ops = data_size = 0
+    tmp_path = f"{dst_path}.tmp"
+    t0 = time.time()
+    with open(tmp_path, "wb") as dst:
+        dst.write(HEADER.pack(MAGIC, VERSION, HEADER.size, 0, 0))
+        for chunk, bytes_read in read_chunks(src_path, chunk_bytes):
+            records, n, stop = encode_chunk(chunk)
+            dst.write(records)
+            num_ops += n
+            data_size += len(records)
+            if progress:
+                rate = num_ops / max(time.time() - t0, 1e-9)
+                print(f"\r  {bytes_read / max(total_bytes, 1):6.1%}  {num_ops:,} ops  "
+                      f"({rate / 1e6:.1f}M ops/s)", end="", file=sys.stderr, flush=True)
+            if stop:
+                break
+        dst.seek(0)
+        dst.write(HEADER.pack(MAGIC, VERSION, HEADER.size, num_ops, data_size))
+    os.replace(tmp_path, dst_path)
+    if progress:
+        print(file=sys.stderr)
+    return num_ops
+
+
+def iter_ops(path):
+    """Yield ``(op, flags, key, value)`` of every record of a binary workload;
+    ``value`` is the scan length for count scans."""
+    with open(path, "rb") as f:
+        num_ops, _ = read_header(f)
+        for _ in range(num_ops):
+            op, flags, key_size, value_size = RECORD.unpack(f.read(RECORD.size))
+            key = f.read(key_size)
+            value = f.read(value_size)
+            if flags & COUNT_SCAN:
+                value = struct.unpack("<Q", value)[0]
+            yield op, flags, key, value
+
+
+def decode(src_path, dst_path):
+    """Write the binary workload ``src_path`` back as text."""
+    num_ops = 0
+    with open(dst_path, "wb", buffering=CHUNK_BYTES) as out:
+        for op, flags, key, value in iter_ops(src_path):
+            if flags & COUNT_SCAN:
+                out.write(b"SC %s %d\n" % (key, value))
+            elif value:
+                out.write(b"%s %s %s\n" % (op, key, value))
+            else:
+                out.write(b"%s %s\n" % (op, key))
+            num_ops += 1
+    return num_ops
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert workload.txt <-> workload.bin.")
+    parser.add_argument("input", help="workload.txt or workload.bin")
+    parser.add_argument("-o", "--output", type=str, default=None,
+                        help="output path [def: workload.bin / workload.txt next to the input]")
+    parser.add_argument("-q", "--quiet", action="store_true")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.input):
+        sys.exit(f"Error: {args.input} not found")
+    to_text = is_binary_workload(args.input)
+    default_name = "workload.txt" if to_text else "workload.bin"
+    output = args.output or os.path.join(os.path.dirname(args.input) or ".", default_name)
+
+    t0 = time.time()
+    if to_text:
+        n = decode(args.input, output)
+    else:
+        n = encode(args.input, output, progress=not args.quiet)
+    if not args.quiet:
+        print(f"Wrote {n:,} ops to {output} in {time.time() - t0:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
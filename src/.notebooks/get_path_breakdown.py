@@ -22,10 +22,14 @@ X_AXIS_END_INDEX = 10001
 # --- Import plotting setup ---
 try:
     from plot import *
+    from plot.downsample import plot_series
 except ImportError:
     # Fallback if plot.py is missing to prevent crash
     print("Warning: 'plot.py' not found. Using default matplotlib styles.")
 
+    def plot_series(ax, x, y, *args, **kwargs):
+        return ax.plot(x, y, *args, **kwargs)
+
 # --- Path Setup ---
 CURR_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = CURR_DIR.parent 
@@ -142,7 +146,7 @@ def plot_component_latency(avg_data, output_filename):
         if len(x_indices) > 0:
             max_x_encountered = max(max_x_encountered, x_indices[-1])
 
-        ax.plot(x_indices, sliced_values, label=key, **style)
+        plot_series(ax, x_indices, sliced_values, label=key, **style)
 
     if USE_LOG_SCALE_Y:
         ax.set_yscale('log')
@@ -11,6 +11,7 @@ from pathlib import Path
 import re
 import sys
 import numpy as np
+from plot.utils import normalize_name
 
 # --- FONT AND STYLE ALIGNMENT (from your __init__.py) ---
 CURR_DIR_FONT = Path("/Users/cba/Desktop/LSM/LSMMemoryProfiling/src/.notebooks/plot") # Adjust to your actual font path
@@ -120,27 +121,6 @@ FILTER_BUFFERS = [
     "hash_linked_list-X6-H100000",
 ]
 
-def normalize_name(name):
-    name = name.lower()
-    if "hash_linked_list" in name or "hashlinkedlist" in name:
-        return "hashlinkedlist"
-    if "hash_skip_list" in name or "hashskiplist" in name:
-        return "hashskiplist"
-    if "hash_vector" in name or "hashvector" in name:
-        return "hashvector"
-    if "simple_skiplist" in name or "simpleskiplist" in name:
-        return "simpleskiplist"
-    if name == "skiplist":
-        return "skiplist"
-    if "linkedlist" in name:
-        return "linkedlist"
-    if "unsortedvector" in name:
-        return "unsortedvector"
-    if "sortedvector" in name or "alwayssortedvector" in name:
-        return "alwayssortedvector"
-    if "vector" in name:
-        return "vector"
-    return None
 
 TIME_RE = re.compile(r"^(Inserts|PointQuery|RangeQuery|PointDelete) Execution Time:\s*(\d+)")
 WORKLOAD_TIME_RE = re.compile(r"^Workload Execution Time:\s*(\d+)")
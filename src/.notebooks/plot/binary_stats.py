@@ -0,0 +1,91 @@
+"""
+Reader for the binary per-op latency file (``stats.bin``) written by
+``working_version --binary_stats 1``.
+
+The layout mirrors ``include/op_stats.h``: an 80-byte packed header describing
+the run followed by packed 17-byte records ``(op, latency_ns, op_index)``.
+Records are memory-mapped straight into a NumPy structured array, so there is
+nothing to parse.
+
+    header, records = read_binary_stats(run_dir / "stats.bin")
+    pq_ns = op_latencies(records, "Q")
+"""
+
+import os
+from typing import Any, Dict, Tuple, Union
+
+import numpy as np
+
+MAGIC = b"LSMOPLAT"
+VERSION = 1
+
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S8"),
+        ("version", "<u4"),
+        ("header_size", "<u4"),
+        ("record_size", "<u4"),
+        ("memtable_factory", "<u2"),
+        ("compaction_style", "<u2"),
+        ("entry_size", "<u4"),
+        ("entries_per_page", "<u4"),
+        ("buffer_size_in_pages", "<u4"),
+        ("buffer_size", "<u8"),
+        ("size_ratio", "<f8"),
+        ("bucket_count", "<u8"),
+        ("prefix_length", "<u4"),
+        ("reserved", "<u4", (2,)),
+        ("start_time_ns", "<u8"),
+    ]
+)
+
+RECORD_DTYPE = np.dtype(
+    [
+        ("op", "S1"),
+        ("latency_ns", "<u8"),
+        ("op_index", "<u8"),
+    ]
+)
+
+PathLike = Union[str, os.PathLike]
+
+
+def read_header(path: PathLike) -> Dict[str, Any]:
+    with open(path, "rb") as fh:
+        raw = fh.read(HEADER_DTYPE.itemsize)
+    if len(raw) < HEADER_DTYPE.itemsize:
+        raise ValueError(f"{path}: truncated header")
+
+    rec = np.frombuffer(raw, dtype=HEADER_DTYPE)[0]
+    if rec["magic"] != MAGIC:
+        raise ValueError(f"{path}: not a binary stats file (magic={rec['magic']!r})")
+    if rec["version"] != VERSION:
+        raise ValueError(f"{path}: unsupported version {rec['version']}")
+    if rec["record_size"] != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path}: unexpected record size {rec['record_size']}")
+
+    header = {name: rec[name].item() for name in HEADER_DTYPE.names if name != "reserved"}
+    header["magic"] = header["magic"].decode()
+    return header
+
+
+def read_binary_stats(path: PathLike) -> Tuple[Dict[str, Any], np.ndarray]:
+    """Return ``(header, records)`` with ``records`` memory-mapped read-only."""
+    header = read_header(path)
+    offset = header["header_size"]
+    # A run killed mid-flush can leave a partial trailing record; ignore it.
+    count = (os.path.getsize(path) - offset) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return header, np.empty(0, dtype=RECORD_DTYPE)
+    records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=offset, shape=(count,))
+    return header, records
+
+
+def op_latencies(records: np.ndarray, op: str) -> np.ndarray:
+    """Latencies (ns) of every ``op`` record, in execution order."""
+    return records["latency_ns"][records["op"] == op.encode()]
+
+
+def op_indices(records: np.ndarray, op: str) -> np.ndarray:
+    """Workload line index of every ``op`` record."""
+    return records["op_index"][records["op"] == op.encode()]
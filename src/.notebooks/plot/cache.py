@@ -0,0 +1,256 @@
+"""
+Content-addressed cache for parsed log artifacts.
+
+Every parsed artifact is stored under a key derived from the source file
+(resolved path, size, mtime) and the parser (name, version, extra arguments).
+A rerun that overwrites a log changes its size/mtime, and bumping a parser's
+version changes its key, so a stale artifact is never served.  Entries live
+in one central directory and are evicted least-recently-used first once the
+cache grows past its disk budget.
+
+    from plot.cache import cached
+
+    @cached("rq_latencies")
+    def read_rq_latencies(stats_file: Path) -> np.ndarray:
+        ...
+
+NumPy arrays (and dicts of arrays) are stored as ``.npy`` and come back
+memory-mapped; anything else is pickled.  Location and budget default to
+``$XDG_CACHE_HOME/lsm-parse`` (``~/.cache/lsm-parse``) and 50 GB and can be
+overridden with ``LSM_PARSE_CACHE_DIR`` / ``LSM_PARSE_CACHE_BUDGET_GB``.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = (Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+                     / "lsm-parse")
+DEFAULT_BUDGET_BYTES = 50 * 1024**3
+
+_COMPLETE = ".complete"
+_LAST_USED = ".last_used"
+_VALUE_NPY = "value.npy"
+_VALUE_PKL = "value.pkl"
+_ARRAYS_DIR = "arrays"
+
+PathLike = Union[str, os.PathLike]
+
+
+def source_signature(source: PathLike) -> dict:
+    """What identifies one version of a source file."""
+    path = Path(source).resolve()
+    st = path.stat()
+    return {"path": str(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except FileNotFoundError:
+                pass
+    return total
+
+
+class ParseCache:
+    def __init__(self, root: Optional[PathLike] = None,
+                 budget_bytes: Optional[int] = None):
+        self.root = Path(root or os.environ.get("LSM_PARSE_CACHE_DIR", DEFAULT_CACHE_DIR))
+        if budget_bytes is None:
+            gb = os.environ.get("LSM_PARSE_CACHE_BUDGET_GB")
+            budget_bytes = int(float(gb) * 1024**3) if gb else DEFAULT_BUDGET_BYTES
+        self.budget_bytes = budget_bytes
+        self._size: Optional[int] = None  # running total, walked once
+
+    # --- keys ------------------------------------------------------------
+
+    def key(self, source: PathLike, parser: str, version: int, *extra) -> str:
+        blob = json.dumps(
+            [source_signature(source), parser, version, [repr(e) for e in extra]],
+            sort_keys=True,
+        )
+        return hashlib.sha256(blob.encode()).hexdigest()
+
+    def entry_path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def has(self, source: PathLike, parser: str, version: int, *extra) -> bool:
+        entry = self.entry_path(self.key(source, parser, version, *extra))
+        return (entry / _COMPLETE).exists()
+
+    # --- entries ---------------------------------------------------------
+
+    def directory(self, source: PathLike, parser: str, version: int,
+                  build: Callable[[Path], None], *extra, rebuild: bool = False) -> Path:
+        """Return the entry directory for ``source``, calling ``build(tmp_dir)``
+        to populate it on a miss."""
+        entry = self.entry_path(self.key(source, parser, version, *extra))
+
+        if rebuild and entry.exists():
+            shutil.rmtree(entry, ignore_errors=True)
+
+        if (entry / _COMPLETE).exists():
+            (entry / _LAST_USED).touch()
+            return entry
+
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=f".{entry.name}.", dir=entry.parent))
+        try:
+            build(tmp)
+            with open(tmp / _COMPLETE, "w") as fh:
+                json.dump({"source": source_signature(source), "parser": parser,
+                           "version": version, "created": time.time()}, fh)
+            (tmp / _LAST_USED).touch()
+            if (entry / _COMPLETE).exists():
+                # a concurrent builder won the race; its entry may be in use
+                (entry / _LAST_USED).touch()
+                return entry
+            if entry.exists():
+                # half-written leftover
+                shutil.rmtree(entry, ignore_errors=True)
+            os.rename(tmp, entry)
+        except OSError:
+            if not (entry / _COMPLETE).exists():
+                raise
+        finally:
+            if tmp.exists():
+                shutil.rmtree(tmp, ignore_errors=True)
+
+        self._added(entry)
+        return entry
+
+    def load_or_parse(self, source: PathLike, parser: str, version: int,
+                      fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Return ``fn(source, *args, **kwargs)``, parsing only on a miss."""
+        extra = list(args) + sorted(kwargs.items())
+        built = []
+
+        def build(tmp: Path):
+            value = fn(source, *args, **kwargs)
+            built.append(value)
+            _dump(value, tmp)
+
+        entry = self.directory(source, parser, version, build, *extra)
+        return built[0] if built else _load(entry)
+
+    # --- maintenance -----------------------------------------------------
+
+    def entries(self):
+        """``(last_used, size, path)`` for every complete entry."""
+        out = []
+        if not self.root.exists():
+            return out
+        for shard in self.root.iterdir():
+            if not shard.is_dir():
+                continue
+            for entry in shard.iterdir():
+                marker = entry / _LAST_USED
+                if entry.name.startswith(".") or not (entry / _COMPLETE).exists():
+                    continue
+                try:
+                    last_used = marker.stat().st_mtime
+                except FileNotFoundError:
+                    last_used = 0.0
+                out.append((last_used, _dir_size(entry), entry))
+        return out
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def _added(self, entry: Path):
+        """Account for a new entry; trim only once it pushes the cache past
+        its budget, so a miss does not walk the whole tree."""
+        if self._size is None:
+            self._size = self.size()
+        else:
+            self._size += _dir_size(entry)
+        if self._size > self.budget_bytes:
+            self.evict(keep=entry)
+
+    def evict(self, keep: Optional[Path] = None):
+        entries = sorted(self.entries(), key=lambda e: e[0])
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.budget_bytes:
+                break
+            if keep is not None and entry == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+        self._size = total
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+        self._size = 0
+
+
+def _dump(value: Any, out_dir: Path):
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        np.save(out_dir / _VALUE_NPY, value)
+    elif (
+        isinstance(value, dict) and value
+        and all(isinstance(k, str) and isinstance(v, np.ndarray) and v.dtype != object
+                for k, v in value.items())
+    ):
+        arrays = out_dir / _ARRAYS_DIR
+        arrays.mkdir()
+        names = list(value)
+        with open(arrays / "keys.json", "w") as fh:
+            json.dump(names, fh)
+        for i, name in enumerate(names):
+            np.save(arrays / f"{i}.npy", value[name])
+    else:
+        with open(out_dir / _VALUE_PKL, "wb") as fh:
+            pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _load(entry: Path) -> Any:
+    if (entry / _VALUE_NPY).exists():
+        return np.load(entry / _VALUE_NPY, mmap_mode="r")
+    arrays = entry / _ARRAYS_DIR
+    if arrays.exists():
+        with open(arrays / "keys.json") as fh:
+            names = json.load(fh)
+        return {name: np.load(arrays / f"{i}.npy", mmap_mode="r")
+                for i, name in enumerate(names)}
+    with open(entry / _VALUE_PKL, "rb") as fh:
+        return pickle.load(fh)
+
+
+_default_cache: Optional[ParseCache] = None
+
+
+def default_cache() -> ParseCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ParseCache()
+    return _default_cache
+
+
+def cached(parser: str, version: int = 1):
+    """Route ``fn(source_path, ...)`` through the default cache.
+
+    ``parser`` must be unique per parsing function; bump ``version`` whenever
+    the function's output changes.  The undecorated function stays reachable
+    as ``fn.uncached``.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(source, *args, **kwargs):
+            return default_cache().load_or_parse(source, parser, version, fn,
+                                                 *args, **kwargs)
+        wrapper.uncached = fn
+        return wrapper
+    return decorator
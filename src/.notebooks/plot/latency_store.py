@@ -0,0 +1,154 @@
+"""
+Columnar latency store for PER_OP_TIMER ``stats.log`` files.
+
+A ``stats.log`` is ingested once into a store directory: one ``.npy`` column
+per opcode holding the latencies in ns, plus a second column with the
+position of every record in the original log.  Columns are opened with
+``mmap_mode="r"`` so notebooks share the page cache instead of rescanning the
+text log for every figure.
+
+    from plot.latency_store import load_latencies
+    pq_ns = load_latencies(run_dir / "stats.log", "Q")
+
+Stores live in the shared parse cache (``plot.cache``) unless an explicit
+``store_dir`` is given.  Either way the store is keyed on / remembers the size
+and mtime of the log it was built from and is rebuilt transparently when the
+log is overwritten by a rerun.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import numpy as np
+
+from .cache import default_cache
+from .stats_parser import OPCODES, parse_stats_log
+
+STORE_VERSION = 1
+_CACHE_PARSER = "latency_store"
+
+_META_FILE = "meta.json"
+
+PathLike = Union[str, os.PathLike]
+
+
+class LatencyStore:
+    """Read-only view over an ingested ``stats.log``."""
+
+    def __init__(self, store_dir: PathLike):
+        self.store_dir = Path(store_dir)
+        with open(self.store_dir / _META_FILE) as fh:
+            self.meta = json.load(fh)
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def _column(self, name: str) -> np.ndarray:
+        if name not in self._columns:
+            self._columns[name] = np.load(self.store_dir / f"{name}.npy", mmap_mode="r")
+        return self._columns[name]
+
+    def latencies(self, op: str) -> np.ndarray:
+        """Latencies (ns, int64) of every ``op`` record, in log order."""
+        _check_op(op)
+        return self._column(f"{op}.lat")
+
+    def indices(self, op: str) -> np.ndarray:
+        """Position (0-based record number in ``stats.log``) of every ``op`` record."""
+        _check_op(op)
+        return self._column(f"{op}.idx")
+
+    def count(self, op: str) -> int:
+        _check_op(op)
+        return self.meta["counts"][op]
+
+    @property
+    def total(self) -> int:
+        return self.meta["records"]
+
+    def __repr__(self):
+        counts = ", ".join(f"{op}={n}" for op, n in self.meta["counts"].items() if n)
+        return f"LatencyStore({self.store_dir}, {counts})"
+
+
+def _check_op(op: str):
+    if op not in OPCODES:
+        raise ValueError(f"Unknown opcode: {op!r} (expected one of {OPCODES})")
+
+
+def _source_signature(stats_file: Path) -> Dict[str, int]:
+    st = stats_file.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def is_fresh(stats_file: PathLike, store_dir: Optional[PathLike] = None) -> bool:
+    """True if the store exists and was built from the current ``stats_file``."""
+    stats_file = Path(stats_file)
+    if store_dir is None:
+        return default_cache().has(stats_file, _CACHE_PARSER, STORE_VERSION)
+    meta_file = Path(store_dir) / _META_FILE
+    if not meta_file.exists():
+        return False
+    with open(meta_file) as fh:
+        meta = json.load(fh)
+    return (
+        meta.get("version") == STORE_VERSION
+        and meta.get("source") == _source_signature(stats_file)
+    )
+
+
+def _write_store(stats_file: Path, store_dir: Path):
+    store_dir.mkdir(parents=True, exist_ok=True)
+
+    # Drop the old meta first so a crash mid-ingest never leaves a store that
+    # looks complete.
+    meta_file = store_dir / _META_FILE
+    if meta_file.exists():
+        meta_file.unlink()
+
+    signature = _source_signature(stats_file)
+    lat, idx, records = parse_stats_log(stats_file)
+
+    for op in OPCODES:
+        for name, arr in ((f"{op}.lat", lat[op]), (f"{op}.idx", idx[op])):
+            tmp = store_dir / f"{name}.tmp.npy"
+            np.save(tmp, arr)
+            os.replace(tmp, store_dir / f"{name}.npy")
+
+    meta = {
+        "version": STORE_VERSION,
+        "source": signature,
+        "records": records,
+        "counts": {op: int(len(lat[op])) for op in OPCODES},
+    }
+    tmp = store_dir / f"{_META_FILE}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(meta, fh, indent=2)
+    os.replace(tmp, meta_file)
+
+
+def ingest_stats_log(
+    stats_file: PathLike, store_dir: Optional[PathLike] = None
+) -> LatencyStore:
+    """Parse ``stats_file`` and (re)write its columnar store."""
+    return open_store(stats_file, store_dir, rebuild=True)
+
+
+def open_store(
+    stats_file: PathLike, store_dir: Optional[PathLike] = None, rebuild: bool = False
+) -> LatencyStore:
+    """Open the store for ``stats_file``, ingesting it first if missing or stale."""
+    stats_file = Path(stats_file)
+    if store_dir is None:
+        store_dir = default_cache().directory(
+            stats_file, _CACHE_PARSER, STORE_VERSION,
+            lambda tmp: _write_store(stats_file, tmp), rebuild=rebuild,
+        )
+    elif rebuild or not is_fresh(stats_file, store_dir):
+        _write_store(stats_file, Path(store_dir))
+    return LatencyStore(store_dir)
+
+
+def load_latencies(stats_file: PathLike, op: str) -> np.ndarray:
+    """Shorthand for ``open_store(stats_file).latencies(op)``."""
+    return open_store(stats_file).latencies(op)
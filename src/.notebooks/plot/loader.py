@@ -0,0 +1,249 @@
+"""
+Load a whole experiment tree into one DataFrame.
+
+    from plot.loader import load_experiments
+    df = load_experiments(PROJECT_ROOT / ".vstats" / "vary-buffersize-overhead-exp")
+
+Every directory below ``root`` that holds a ``workload.log``,
+``workload_run.log`` or ``stats.log`` is a run.  Runs are parsed in a process
+pool sized to the machine and summarised into one row each: buffer and
+parameters decoded from the directory names, per-op execution times summed
+over all phases, the usual RocksDB counters and, when ``stats.log`` exists,
+per-op latency summaries from the latency store (or from ``latency.hist``
+for runs that only recorded histograms).  Runs started by
+``scripts/sweep.py`` also report from their ``run.json`` how many runs
+shared the host with them (``concurrency``, ``co_scheduled``), so runs that
+were co-scheduled can be flagged or filtered out.
+"""
+
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from .latency_hist import merge, read_latency_hist
+from .latency_store import open_store
+from .rocksdb_stats import parse_rocksdb_log
+from .stats_parser import OPCODES
+from .style import line_styles
+from .utils import parse_run_name, process_LOG_file
+
+# Checked in order; the first one present is the run's RocksDB log.
+WORKLOAD_LOGS = ("workload_run.log", "workload.log")
+STATS_LOG = "stats.log"
+LATENCY_HIST = "latency.hist"
+RUN_FILE = "run.json"
+
+_SKIP_DIRS = {"db", "stats.store"}
+
+_META_FIELDS = (
+    "workload_time",
+    "insert_time",
+    "update_time",
+    "point_query_time",
+    "point_delete_time",
+    "range_query_time",
+    "scan_keys",
+    "scan_bytes",
+)
+
+_TICKERS = {
+    "bytes_written": "rocksdb.bytes.written",
+    "bytes_read": "rocksdb.bytes.read",
+    "compact_read_bytes": "rocksdb.compact.read.bytes",
+    "compact_write_bytes": "rocksdb.compact.write.bytes",
+    "flush_write_bytes": "rocksdb.flush.write.bytes",
+    "stall_micros": "rocksdb.stall.micros",
+    "memtable_hit": "rocksdb.memtable.hit",
+    "memtable_miss": "rocksdb.memtable.miss",
+    # --multiget runs
+    "multiget_calls": "rocksdb.number.multiget.get",
+    "multiget_keys_read": "rocksdb.number.multiget.keys.read",
+    "multiget_keys_found": "rocksdb.number.multiget.keys.found",
+    "multiget_bytes_read": "rocksdb.number.multiget.bytes.read",
+}
+
+_HISTOGRAM_COUNTS = {
+    "flush_count": "rocksdb.db.flush.micros",
+    "compaction_count": "rocksdb.compaction.times.micros",
+}
+
+_HISTOGRAM_SUMS = {
+    "multiget_micros": "rocksdb.db.multiget.micros",
+}
+
+_SIZE_DIR_RE = re.compile(r"^(\d+)(KB|MB|GB)$", re.IGNORECASE)
+_SEL_DIR_RE = re.compile(r"^sel-([\d.]+)$")
+_SIZE_UNITS_KB = {"KB": 1, "MB": 1024, "GB": 1024 * 1024}
+
+PathLike = Union[str, os.PathLike]
+
+
+def discover_runs(root: PathLike) -> List[Path]:
+    """All run directories below ``root`` (including ``root`` itself)."""
+    runs = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in _SKIP_DIRS)
+        if any(name in filenames for name in WORKLOAD_LOGS + (STATS_LOG,)):
+            runs.append(Path(dirpath))
+    return runs
+
+
+def _group_params(group: Path) -> Dict[str, Any]:
+    params = {}
+    for part in group.parts:
+        m = _SIZE_DIR_RE.match(part)
+        if m:
+            params["buffer_kb"] = int(m.group(1)) * _SIZE_UNITS_KB[m.group(2).upper()]
+            continue
+        m = _SEL_DIR_RE.match(part)
+        if m:
+            params["selectivity"] = float(m.group(1))
+    return params
+
+
+def _summarise_workload_log(log_file: Path) -> Dict[str, Any]:
+    row = {field: 0 for field in _META_FIELDS}
+    row.update({col: 0 for col in _TICKERS})
+    row.update({col: 0 for col in _HISTOGRAM_COUNTS})
+    row.update({col: 0 for col in _HISTOGRAM_SUMS})
+
+    n_phases = 0
+    for phase in parse_rocksdb_log(str(log_file)):
+        n_phases += 1
+        for field in _META_FIELDS:
+            row[field] += phase["meta"].get(field, 0)
+        for col, metric in _TICKERS.items():
+            row[col] += phase["tickers"].get(metric, 0)
+        for col, metric in _HISTOGRAM_COUNTS.items():
+            row[col] += phase["histograms"][metric]["COUNT"]
+        for col, metric in _HISTOGRAM_SUMS.items():
+            row[col] += phase["histograms"][metric]["SUM"]
+        row["cf_size_bytes"] = phase["meta"].get("cf_size_bytes")
+        row["cf_file_count"] = phase["meta"].get("cf_file_count")
+
+    row["phases"] = n_phases
+    return row
+
+
+def _summarise_run_file(run_file: Path) -> Dict[str, Any]:
+    with open(run_file) as f:
+        record = json.load(f)
+    schedule = record.get("schedule", {})
+    cpus = schedule.get("cpus")
+    return {
+        "status": record.get("status"),
+        "run_seconds": record.get("seconds"),
+        "concurrency": schedule.get("max_concurrent", 1),
+        "co_scheduled": len(schedule.get("co_scheduled", [])),
+        "cpus": ",".join(map(str, cpus)) if cpus else None,
+    }
+
+
+def _summarise_latencies(stats_file: Path) -> Dict[str, Any]:
+    store = open_store(stats_file)
+    row = {}
+    for op in OPCODES:
+        n = store.count(op)
+        if n == 0:
+            continue
+        lat = store.latencies(op)
+        p50, p99, p999 = np.percentile(lat, [50, 99, 99.9])
+        row[f"{op}_count"] = n
+        row[f"{op}_mean_ns"] = float(lat.mean())
+        row[f"{op}_p50_ns"] = float(p50)
+        row[f"{op}_p99_ns"] = float(p99)
+        row[f"{op}_p999_ns"] = float(p999)
+        row[f"{op}_max_ns"] = int(lat.max())
+    return row
+
+
+def _summarise_histograms(hist_file: Path) -> Dict[str, Any]:
+    row = {}
+    for op, h in merge(read_latency_hist(hist_file)).items():
+        if h.count == 0:
+            continue
+        p50, p99, p999 = h.percentiles([50, 99, 99.9])
+        row[f"{op}_count"] = h.count
+        row[f"{op}_mean_ns"] = h.mean
+        row[f"{op}_p50_ns"] = float(p50)
+        row[f"{op}_p99_ns"] = float(p99)
+        row[f"{op}_p999_ns"] = float(p999)
+        row[f"{op}_max_ns"] = h.max_ns
+    return row
+
+
+def load_run(run_dir: PathLike, root: Optional[PathLike] = None,
+             latencies: bool = True) -> Dict[str, Any]:
+    """Summarise a single run directory into a flat dict."""
+    run_dir = Path(run_dir)
+    group = run_dir.parent.relative_to(root) if root else Path(run_dir.parent.name)
+
+    row = {"run": run_dir.name, "group": str(group), "path": str(run_dir)}
+    row.update(parse_run_name(run_dir.name))
+    for key, value in _group_params(group).items():
+        if row.get(key) is None:
+            row[key] = value
+
+    for name in WORKLOAD_LOGS:
+        if (run_dir / name).is_file():
+            row["workload_log"] = name
+            row.update(_summarise_workload_log(run_dir / name))
+            break
+
+    if (run_dir / RUN_FILE).is_file():
+        row.update(_summarise_run_file(run_dir / RUN_FILE))
+
+    if (run_dir / "LOG").is_file():
+        row["total_data_size"] = process_LOG_file(str(run_dir / "LOG"))
+
+    if latencies and (run_dir / STATS_LOG).is_file():
+        row.update(_summarise_latencies(run_dir / STATS_LOG))
+    elif latencies and (run_dir / LATENCY_HIST).is_file():
+        row.update(_summarise_histograms(run_dir / LATENCY_HIST))
+
+    return row
+
+
+def _load_run_args(args):
+    return load_run(*args)
+
+
+def load_experiments(root: PathLike, max_workers: Optional[int] = None,
+                     latencies: bool = True):
+    """Discover and load every run below ``root`` into one DataFrame."""
+    import pandas as pd
+
+    root = Path(root)
+    runs = discover_runs(root)
+    jobs = [(run, root, latencies) for run in runs]
+
+    workers = max_workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) <= 1:
+        rows = [_load_run_args(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            rows = list(executor.map(_load_run_args, jobs))
+
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+
+    known = [impl for impl in line_styles if impl in set(df["impl"].dropna())]
+    df["impl"] = pd.Categorical(df["impl"], categories=known)
+    for col in ("run", "group", "workload_log"):
+        if col in df:
+            df[col] = df[col].astype("category")
+    for col in ("buffer_mb", "buffer_kb", "memtable_factory", "bucket_count",
+                "prefix_length", "selectivity"):
+        if col not in df:
+            continue
+        if df[col].notna().any():
+            df[col] = df[col].astype("category")
+        else:
+            df = df.drop(columns=col)
+    return df
@@ -0,0 +1,437 @@
+"""
+Local SQLite database of experiment results.
+
+Result trees are parsed once and ingested; notebooks then query the
+database instead of rediscovering and reparsing raw logs:
+
+    python3 -m plot.results_db ingest ../../.vstats/vary-buffersize-overhead-exp
+    python3 -m plot.results_db query "SELECT impl, buffer_kb, workload_time FROM runs"
+
+    from plot.results_db import query, latency_array
+    df = query("SELECT r.impl, r.buffer_kb, l.p99_ns FROM runs r "
+               "JOIN latencies l ON l.run_id = r.id "
+               "WHERE r.experiment = ? AND l.op = 'I'", ("vary-buffersize-overhead-exp",))
+    lat = latency_array(run_id, "Q")
+
+Every run found by ``plot.loader.discover_runs`` becomes a row of ``runs``
+(buffer and parameters from the directory names and ``run.json``, totals of
+``workload.log`` / ``workload_run.log``, ``total_data_size`` of the RocksDB
+``LOG``), with one row per phase in ``phases``, the tickers and histograms of
+each phase in ``tickers`` / ``histograms``, and per-op latency summaries of
+``stats.log``, ``stats.bin`` or ``latency.hist`` in ``latencies``.  The raw
+latency arrays are kept next to the database as ``.npy`` side files and come
+back memory-mapped (runs with only histograms have summaries but no array).
+
+Ingesting is incremental: a run is reparsed only when the size or mtime of
+one of its files changed.  The database defaults to
+``<repo>/.results/results.db`` (git-ignored) and can be moved with
+``LSM_RESULTS_DB``.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .binary_stats import op_latencies, read_binary_stats
+from .latency_hist import merge, read_latency_hist
+from .latency_store import open_store
+from .loader import RUN_FILE, STATS_LOG, WORKLOAD_LOGS, _group_params, discover_runs
+from .rocksdb_stats import iter_rocksdb_log
+from .stats_parser import OPCODES
+from .utils import parse_run_name, process_LOG_file
+
+DEFAULT_DB = Path(__file__).resolve().parents[3] / ".results" / "results.db"
+SCHEMA_VERSION = 1
+STATS_BIN = "stats.bin"
+LATENCY_HIST = "latency.hist"
+ARRAYS_DIR = "latencies"
+
+PathLike = Union[str, os.PathLike]
+
+_PHASE_FIELDS = (
+    "workload_time",
+    "insert_time",
+    "update_time",
+    "point_query_time",
+    "point_delete_time",
+    "range_query_time",
+    "cf_size_bytes",
+    "cf_file_count",
+)
+_RUN_PARAMS = ("impl", "buffer_mb", "buffer_kb", "memtable_factory", "bucket_count",
+               "prefix_length", "selectivity")
+_RUN_RECORD = ("status", "concurrency", "co_scheduled", "run_seconds")
+_PERCENTILES = (("p50_ns", 50), ("p90_ns", 90), ("p99_ns", 99), ("p999_ns", 99.9))
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    experiment TEXT,
+    grp TEXT,
+    run TEXT,
+    impl TEXT,
+    buffer_mb INTEGER,
+    buffer_kb INTEGER,
+    memtable_factory INTEGER,
+    bucket_count INTEGER,
+    prefix_length INTEGER,
+    selectivity REAL,
+    workload_log TEXT,
+    phases INTEGER,
+    {", ".join(f"{field} INTEGER" for field in _PHASE_FIELDS)},
+    total_data_size INTEGER,
+    status TEXT,
+    concurrency INTEGER,
+    co_scheduled INTEGER,
+    run_seconds REAL,
+    params TEXT,
+    sources TEXT NOT NULL,
+    ingested TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_experiment ON runs (experiment);
+
+CREATE TABLE IF NOT EXISTS phases (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    phase INTEGER NOT NULL,
+    {", ".join(f"{field} INTEGER" for field in _PHASE_FIELDS)},
+    PRIMARY KEY (run_id, phase)
+);
+
+CREATE TABLE IF NOT EXISTS tickers (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    phase INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value INTEGER,
+    PRIMARY KEY (run_id, phase, name)
+);
+
+CREATE TABLE IF NOT EXISTS histograms (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    phase INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    p50 REAL, p95 REAL, p99 REAL, p100 REAL, count INTEGER, sum INTEGER,
+    PRIMARY KEY (run_id, phase, name)
+);
+
+CREATE TABLE IF NOT EXISTS latencies (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    op TEXT NOT NULL,
+    count INTEGER,
+    mean_ns REAL,
+    {", ".join(f"{name} REAL" for name, _ in _PERCENTILES)},
+    max_ns INTEGER,
+    array TEXT,
+    PRIMARY KEY (run_id, op)
+);
+"""
+
+
+def default_db() -> Path:
+    return Path(os.environ.get("LSM_RESULTS_DB", DEFAULT_DB))
+
+
+def connect(db: Optional[PathLike] = None) -> sqlite3.Connection:
+    """Open (and create) the results database."""
+    db = Path(db) if db else default_db()
+    db.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version not in (0, SCHEMA_VERSION):
+        raise ValueError(f"{db}: schema version {version}, expected {SCHEMA_VERSION}")
+    conn.executescript(_SCHEMA)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return conn
+
+
+def _arrays_root(db: Path) -> Path:
+    return db.with_name(db.name + ".d") / ARRAYS_DIR
+
+
+def _arrays_key(path: str) -> str:
+    """Side-array directory name of the run at ``path``."""
+    return hashlib.sha1(path.encode()).hexdigest()[:16]
+
+
+def _sources(run_dir: Path) -> Dict[str, List[int]]:
+    """``{file: [size, mtime_ns]}`` of the files a run is parsed from."""
+    sources = {}
+    for name in WORKLOAD_LOGS + (STATS_LOG, STATS_BIN, LATENCY_HIST, "LOG", RUN_FILE):
+        path = run_dir / name
+        if path.is_file():
+            st = path.stat()
+            sources[name] = [st.st_size, st.st_mtime_ns]
+    return sources
+
+
+def _latency_summary(lat: np.ndarray) -> Dict[str, Any]:
+    row = {"count": int(len(lat)), "mean_ns": float(lat.mean()), "max_ns": int(lat.max())}
+    values = np.percentile(lat, [q for _, q in _PERCENTILES])
+    row.update({name: float(v) for (name, _), v in zip(_PERCENTILES, values)})
+    return row
+
+
+def _run_latencies(run_dir: Path, arrays_dir: Path) -> List[Dict[str, Any]]:
+    if (run_dir / STATS_BIN).is_file():
+        _, records = read_binary_stats(run_dir / STATS_BIN)
+        columns = {op: op_latencies(records, op) for op in OPCODES}
+    elif (run_dir / STATS_LOG).is_file():
+        store = open_store(run_dir / STATS_LOG)
+        columns = {op: store.latencies(op) for op in OPCODES if store.count(op)}
+    elif (run_dir / LATENCY_HIST).is_file():
+        # Only histograms were recorded (--hist 1): summaries, no raw arrays.
+        hists = merge(read_latency_hist(run_dir / LATENCY_HIST))
+        return [dict({k: v for k, v in h.summary().items() if k != "min_ns"}, op=op, array=None)
+                for op, h in hists.items() if h.count]
+    else:
+        return []
+
+    rows = []
+    for op, lat in columns.items():
+        if len(lat) == 0:
+            continue
+        arrays_dir.mkdir(parents=True, exist_ok=True)
+        array = arrays_dir / f"{op}.npy"
+        tmp = arrays_dir / f"{op}.tmp.npy"
+        np.save(tmp, np.asarray(lat, dtype=np.int64))
+        os.replace(tmp, array)
+        rows.append(dict(_latency_summary(lat), op=op, array=str(array)))
+    return rows
+
+
+def parse_run(run_dir: PathLike, root: PathLike, arrays_root: PathLike) -> Dict[str, Any]:
+    """Everything ingested for one run directory, as plain rows."""
+    run_dir, root = Path(run_dir), Path(root)
+    group = run_dir.parent.relative_to(root) if run_dir != root else Path()
+
+    run = {"path": str(run_dir.resolve()), "experiment": root.resolve().name,
+           "grp": str(group), "run": run_dir.name, "sources": _sources(run_dir)}
+    run.update(parse_run_name(run_dir.name))
+    for key, value in _group_params(group).items():
+        if run.get(key) is None:
+            run[key] = value
+
+    params = {}
+    if (run_dir / RUN_FILE).is_file():
+        with open(run_dir / RUN_FILE) as f:
+            record = json.load(f)
+        params = record.get("params", {})
+        schedule = record.get("schedule", {})
+        run.update(status=record.get("status"), run_seconds=record.get("seconds"),
+                   concurrency=schedule.get("max_concurrent", 1),
+                   co_scheduled=len(schedule.get("co_scheduled", [])))
+        for key in ("bucket_count", "prefix_length"):
+            if run.get(key) is None:
+                run[key] = params.get(key)
+        if run.get("buffer_kb") is None:
+            run["buffer_kb"] = params.get("buffer_size_kb")
+    run["params"] = params
+
+    phases, tickers, histograms = [], [], []
+    for name in WORKLOAD_LOGS:
+        if (run_dir / name).is_file():
+            run["workload_log"] = name
+            for i, phase in enumerate(iter_rocksdb_log(str(run_dir / name))):
+                phases.append(dict({f: phase["meta"].get(f) for f in _PHASE_FIELDS}, phase=i))
+                tickers += [(i, metric, value) for metric, value in phase["tickers"].maps[0].items()]
+                histograms += [(i, metric, h["P50"], h["P95"], h["P99"], h["P100"],
+                                h["COUNT"], h["SUM"])
+                               for metric, h in phase["histograms"].maps[0].items()]
+            break
+    run["phases"] = len(phases)
+    for field in _PHASE_FIELDS:
+        values = [p[field] for p in phases if p[field] is not None]
+        if field.startswith("cf_"):
+            run[field] = values[-1] if values else None
+        else:
+            run[field] = sum(values) if values else None
+
+    if (run_dir / "LOG").is_file():
+        run["total_data_size"] = process_LOG_file(str(run_dir / "LOG"))
+
+    latencies = _run_latencies(run_dir, Path(arrays_root) / _arrays_key(run["path"]))
+    return {"run": run, "phases": phases, "tickers": tickers, "histograms": histograms,
+            "latencies": latencies}
+
+
+def _parse_run_args(args):
+    return parse_run(*args)
+
+
+def _store(conn: sqlite3.Connection, parsed: Dict[str, Any]):
+    run = dict(parsed["run"])
+    run["params"] = json.dumps(run["params"], sort_keys=True)
+    run["sources"] = json.dumps(run["sources"], sort_keys=True)
+    run["ingested"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    columns = ["path", "experiment", "grp", "run", *_RUN_PARAMS, "workload_log", "phases",
+               *_PHASE_FIELDS, "total_data_size", *_RUN_RECORD, "params", "sources", "ingested"]
+
+    conn.execute("DELETE FROM runs WHERE path = ?", (run["path"],))
+    cur = conn.execute(
+        f"INSERT INTO runs ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+        [run.get(c) for c in columns])
+    run_id = cur.lastrowid
+
+    phase_cols = ["phase", *_PHASE_FIELDS]
+    conn.executemany(
+        f"INSERT INTO phases (run_id, {', '.join(phase_cols)}) "
+        f"VALUES (?, {', '.join('?' * len(phase_cols))})",
+        [(run_id, *(p[c] for c in phase_cols)) for p in parsed["phases"]])
+    conn.executemany("INSERT INTO tickers VALUES (?, ?, ?, ?)",
+                     [(run_id, *t) for t in parsed["tickers"]])
+    conn.executemany("INSERT INTO histograms VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     [(run_id, *h) for h in parsed["histograms"]])
+    lat_cols = ["op", "count", "mean_ns", *(name for name, _ in _PERCENTILES), "max_ns", "array"]
+    conn.executemany(
+        f"INSERT INTO latencies (run_id, {', '.join(lat_cols)}) "
+        f"VALUES (?, {', '.join('?' * len(lat_cols))})",
+        [(run_id, *(row[c] for c in lat_cols)) for row in parsed["latencies"]])
+
+
+def ingest(roots: Iterable[PathLike], db: Optional[PathLike] = None,
+           max_workers: Optional[int] = None, rebuild: bool = False,
+           progress: bool = False) -> Dict[str, int]:
+    """Parse every new or changed run below ``roots`` into the database.
+    Returns ``{"runs": found, "ingested": parsed, "removed": gone}``;
+    runs below ``roots`` whose directory disappeared are removed."""
+    db = Path(db) if db else default_db()
+    conn = connect(db)
+    known = dict(conn.execute("SELECT path, sources FROM runs"))
+
+    jobs, found, removed = [], 0, 0
+    for root in roots:
+        root = Path(root)
+        runs = discover_runs(root)
+        found += len(runs)
+        paths = {str(r.resolve()) for r in runs}
+        prefix = str(root.resolve()) + os.sep
+        for path in [p for p in known if p.startswith(prefix) and p not in paths]:
+            conn.execute("DELETE FROM runs WHERE path = ?", (path,))
+            shutil.rmtree(_arrays_root(db) / _arrays_key(path), ignore_errors=True)
+            removed += 1
+        for run_dir in runs:
+            sources = json.dumps(_sources(run_dir), sort_keys=True)
+            if rebuild or known.get(str(run_dir.resolve())) != sources:
+                jobs.append((run_dir, root, _arrays_root(db)))
+
+    workers = min(max_workers or os.cpu_count() or 1, max(len(jobs), 1))
+    if workers == 1:
+        results = map(_parse_run_args, jobs)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(_parse_run_args, jobs)
+    try:
+        for i, parsed in enumerate(results):
+            with conn:
+                _store(conn, parsed)
+            if progress:
+                print(f"\r  {i + 1}/{len(jobs)} runs", end="", file=sys.stderr, flush=True)
+    finally:
+        if workers > 1:
+            executor.shutdown()
+    if progress and jobs:
+        print(file=sys.stderr)
+    conn.commit()
+    conn.close()
+    return {"runs": found, "ingested": len(jobs), "removed": removed}
+
+
+def query(sql: str, params: Sequence[Any] = (), db: Optional[PathLike] = None):
+    """Result of ``sql`` as a DataFrame."""
+    import pandas as pd
+
+    conn = connect(db)
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+def load_runs(experiment: Optional[str] = None, db: Optional[PathLike] = None):
+    """The ``runs`` table (of one ``experiment``), with the per-op latency
+    summaries as ``<op>_<stat>`` columns like ``plot.loader.load_experiments``."""
+    where, params = ("WHERE experiment = ?", (experiment,)) if experiment else ("", ())
+    runs = query(f"SELECT * FROM runs {where}", params, db)
+    lat = query(f"SELECT l.* FROM latencies l JOIN runs r ON r.id = l.run_id {where}",
+                params, db)
+    if lat.empty:
+        return runs
+    stats = [c for c in lat.columns if c not in ("run_id", "op", "array")]
+    wide = lat.pivot(index="run_id", columns="op", values=stats)
+    wide.columns = [f"{op}_{stat}" for stat, op in wide.columns]
+    return runs.merge(wide, left_on="id", right_index=True, how="left")
+
+
+def tickers(names: Iterable[str], experiment: Optional[str] = None,
+            db: Optional[PathLike] = None):
+    """Per-run totals over all phases of the tickers ``names``, one column each."""
+    names = list(names)
+    where = "WHERE t.name IN ({})".format(", ".join("?" * len(names)))
+    params = list(names)
+    if experiment:
+        where += " AND r.experiment = ?"
+        params.append(experiment)
+    df = query("SELECT t.run_id, t.name, SUM(t.value) AS value FROM tickers t "
+               f"JOIN runs r ON r.id = t.run_id {where} GROUP BY t.run_id, t.name",
+               params, db)
+    return df.pivot(index="run_id", columns="name", values="value").reindex(columns=names)
+
+
+def latency_array(run_id: int, op: str, db: Optional[PathLike] = None) -> np.ndarray:
+    """Raw latencies (ns) of ``op`` in run ``run_id``, memory-mapped."""
+    conn = connect(db)
+    try:
+        row = conn.execute("SELECT array FROM latencies WHERE run_id = ? AND op = ?",
+                           (run_id, op)).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return np.empty(0, dtype=np.int64)
+    return np.load(row[0], mmap_mode="r")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python3 -m plot.results_db",
+                                     description="Ingest and query experiment results.")
+    parser.add_argument("--db", type=str, default=None,
+                        help=f"database [def: $LSM_RESULTS_DB or {DEFAULT_DB}]")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("ingest", help="parse new or changed runs below the given roots")
+    p.add_argument("roots", nargs="+", help="experiment trees, e.g. .vstats/<tag>")
+    p.add_argument("-j", "--jobs", type=int, default=None, help="parser processes [def: cpu count]")
+    p.add_argument("--rebuild", action="store_true", help="reparse every run")
+
+    p = sub.add_parser("query", help="run SQL and print the result")
+    p.add_argument("sql")
+
+    args = parser.parse_args()
+    if args.command == "ingest":
+        for root in args.roots:
+            if not os.path.isdir(root):
+                sys.exit(f"Error: {root} not found")
+        t0 = time.time()
+        counts = ingest(args.roots, args.db, args.jobs, args.rebuild, progress=True)
+        print(f"{counts['runs']} runs, {counts['ingested']} ingested, "
+              f"{counts['removed']} removed in {time.time() - t0:.1f}s")
+    else:
+        import pandas as pd
+
+        with pd.option_context("display.max_rows", None, "display.width", None):
+            print(query(args.sql, db=args.db).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
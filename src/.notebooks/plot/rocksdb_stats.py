@@ -1,5 +1,10 @@
+import os
 import re
-from typing import List, Dict, Any
+from collections import ChainMap
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List
+
+from .cache import cached
 
 ALL_TICKERS = set([
     "rocksdb.block.cache.miss",
@@ -295,69 +300,113 @@ ALL_HISTOGRAMS = set([
     "rocksdb.multiscan.op.prepare.iterators.micros",
 ])
 
+_EMPTY_HISTOGRAM = {
+    "P50": 0.0,
+    "P95": 0.0,
+    "P99": 0.0,
+    "P100": 0.0,
+    "COUNT": 0,
+    "SUM": 0,
+}
 
-def parse_rocksdb_log(file_path: str) -> List[Dict[str, Any]]:
-    with open(file_path, "r") as f:
-        lines = f.readlines()
+_META_FIELDS = {
+    "Workload Execution Time": "workload_time",
+    "Inserts Execution Time": "insert_time",
+    "Updates Execution Time": "update_time",
+    "PointQuery Execution Time": "point_query_time",
+    "PointDelete Execution Time": "point_delete_time",
+    "RangeQuery Execution Time": "range_query_time",
+    "RangeQuery Keys Scanned": "scan_keys",
+    "RangeQuery Bytes Scanned": "scan_bytes",
+}
 
-    phases = []
-    current_phase = None
-    section = None  # "stats" | "perf" | "io" | None
+_SECTIONS = {
+    "[Rocksdb Stats]": "stats",
+    "[Perf Context]": "perf",
+    "[IO Stats Context]": "io",
+}
 
-    for line in lines:
-        line = line.strip()
+_TICKER_RE = re.compile(r"(\S+)\s+COUNT:\s+(\d+)")
+_HISTOGRAM_RE = re.compile(
+    r"(\S+)\s+P50\s*:\s*(\S+)\s+P95\s*:\s*(\S+)\s+P99\s*:\s*(\S+)\s+P100\s*:\s*(\S+)\s+COUNT\s*:\s*(\d+)\s+SUM\s*:\s*(\d+)"
+)
 
-        if line.startswith("Column Family Name:"):
-            if current_phase:
-                _finalize_phase(current_phase)
-                phases.append(current_phase)
 
-            current_phase = _new_phase()
-            _parse_cf_header(line, current_phase)
-            section = None
-            continue
+class _HistogramDefaults(Mapping):
+    """Zeroed histogram for every known metric, built only when looked up."""
 
-        if current_phase is None:
-            continue
+    def __getitem__(self, metric):
+        if metric not in ALL_HISTOGRAMS:
+            raise KeyError(metric)
+        return dict(_EMPTY_HISTOGRAM)
 
-        # --- Parse level stats ---
-        _parse_level_stats(line, current_phase)
+    def __iter__(self):
+        return iter(ALL_HISTOGRAMS)
 
-        # --- Parse meta ---
-        _parse_meta(line, current_phase)
+    def __len__(self):
+        return len(ALL_HISTOGRAMS)
 
-        # --- Section switches ---
-        if line.startswith("[Rocksdb Stats]"):
-            section = "stats"
-            continue
 
-        if line.startswith("[Perf Context]"):
-            section = "perf"
-            continue
+_TICKER_DEFAULTS = dict.fromkeys(ALL_TICKERS, 0)
+_HISTOGRAM_DEFAULTS = _HistogramDefaults()
 
-        if line.startswith("[IO Stats Context]"):
-            section = "io"
-            continue
 
-        # --- Section-specific parsing ---
-        if section == "stats":
-            if _parse_ticker(line, current_phase):
+def iter_rocksdb_log(file_path: str) -> Iterator[Dict[str, Any]]:
+    """Stream ``file_path`` and yield each phase as soon as it is complete."""
+    current_phase = None
+    section = None  # "stats" | "perf" | "io" | None
+
+    with open(file_path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+
+            if line.startswith("Column Family Name:"):
+                if current_phase:
+                    yield _finalize_phase(current_phase)
+
+                current_phase = _new_phase()
+                _parse_cf_header(line, current_phase)
+                section = None
+                continue
+
+            if current_phase is None:
                 continue
-            if _parse_histogram(line, current_phase):
+
+            if line.startswith("Level:"):
+                _parse_level_stats(line, current_phase)
+                continue
+
+            if line[0] == "[":
+                header = next((h for h in _SECTIONS if line.startswith(h)), None)
+                if header:
+                    section = _SECTIONS[header]
+                    continue
+
+            if (("Execution Time" in line or line.startswith("RangeQuery "))
+                    and _parse_meta(line, current_phase)):
                 continue
 
-        elif section == "perf":
-            _parse_perf_context(line, current_phase)
+            if section == "stats":
+                if line.startswith("rocksdb."):
+                    if not _parse_ticker(line, current_phase):
+                        _parse_histogram(line, current_phase)
+
+            elif section == "perf":
+                _parse_perf_context(line, current_phase)
 
-        elif section == "io":
-            _parse_io_stats(line, current_phase)
+            elif section == "io":
+                _parse_io_stats(line, current_phase)
 
     # finalize last phase
     if current_phase:
-        _finalize_phase(current_phase)
-        phases.append(current_phase)
+        yield _finalize_phase(current_phase)
 
-    return phases
+
+@cached("rocksdb_log")
+def parse_rocksdb_log(file_path: str) -> List[Dict[str, Any]]:
+    return list(iter_rocksdb_log(file_path))
 
 
 def _new_phase():
@@ -384,9 +433,6 @@ def _parse_cf_header(line: str, phase: Dict):
 
 
 def _parse_level_stats(line: str, phase: Dict):
-    if not line.startswith("Level:"):
-        return
-
     # Level: 0, Files: 14, Size: 9609636 bytes
     parts = [p.strip() for p in line.split(",")]
 
@@ -400,26 +446,25 @@ def _parse_level_stats(line: str, phase: Dict):
     }
 
 
-def _parse_meta(line: str, phase: Dict):
-    def extract():
-        return int(line.split(":")[1].strip())
+def _parse_meta(line: str, phase: Dict) -> bool:
+    # Inserts Execution Time: 123456
+    name, _, value = line.partition(":")
+    field = _META_FIELDS.get(name.strip())
+    if field is None:
+        return False
 
-    if line.startswith("Workload Execution Time"):
-        phase["meta"]["workload_time"] = extract()
-    elif line.startswith("Inserts Execution Time"):
-        phase["meta"]["insert_time"] = extract()
-    elif line.startswith("Updates Execution Time"):
-        phase["meta"]["update_time"] = extract()
-    elif line.startswith("PointQuery Execution Time"):
-        phase["meta"]["point_query_time"] = extract()
-    elif line.startswith("PointDelete Execution Time"):
-        phase["meta"]["point_delete_time"] = extract()
-    elif line.startswith("RangeQuery Execution Time"):
-        phase["meta"]["range_query_time"] = extract()
+    phase["meta"][field] = int(value.strip())
+    return True
 
 
 def _parse_ticker(line: str, phase: Dict) -> bool:
-    m = re.match(r"(\S+)\s+COUNT:\s+(\d+)", line)
+    # rocksdb.block.cache.miss COUNT: 42
+    parts = line.split()
+    if len(parts) == 3 and parts[1] == "COUNT:" and parts[2].isdigit():
+        phase["tickers"][parts[0]] = int(parts[2])
+        return True
+
+    m = _TICKER_RE.match(line)
     if not m:
         return False
 
@@ -429,10 +474,23 @@ def _parse_ticker(line: str, phase: Dict) -> bool:
 
 
 def _parse_histogram(line: str, phase: Dict) -> bool:
-    m = re.match(
-        r"(\S+)\s+P50\s*:\s*(\S+)\s+P95\s*:\s*(\S+)\s+P99\s*:\s*(\S+)\s+P100\s*:\s*(\S+)\s+COUNT\s*:\s*(\d+)\s+SUM\s*:\s*(\d+)",
-        line
-    )
+    # rocksdb.db.get.micros P50 : 1.5 P95 : 3 P99 : 7 P100 : 12 COUNT : 10 SUM : 25
+    parts = line.split()
+    if len(parts) == 19 and parts[1] == "P50" and parts[13] == "COUNT":
+        try:
+            phase["histograms"][parts[0]] = {
+                "P50": float(parts[3]),
+                "P95": float(parts[6]),
+                "P99": float(parts[9]),
+                "P100": float(parts[12]),
+                "COUNT": int(parts[15]),
+                "SUM": int(parts[18]),
+            }
+            return True
+        except ValueError:
+            pass
+
+    m = _HISTOGRAM_RE.match(line)
     if not m:
         return False
 
@@ -450,60 +508,49 @@ def _parse_histogram(line: str, phase: Dict) -> bool:
     return True
 
 
-def _parse_perf_context(line: str, phase: Dict):
+def _parse_key_values(line: str, out: Dict):
     # Format: key = value, key = value, ...
     # Values may be empty (e.g. "bloom_filter_useful =")
     for token in line.split(","):
-        token = token.strip()
-        if "=" not in token:
+        key, sep, raw_val = token.partition("=")
+        if not sep:
             continue
-        key, _, raw_val = token.partition("=")
         key = key.strip()
         raw_val = raw_val.strip()
         if key and raw_val:
             try:
-                phase["perf"][key] = int(raw_val)
+                out[key] = int(raw_val)
             except ValueError:
-                phase["perf"][key] = raw_val
+                out[key] = raw_val
+
+
+def _parse_perf_context(line: str, phase: Dict):
+    _parse_key_values(line, phase["perf"])
 
 
 def _parse_io_stats(line: str, phase: Dict):
-    # Format: key = value, key = value, ...
-    for token in line.split(","):
-        token = token.strip()
-        if "=" not in token:
-            continue
-        key, _, raw_val = token.partition("=")
-        key = key.strip()
-        raw_val = raw_val.strip()
-        if key and raw_val:
-            try:
-                phase["io"][key] = int(raw_val)
-            except ValueError:
-                phase["io"][key] = raw_val
-
-
-def _finalize_phase(phase: Dict):
-    # Fill missing tickers
-    for metric in ALL_TICKERS:
-        phase["tickers"].setdefault(metric, 0)
-
-    # Fill missing histograms
-    for metric in ALL_HISTOGRAMS:
-        if metric not in phase["histograms"]:
-            phase["histograms"][metric] = {
-                "P50": 0.0,
-                "P95": 0.0,
-                "P99": 0.0,
-                "P100": 0.0,
-                "COUNT": 0,
-                "SUM": 0,
-            }
+    _parse_key_values(line, phase["io"])
+
+
+def _finalize_phase(phase: Dict) -> Dict:
+    # Missing tickers/histograms read as zero through a shared defaults view
+    # instead of copying every known metric into each phase.
+    phase["tickers"] = ChainMap(phase["tickers"], _TICKER_DEFAULTS)
+    phase["histograms"] = ChainMap(phase["histograms"], _HISTOGRAM_DEFAULTS)
+    return phase
 
 
 def to_dataframe(phases):
+    """Build one row per phase.
+
+    ``phases`` may be a list from ``parse_rocksdb_log``, the generator from
+    ``iter_rocksdb_log`` or a path to a log, which is then streamed.
+    """
     import pandas as pd
 
+    if isinstance(phases, (str, os.PathLike)):
+        phases = iter_rocksdb_log(phases)
+
     rows = []
 
     for i, p in enumerate(phases):
@@ -536,4 +583,4 @@ def to_dataframe(phases):
 
         rows.append(row)
 
-    return pd.DataFrame(rows)
\ No newline at end of file
+    return pd.DataFrame(rows)
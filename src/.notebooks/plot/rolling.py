@@ -0,0 +1,228 @@
+"""
+Rolling-window statistics for latency-over-time plots.
+
+    from plot.rolling import rolling_stats
+    x, p0, p95, mean = rolling_stats(latencies, window=200)
+
+Every function returns ``x`` (1-based position of the window centre in the
+input) alongside the statistic, ready for ``ax.plot`` / ``ax.fill_between``.
+
+- mean uses a cumulative sum, O(n);
+- min / max use the van Herk/Gil-Werman block scan, O(n) and fully vectorized;
+- other percentiles are computed on batches of windows with ``np.percentile``
+  when windows are short or strided, and with a sliding sorted window
+  (bisect insert/delete, O(n log w)) when that is cheaper.
+
+``stride`` keeps only every ``stride``-th window, which is usually all a
+figure needs for multi-million point series.  ``edges="valid"`` (default)
+only emits full windows; ``edges="shrink"`` emits one value per input point
+and lets the windows at both ends shrink, like
+``arr[max(0, i - half) : min(n, i + half)]``.
+"""
+
+import bisect
+import math
+from typing import Sequence, Tuple, Union
+
+import numpy as np
+
+Percentiles = Union[float, Sequence[float]]
+
+# Elements per batch fed to np.percentile (bounds the temporary copy).
+_BATCH_ELEMS = 1 << 22
+# Rough cost of one sliding-sorted-window step relative to one element of a
+# batched np.percentile call; used to pick the cheaper percentile method.
+_SORTED_STEP_COST = 128
+
+
+def _window_len(window: int) -> int:
+    if window < 1:
+        raise ValueError(f"window must be >= 1, got {window}")
+    return int(window)
+
+
+def _layout(n: int, window: int, stride: int, edges: str):
+    """Window start offsets (may be negative / overrun for ``shrink``) and x."""
+    if stride < 1:
+        raise ValueError(f"stride must be >= 1, got {stride}")
+    half = window // 2
+    if edges == "valid":
+        starts = np.arange(0, max(n - window + 1, 0), stride, dtype=np.int64)
+    elif edges == "shrink":
+        starts = np.arange(0, n, stride, dtype=np.int64) - half
+    else:
+        raise ValueError(f"edges must be 'valid' or 'shrink', got {edges!r}")
+    return starts, starts + half + 1
+
+
+def _split(starts: np.ndarray, n: int, window: int):
+    """Mask of windows that lie fully inside ``[0, n)``."""
+    return (starts >= 0) & (starts + window <= n)
+
+
+# --- mean --------------------------------------------------------------------
+
+def _window_sums(arr: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    if np.issubdtype(arr.dtype, np.integer):
+        csum = np.concatenate(([0], np.cumsum(arr, dtype=np.int64)))
+    else:
+        csum = np.concatenate(([0.0], np.cumsum(arr, dtype=np.float64)))
+    return (csum[hi] - csum[lo]).astype(np.float64)
+
+
+def rolling_mean(arr: np.ndarray, window: int, stride: int = 1,
+                 edges: str = "valid") -> Tuple[np.ndarray, np.ndarray]:
+    arr = np.asarray(arr)
+    window = _window_len(window)
+    starts, x = _layout(len(arr), window, stride, edges)
+    lo = np.clip(starts, 0, len(arr))
+    hi = np.clip(starts + window, 0, len(arr))
+    return x, _window_sums(arr, lo, hi) / np.maximum(hi - lo, 1)
+
+
+# --- min / max ---------------------------------------------------------------
+
+def _sliding_extreme(arr: np.ndarray, window: int, func) -> np.ndarray:
+    """``func`` (np.minimum / np.maximum) over every full window, O(n)."""
+    n = len(arr)
+    values = arr.astype(np.float64)
+    fill = np.inf if func is np.minimum else -np.inf
+    blocks = -(-n // window)
+    padded = np.full(blocks * window, fill)
+    padded[:n] = values
+    padded = padded.reshape(blocks, window)
+    prefix = func.accumulate(padded, axis=1).ravel()
+    suffix = func.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+    starts = np.arange(n - window + 1)
+    return func(suffix[starts], prefix[starts + window - 1])
+
+
+def _rolling_extreme(arr, window, stride, edges, func):
+    arr = np.asarray(arr)
+    window = _window_len(window)
+    n = len(arr)
+    starts, x = _layout(n, window, stride, edges)
+    out = np.empty(len(starts))
+    inner = _split(starts, n, window)
+    if inner.any():
+        out[inner] = _sliding_extreme(arr, window, func)[starts[inner]]
+    for i in np.flatnonzero(~inner):
+        s = starts[i]
+        out[i] = func.reduce(arr[max(s, 0):min(s + window, n)])
+    return x, out
+
+
+def rolling_min(arr: np.ndarray, window: int, stride: int = 1,
+                edges: str = "valid") -> Tuple[np.ndarray, np.ndarray]:
+    return _rolling_extreme(arr, window, stride, edges, np.minimum)
+
+
+def rolling_max(arr: np.ndarray, window: int, stride: int = 1,
+                edges: str = "valid") -> Tuple[np.ndarray, np.ndarray]:
+    return _rolling_extreme(arr, window, stride, edges, np.maximum)
+
+
+# --- percentiles -------------------------------------------------------------
+
+def _percentiles_batched(arr, window, starts, qs) -> np.ndarray:
+    view = np.lib.stride_tricks.sliding_window_view(arr, window)
+    out = np.empty((len(qs), len(starts)))
+    batch = max(1, _BATCH_ELEMS // window)
+    for b in range(0, len(starts), batch):
+        chunk = view[starts[b:b + batch]]
+        out[:, b:b + batch] = np.percentile(chunk, qs, axis=1)
+    return out
+
+
+def _percentiles_sorted(arr, window, starts, qs) -> np.ndarray:
+    """Slide a sorted list over ``arr``; same interpolation as np.percentile.
+
+    ``starts`` must be an arithmetic progression (what ``_layout`` produces).
+    """
+    values = arr.tolist()
+    ranks = [q / 100 * (window - 1) for q in qs]
+    picks = [(k, int(math.floor(r)), r - math.floor(r)) for k, r in enumerate(ranks)]
+    out = np.empty((len(qs), len(starts)))
+    step = int(starts[1] - starts[0]) if len(starts) > 1 else 1
+    delete, insort, bisect_left = list.__delitem__, bisect.insort, bisect.bisect_left
+
+    s = int(starts[0])
+    win = sorted(values[s:s + window])
+    for col in range(len(starts)):
+        for k, f, frac in picks:
+            lo = win[f]
+            out[k, col] = lo + (win[f + 1] - lo) * frac if frac else lo
+        if col + 1 == len(starts):
+            break
+        if step >= window:
+            s += step
+            win = sorted(values[s:s + window])
+            continue
+        for t in range(s, s + step):
+            delete(win, bisect_left(win, values[t]))
+            insort(win, values[t + window])
+        s += step
+    return out
+
+
+def _percentiles_full(arr, window, starts, qs) -> np.ndarray:
+    if _is_extreme_only(qs):
+        func = np.minimum if qs[0] == 0 else np.maximum
+        return _sliding_extreme(arr, window, func)[starts][None, :]
+    batched_cost = len(starts) * window
+    sorted_cost = min(starts[-1] - starts[0] + 1, len(starts) * window) * _SORTED_STEP_COST
+    if sorted_cost < batched_cost:
+        return _percentiles_sorted(arr, window, starts, qs)
+    return _percentiles_batched(arr, window, starts, qs)
+
+
+def _is_extreme_only(qs) -> bool:
+    return len(qs) == 1 and qs[0] in (0, 100)
+
+
+def rolling_percentile(arr: np.ndarray, window: int, q: Percentiles,
+                       stride: int = 1, edges: str = "valid"
+                       ) -> Tuple[np.ndarray, np.ndarray]:
+    """Rolling ``np.percentile(window, q)``; 2-D ``(len(q), n)`` if ``q`` is a sequence."""
+    arr = np.asarray(arr)
+    window = _window_len(window)
+    scalar = np.ndim(q) == 0
+    qs = [float(q)] if scalar else [float(v) for v in q]
+    n = len(arr)
+    starts, x = _layout(n, window, stride, edges)
+
+    out = np.empty((len(qs), len(starts)))
+    inner = _split(starts, n, window)
+    if inner.any():
+        inner_starts = starts[inner]
+        # min / max of a mixed request still go through the O(n) scan
+        for k, q_k in enumerate(qs):
+            if q_k in (0, 100):
+                out[k, inner] = _percentiles_full(arr, window, inner_starts, [q_k])[0]
+        rest = [k for k, q_k in enumerate(qs) if q_k not in (0, 100)]
+        if rest:
+            vals = _percentiles_full(arr, window, inner_starts, [qs[k] for k in rest])
+            for row, k in enumerate(rest):
+                out[k, inner] = vals[row]
+    for i in np.flatnonzero(~inner):
+        s = starts[i]
+        out[:, i] = np.percentile(arr[max(s, 0):min(s + window, n)], qs)
+
+    return x, out[0] if scalar else out
+
+
+def rolling_tail_ratio(arr: np.ndarray, window: int, hi: float = 99, lo: float = 50,
+                       stride: int = 1, edges: str = "valid"
+                       ) -> Tuple[np.ndarray, np.ndarray]:
+    """Rolling ``p<hi> / p<lo>`` (e.g. p99/p50) of every window."""
+    x, (p_hi, p_lo) = rolling_percentile(arr, window, (hi, lo), stride, edges)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return x, p_hi / p_lo
+
+
+def rolling_stats(arr: np.ndarray, window: int, percentiles: Sequence[float] = (0, 95),
+                  stride: int = 1, edges: str = "valid"):
+    """``(x, *percentile_rows, mean)`` -- by default ``(x, p0, p95, mean)``."""
+    x, pct = rolling_percentile(arr, window, list(percentiles), stride, edges)
+    _, mean = rolling_mean(arr, window, stride, edges)
+    return (x, *pct, mean)
@@ -0,0 +1,128 @@
+"""
+Vectorized parser for PER_OP_TIMER ``stats.log`` files.
+
+Every record is a line ``<op>: <ns>``.  Instead of splitting lines in Python,
+the file is read in large binary chunks and each chunk is decoded with NumPy:
+newline offsets give the line boundaries, the first byte gives the opcode and
+the trailing ASCII digits are converted to int64 one decimal place at a time
+across all lines at once.  Lines that do not match the record layout are
+skipped, just like the ``line.startswith("Q:")`` loops in the notebooks.
+"""
+
+import os
+from typing import Dict, Iterable, Tuple, Union
+
+import numpy as np
+
+from .cache import cached
+
+OPCODES = ("I", "U", "D", "Q", "S", "M")
+
+DEFAULT_CHUNK_BYTES = 64 * 1024 * 1024
+
+# int64 holds 18 full decimal digits; latencies in ns never get close.
+_MAX_DIGITS = 18
+
+_NL, _CR, _SP, _COLON, _ZERO, _NINE = (ord(c) for c in "\n\r :09")
+
+PathLike = Union[str, os.PathLike]
+
+
+def _decode_chunk(buf: np.ndarray):
+    """Decode a chunk holding only complete lines.
+
+    Returns ``(opcode bytes, latencies)`` for every well-formed record.
+    """
+    ends = np.flatnonzero(buf == _NL)
+    if not len(ends):
+        return np.empty(0, dtype=np.uint8), np.empty(0, dtype=np.int64)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+
+    # "<op>: <digits>" needs at least four bytes before the newline.
+    ok = ends - starts >= 4
+    starts, ends = starts[ok], ends[ok]
+    ok = (buf[starts + 1] == _COLON) & (buf[starts + 2] == _SP)
+    starts, ends = starts[ok], ends[ok]
+
+    # Tolerate CRLF and trailing blanks.
+    for _ in range(2):
+        tail = buf[ends - 1]
+        ends = ends - (((tail == _CR) | (tail == _SP)) & (ends > starts + 3))
+
+    digits_start = starts + 3
+    lengths = ends - digits_start
+    ok = (lengths > 0) & (lengths <= _MAX_DIGITS)
+
+    values = np.zeros(len(starts), dtype=np.int64)
+    scale = np.int64(1)
+    for k in range(int(lengths[ok].max()) if ok.any() else 0):
+        has_digit = ok & (lengths > k)
+        pos = np.where(has_digit, ends - 1 - k, 0)
+        d = buf[pos]
+        ok &= ~has_digit | ((d >= _ZERO) & (d <= _NINE))
+        values += np.where(has_digit, d.astype(np.int64) - _ZERO, 0) * scale
+        scale *= 10
+
+    return buf[starts[ok]], values[ok]
+
+
+def iter_stats_chunks(path: PathLike, chunk_bytes: int = DEFAULT_CHUNK_BYTES):
+    """Yield ``(opcode bytes, latencies)`` arrays chunk by chunk."""
+    carry = b""
+    with open(path, "rb") as fh:
+        while True:
+            data = fh.read(chunk_bytes)
+            if not data:
+                break
+            data = carry + data
+            cut = data.rfind(b"\n") + 1
+            carry = data[cut:]
+            if cut:
+                yield _decode_chunk(np.frombuffer(data, dtype=np.uint8, count=cut))
+    if carry:
+        yield _decode_chunk(np.frombuffer(carry + b"\n", dtype=np.uint8))
+
+
+def parse_stats_log(
+    path: PathLike,
+    ops: Iterable[str] = OPCODES,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray], int]:
+    """Parse ``stats.log`` into per-opcode columns.
+
+    Returns ``(latencies, indices, records)``: ``latencies[op]`` holds the
+    latencies (ns, int64) of every ``op`` record, ``indices[op]`` the position
+    of each of those records among all records of the log, and ``records`` the
+    total number of records seen.
+    """
+    codes = {op: ord(op) for op in ops}
+    lat_parts = {op: [] for op in codes}
+    idx_parts = {op: [] for op in codes}
+
+    records = 0
+    for opcodes, values in iter_stats_chunks(path, chunk_bytes):
+        for op, code in codes.items():
+            sel = np.flatnonzero(opcodes == code)
+            lat_parts[op].append(values[sel])
+            idx_parts[op].append(sel + records)
+        records += len(values)
+
+    def concat(parts):
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    latencies = {op: concat(lat_parts[op]) for op in codes}
+    indices = {op: concat(idx_parts[op]).astype(np.int64, copy=False) for op in codes}
+    return latencies, indices, records
+
+
+@cached("op_latencies")
+def read_op_latencies(path: PathLike, op: str, divisor: float = 1) -> np.ndarray:
+    """Latencies of one opcode as float64, divided by ``divisor``.
+
+    ``read_op_latencies(log, "Q", 1_000_000)`` returns the same array (in ms)
+    as the old ``process_single_dir_for_PQs`` line loop.
+    """
+    latencies, _, _ = parse_stats_log(path, ops=(op,))
+    return latencies[op] / divisor
@@ -58,4 +58,52 @@ def process_LOG_file(path: str) -> int:
 
 def process_workload_log(path: str):
     """Process workload log file to extract relevant metric"""
-    pass
\ No newline at end of file
+    pass
+
+def normalize_name(name: str) -> Optional[str]:
+    """Map a run directory name to its buffer key in ``plot.style``.
+
+    Understands every naming scheme the run scripts produce, e.g.
+    ``vector-preallocated``, ``hashlinkedlist-H100000-X6``,
+    ``buffer-3-hash_skip_list-X6-H100000`` or ``AlwayssortedVector-dynamic``.
+    """
+    name = name.lower()
+    if name.startswith("dynamic"):
+        return "dynamic"
+    if "hash_linked_list" in name or "hashlinkedlist" in name:
+        return "hashlinkedlist"
+    if "hash_skip_list" in name or "hashskiplist" in name:
+        return "hashskiplist"
+    if "hash_vector" in name or "hashvector" in name:
+        return "hashvector"
+    if "simple_skiplist" in name or "simpleskiplist" in name:
+        return "simpleskiplist"
+    if "skiplist" in name or "skip_list" in name:
+        return "skiplist"
+    if "linkedlist" in name or "linklist" in name:
+        return "linkedlist"
+    if "unsortedvector" in name:
+        return "unsortedvector"
+    if "sortedvector" in name:
+        return "alwayssortedvector"
+    if "vector" in name:
+        return "vector"
+    return None
+
+
+_RUN_NAME_PARAMS = [
+    ("buffer_mb", re.compile(r"^buffer-(\d+)MB-")),
+    ("memtable_factory", re.compile(r"^buffer-(?:\d+MB-)?(\d+)-")),
+    ("buffer_kb", re.compile(r"-B(\d+)KB(?:-|$)")),
+    ("bucket_count", re.compile(r"-H(\d+)(?:-|$)")),
+    ("prefix_length", re.compile(r"-X(\d+)(?:-|$)")),
+]
+
+
+def parse_run_name(name: str) -> dict:
+    """Extract the buffer and its parameters from a run directory name."""
+    params = {"impl": normalize_name(name)}
+    for key, pattern in _RUN_NAME_PARAMS:
+        m = pattern.search(name)
+        params[key] = int(m.group(1)) if m else None
+    return params
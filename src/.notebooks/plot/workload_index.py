@@ -0,0 +1,74 @@
+"""
+Reader for the workload sidecar index (``workload.txt.index.json``) written
+by ``scripts/inspect_workload.py``.
+
+    index = read_workload_index(run_dir)          # or the workload.txt path
+    WORKLOAD_INSERTS = op_count(run_dir, "I")
+    WORKLOAD_PQ = op_count(run_dir, "P")
+
+The index holds op counts, per-window op mix, key / value length histograms,
+distinct key estimates, insert sortedness and point query hit fractions, so
+notebooks can validate a workload and get throughput denominators without
+reading the workload itself.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+
+INDEX_SUFFIX = ".index.json"
+INDEX_VERSION = 1
+WORKLOAD_FILE = "workload.txt"
+
+PathLike = Union[str, os.PathLike]
+
+
+def index_path(path: PathLike) -> Path:
+    """Index file of a workload file, or of the ``workload.txt`` in a directory."""
+    path = Path(path)
+    if path.is_dir():
+        path = path / WORKLOAD_FILE
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def read_workload_index(path: PathLike, check_fresh: bool = True) -> Dict[str, Any]:
+    """The index of ``path``.
+
+    With ``check_fresh`` the index must match the size and mtime of the
+    workload next to it (when that workload still exists).
+    """
+    idx_file = index_path(path)
+    with open(idx_file) as f:
+        index = json.load(f)
+    if index.get("version") != INDEX_VERSION:
+        raise ValueError(f"{idx_file}: unsupported index version {index.get('version')}")
+
+    workload = idx_file.with_name(idx_file.name[: -len(INDEX_SUFFIX)])
+    if check_fresh and workload.exists():
+        st = workload.stat()
+        if index["source"] != {"size": st.st_size, "mtime_ns": st.st_mtime_ns}:
+            raise ValueError(f"{idx_file} is stale; rerun scripts/inspect_workload.py {workload}")
+    return index
+
+
+def op_count(path: PathLike, op: str, default: Optional[int] = None) -> int:
+    """Number of ``op`` ops (I, U, D, P, S, SC, R, M; Q counts as P)."""
+    try:
+        counts = read_workload_index(path)["counts"]
+    except FileNotFoundError:
+        if default is None:
+            raise
+        return default
+    return counts["P" if op == "Q" else op]
+
+
+def op_mix(path: PathLike):
+    """``(window_start, counts)``: first op of every window and a
+    ``{op: counts per window}`` dict of arrays."""
+    windows = read_workload_index(path)["windows"]
+    counts = np.asarray(windows["counts"], dtype=np.int64).reshape(-1, len(windows["ops"]))
+    starts = np.arange(len(counts)) * windows["size"]
+    return starts, {op: counts[:, i] for i, op in enumerate(windows["ops"])}
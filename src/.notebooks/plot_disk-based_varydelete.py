@@ -36,6 +36,7 @@ class Logger(object):
 
 from plot.rocksdb_stats import parse_rocksdb_log
 from plot.style import hatch_map, line_styles
+from plot.utils import normalize_name
 
 ROOT_DIR = PROJECT_ROOT / "data_new"
 EXP_DIR = ROOT_DIR / "diskbased_vary_delete"
@@ -61,27 +62,6 @@ def dump_to_csv(filename, headers, rows):
         writer.writerows(rows)
     print(f"[DATA DUMP] Saved numeric values to {filepath}")
 
-def normalize_name(name):
-    name = name.lower()
-    if "hash_linked_list" in name or "hashlinkedlist" in name:
-        return "hashlinkedlist"
-    if "hash_skip_list" in name or "hashskiplist" in name:
-        return "hashskiplist"
-    if "hash_vector" in name or "hashvector" in name:
-        return "hashvector"
-    if "simple_skiplist" in name or "simpleskiplist" in name:
-        return "simpleskiplist"
-    if "skiplist" in name and "simple" not in name and "hash" not in name:
-        return "skiplist"
-    if "unsortedvector" in name:
-        return "unsortedvector"
-    if "sortedvector" in name:
-        return "alwayssortedvector"
-    if "vector" in name and "hash" not in name and "unsorted" not in name and "sorted" not in name:
-        return "vector"
-    if "linkedlist" in name and "hash" not in name:
-        return "linkedlist"
-    return None
 
 def process_run_metrics(args):
     impl, path = args
@@ -36,6 +36,7 @@ class Logger(object):
 
 from plot.rocksdb_stats import parse_rocksdb_log
 from plot.style import hatch_map, line_styles  # Triggers __init__.py font setup
+from plot.utils import normalize_name
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = SCRIPT_DIR.parents[1] 
@@ -62,27 +63,6 @@ def dump_to_csv(filename, headers, rows):
         writer.writerows(rows)
     print(f"[DATA DUMP] Saved numeric values to {filepath}")
 
-def normalize_name(name):
-    name = name.lower()
-    if "hash_linked_list" in name or "hashlinkedlist" in name:
-        return "hashlinkedlist"
-    if "hash_skip_list" in name or "hashskiplist" in name:
-        return "hashskiplist"
-    if "hash_vector" in name or "hashvector" in name:
-        return "hashvector"
-    if "simple_skiplist" in name or "simpleskiplist" in name:
-        return "simpleskiplist"
-    if "skiplist" in name and "simple" not in name and "hash" not in name:
-        return "skiplist"
-    if "unsortedvector" in name:
-        return "unsortedvector"
-    if "sortedvector" in name:
-        return "alwayssortedvector"
-    if "vector" in name and "hash" not in name and "unsorted" not in name and "sorted" not in name:
-        return "vector"
-    if "linkedlist" in name and "hash" not in name:
-        return "linkedlist"
-    return None
 
 # ==============================================================================
 # CORE PARSER: Holistic Run Parsing (Sums across phases)
@@ -8,6 +8,7 @@ from matplotlib.patches import Patch
 
 from plot import *
 from plot.style import hatch_map, line_styles
+from plot.utils import normalize_name
 
 # Override: latex not available on this machine
 import re
@@ -40,29 +41,6 @@ implementations = [
 ]
 
 
-def normalize_name(name):
-    name = name.lower()
-    if "hashlinkedlist" in name:
-        return "hashlinkedlist"
-    if "hashskiplist" in name:
-        return "hashskiplist"
-    if "hashvector" in name:
-        return "hashvector"
-    if "simpleskiplist" in name:
-        return "simpleskiplist"
-    if name == "skiplist":
-        return "skiplist"
-    if "linkedlist" in name:
-        return "linkedlist"
-    if "unsortedvector" in name:
-        return "unsortedvector"
-    if "sortedvector" in name:
-        return "alwayssortedvector"
-    if "vector" in name:
-        return "vector"
-    return None
-
-
 def parse_workload_log(log_file: Path):
     """Parse workload.log and return (insert_ns, pq_ns, rq_ns)."""
     if not log_file.exists():
@@ -7,8 +7,12 @@ import matplotlib.pyplot as plt
 from matplotlib.patches import Patch
 
 from plot import *
+from plot.latency_store import load_latencies
 from plot.rocksdb_stats import parse_rocksdb_log
+from plot.downsample import fill_between_series, plot_series
+from plot.rolling import rolling_stats
 from plot.style import hatch_map, line_styles
+from plot.utils import normalize_name
 
 TAG = "inmemory-mixed-ops-exp"
 os.makedirs(TAG, exist_ok=True)
@@ -43,29 +47,6 @@ implementations = [
 ]
 
 
-def normalize_name(name):
-    name = name.lower()
-    if "hashlinkedlist" in name:
-        return "hashlinkedlist"
-    if "hashskiplist" in name:
-        return "hashskiplist"
-    if "hashvector" in name:
-        return "hashvector"
-    if "simpleskiplist" in name:
-        return "simpleskiplist"
-    if name == "skiplist":
-        return "skiplist"
-    if "linkedlist" in name:
-        return "linkedlist"
-    if "unsortedvector" in name:
-        return "unsortedvector"
-    if "sortedvector" in name:
-        return "alwayssortedvector"
-    if "vector" in name:
-        return "vector"
-    return None
-
-
 def safe_tp(ops, time_ns):
     if time_ns == 0:
         return 0.0
@@ -248,29 +229,12 @@ def plot_pq_latency_over_time():
             print(f"Missing: {stats_file}")
             continue
 
-        latencies = []
-        with open(stats_file) as f:
-            for line in f:
-                if line.startswith("Q:"):
-                    latencies.append(int(line[2:].strip()))
-
-        arr = np.array(latencies)
-        n = len(arr)
-        half = WINDOW // 2
-
-        x_win, p0_win, p95_win, mean_win = [], [], [], []
-        for i in range(half, n - half):
-            window = arr[i - half : i + half]
-            x_win.append(i + 1)
-            p0_win.append(np.percentile(window, 0))
-            p95_win.append(np.percentile(window, 95))
-            mean_win.append(np.mean(window))
-
-        x_win = np.array(x_win)
-
-        ax.fill_between(x_win, p0_win, p95_win, color=color, alpha=0.3, rasterized=True)
-        ax.plot(
-            x_win, mean_win, color=color, linestyle=ls, 
+        arr = load_latencies(stats_file, "Q")
+        x_win, p0_win, p95_win, mean_win = rolling_stats(arr, WINDOW)
+
+        fill_between_series(ax, x_win, p0_win, p95_win, color=color, alpha=0.3, rasterized=True)
+        plot_series(
+            ax, x_win, mean_win, color=color, linestyle=ls, 
             linewidth=5 if "optimized" in label else 1.4, 
             label=None if "optimized" in label else label
         )
@@ -325,18 +289,8 @@ VECTOR_LABELS = {
 }
 
 
-def _read_latencies(stats_file: Path, prefix: str, cache_suffix: str) -> np.ndarray:
-    cache = stats_file.with_suffix(cache_suffix)
-    if cache.exists() and cache.stat().st_mtime >= stats_file.stat().st_mtime:
-        return np.load(cache)
-    latencies = []
-    with open(stats_file) as f:
-        for line in f:
-            if line.startswith(prefix):
-                latencies.append(int(line[len(prefix):].strip()))
-    arr = np.array(latencies)
-    np.save(cache, arr)
-    return arr
+def _read_latencies(stats_file: Path, prefix: str) -> np.ndarray:
+    return load_latencies(stats_file, prefix.rstrip(":"))
 
 
 def _bxp_stats(arr: np.ndarray) -> dict:
@@ -350,7 +304,7 @@ def _bxp_stats(arr: np.ndarray) -> dict:
     }
 
 
-def _draw_boxes(ax, prefix, cache_sfx):
+def _draw_boxes(ax, prefix):
     """Draw bxp boxes for all VECTOR_IMPLS on a single axis."""
     workloads     = ["sequential", "mixed"]
     n_impls       = len(VECTOR_IMPLS)
@@ -370,7 +324,7 @@ def _draw_boxes(ax, prefix, cache_sfx):
             if not stats_file.exists():
                 print(f"Missing: {stats_file}")
                 continue
-            arr = _read_latencies(stats_file, prefix, cache_sfx)
+            arr = _read_latencies(stats_file, prefix)
             if len(arr) == 0:
                 continue
             bxp_data.append(_bxp_stats(arr))
@@ -399,11 +353,11 @@ def _draw_boxes(ax, prefix, cache_sfx):
     return group_centers, group_gap
 
 
-def _plot_vector_boxplot_panel(ax_top, ax_bot, prefix, cache_sfx, ylabel, panel_title,
+def _plot_vector_boxplot_panel(ax_top, ax_bot, prefix, ylabel, panel_title,
                                ylim_top, ylim_bot, fig_label=None):
     workloads = ["sequential", "mixed"]
-    group_centers, group_gap = _draw_boxes(ax_top, prefix, cache_sfx)
-    _draw_boxes(ax_bot, prefix, cache_sfx)
+    group_centers, group_gap = _draw_boxes(ax_top, prefix)
+    _draw_boxes(ax_bot, prefix)
 
     xlim = (group_centers[0] - group_gap * 0.55, group_centers[-1] + group_gap * 0.55)
 
@@ -478,7 +432,7 @@ def plot_vector_boxplots_writes():
     ax_top = fig.add_subplot(gs[0])
     ax_bot = fig.add_subplot(gs[1])
     _plot_vector_boxplot_panel(
-        ax_top, ax_bot, "I:", ".I.npy", "insert latency (ns)", "writes",
+        ax_top, ax_bot, "I:", "insert latency (ns)", "writes",
         ylim_top=(1e2, None), ylim_bot=(1e0, 30), fig_label="(A)",
     )
     output_file = DROPBOX_PATH / "inmemory-vector-boxplots-writes.pdf"
@@ -493,7 +447,7 @@ def plot_vector_boxplots_gets():
     ax_top = fig.add_subplot(gs[0])
     ax_bot = fig.add_subplot(gs[1])
     _plot_vector_boxplot_panel(
-        ax_top, ax_bot, "Q:", ".P.npy", "PQ latency (ns)", "gets",
+        ax_top, ax_bot, "Q:", "PQ latency (ns)", "gets",
         ylim_top=(1e3, None), ylim_bot=(1e0, 30), fig_label="(B)",
     )
     output_file = DROPBOX_PATH / "inmemory-vector-boxplots-gets.pdf"
@@ -589,12 +543,7 @@ def dump_pq_latency_csv():
             if not stats_file.exists():
                 print(f"Missing: {stats_file}")
                 continue
-            latencies = []
-            with open(stats_file) as f2:
-                for line in f2:
-                    if line.startswith("Q:"):
-                        latencies.append(int(line[2:].strip()))
-            arr = np.array(latencies)
+            arr = load_latencies(stats_file, "Q")
             writer.writerow({
                 "workload":  label,
                 "n_queries": len(arr),
@@ -5,6 +5,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.lines import Line2D
 
+from plot.cache import cached
 from plot.style import line_styles
 
 TAG = "lowpri-vector-exp"
@@ -35,10 +36,8 @@ markers = {
 }
 
 
+@cached("lowpri_first_10k_inserts")
 def read_insert_latencies(stats_file: Path) -> np.ndarray:
-    cache = stats_file.with_suffix(".I10k.npy")
-    if cache.exists() and cache.stat().st_mtime >= stats_file.stat().st_mtime:
-        return np.load(cache)
     latencies = []
     read_only_first_10k = 10_000
     with open(stats_file) as f:
@@ -47,22 +46,7 @@ def read_insert_latencies(stats_file: Path) -> np.ndarray:
                 break
             if line.startswith("I:"):
                 latencies.append(int(line[2:].strip()))
-    arr = np.array(latencies)
-    np.save(cache, arr)
-    return arr
-
-
-def rolling_stats(arr: np.ndarray, window: int):
-    half = window // 2
-    n = len(arr)
-    x, p0, p95, mean = [], [], [], []
-    for i in range(half, n - half):
-        w = arr[i - half: i + half]
-        x.append(i + 1)
-        p0.append(np.percentile(w, 0))
-        p95.append(np.percentile(w, 95))
-        mean.append(np.mean(w))
-    return np.array(x), np.array(p0), np.array(p95), np.array(mean)
+    return np.array(latencies)
 
 
 def plot_insert_latency():
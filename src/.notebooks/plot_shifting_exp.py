@@ -5,8 +5,10 @@ import matplotlib.pyplot as plt
 from concurrent.futures import ProcessPoolExecutor
 from matplotlib.ticker import MaxNLocator
 
+from plot.latency_store import open_store
 from plot.rocksdb_stats import parse_rocksdb_log
 from plot.style import hatch_map, line_styles  # , hatch_map
+from plot.utils import normalize_name
 
 # --- CONFIGURATION PARAMETERS ---
 Y_AXIS_LOG = False  # Set to True for log scale, False for linear scale
@@ -33,114 +35,30 @@ implementations = [
 ]
 
 
-def normalize_name(name):
-    name = name.lower()
-    if "hashlinkedlist" in name:
-        return "hashlinkedlist"
-    if "hashskiplist" in name:
-        return "hashskiplist"
-    if "hashvector" in name:
-        return "hashvector"
-    if "simpleskiplist" in name:
-        return "simpleskiplist"
-    if name == "skiplist":
-        return "skiplist"
-    if "linkedlist" in name:
-        return "linkedlist"
-    if "unsortedvector" in name:
-        return "unsortedvector"
-    if "sortedvector" in name:
-        return "alwayssortedvector"
-    if "vector" in name:
-        return "vector"
-    return None
-
-
-def process_single_dir_for_PQs(args):
-    impl, path = args
-    log_file = os.path.join(path, "stats.log")
-    cache_file = os.path.join(path, "insert_latencies_pqq.npy")
-
-    if os.path.exists(cache_file):
-        arr = np.load(cache_file, mmap_mode="r")
-        print(f"[CACHE HIT] {impl}")
-    else:
-        print(f"[PARSING] {impl}")
-        latencies = []
-        with open(log_file, "r") as f:
-            for _, line in enumerate(f):
-                if not line.startswith("Q:"):
-                    continue
-                parts = line.split()
-                latency_ms = float(parts[1]) / 1_000_000  # convert ns to ms
-                latencies.append(latency_ms)
-        arr = np.array(latencies, dtype=np.float64)
-        np.save(cache_file, arr)
-
-    stats = {
+def _latency_stats(impl, path, op, divisor):
+    store = open_store(os.path.join(path, "stats.log"))
+    print(f"[LOADED] {impl}")
+    arr = store.latencies(op) / divisor
+    return impl, {
         "mean": float(arr.mean()),
         "median": float(np.median(arr)),
         "data": arr,
     }
-    return impl, stats
 
 
-def process_single_dir_for_RQs(args):
+def process_single_dir_for_PQs(args):
     impl, path = args
-    log_file = os.path.join(path, "stats.log")
-    cache_file = os.path.join(path, "insert_latencies_rq.npy")
+    return _latency_stats(impl, path, "Q", 1_000_000)  # convert ns to ms
 
-    if os.path.exists(cache_file):
-        arr = np.load(cache_file, mmap_mode="r")
-        print(f"[CACHE HIT] {impl}")
-    else:
-        print(f"[PARSING] {impl}")
-        latencies = []
-        with open(log_file, "r") as f:
-            for _, line in enumerate(f):
-                if not line.startswith("S:"):
-                    continue
-                parts = line.split()
-                latency_ms = float(parts[1]) / 1_000_000  # convert ns to ms
-                latencies.append(latency_ms)
-        arr = np.array(latencies, dtype=np.float64)
-        np.save(cache_file, arr)
-
-    stats = {
-        "mean": float(arr.mean()),
-        "median": float(np.median(arr)),
-        "data": arr,
-    }
-    return impl, stats
+
+def process_single_dir_for_RQs(args):
+    impl, path = args
+    return _latency_stats(impl, path, "S", 1_000_000)  # convert ns to ms
 
 
 def process_single_dir_for_Is(args):
     impl, path = args
-    log_file = os.path.join(path, "stats.log")
-    cache_file = os.path.join(path, "insert_latencies_all.npy")
-
-    if os.path.exists(cache_file):
-        arr = np.load(cache_file, mmap_mode="r")
-        print(f"[CACHE HIT] {impl}")
-    else:
-        print(f"[PARSING] {impl}")
-        latencies = []
-        with open(log_file, "r") as f:
-            for _, line in enumerate(f):
-                if not line.startswith("I:"):
-                    continue
-                parts = line.split()
-                latency_ms = float(parts[1]) / 1_000  # convert ns to μs
-                latencies.append(latency_ms)
-        arr = np.array(latencies, dtype=np.float64)
-        np.save(cache_file, arr)
-
-    stats = {
-        "mean": float(arr.mean()),
-        "median": float(np.median(arr)),
-        "data": arr,
-    }
-    return impl, stats
+    return _latency_stats(impl, path, "I", 1_000)  # convert ns to μs
 
 
 # def plot_insert_latencies():
@@ -19,6 +19,7 @@ from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor
 
 from plot import style
+from plot.cache import cached
 _LINE_STYLES = style.line_styles
 
 plt.rcParams["text.usetex"] = True
@@ -120,13 +121,9 @@ def phases_from_spec(spec_path: Path) -> list:
 
 _LATENCY_RE = re.compile(rb'^[A-Z]+:\s+(\d+)', re.MULTILINE)
 
+@cached("shifting_all_latencies")
 def read_latencies(path: Path) -> np.ndarray:
-    cache = path.with_suffix('.npy')
-    if cache.exists() and cache.stat().st_mtime >= path.stat().st_mtime:
-        return np.load(cache)
-    arr = np.array(_LATENCY_RE.findall(path.read_bytes()), dtype=np.float64)
-    np.save(cache, arr)
-    return arr
+    return np.array(_LATENCY_RE.findall(path.read_bytes()), dtype=np.float64)
 
 
 def build_rolling_series(latencies: np.ndarray, phases: list,
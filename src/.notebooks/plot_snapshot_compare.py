@@ -4,6 +4,8 @@ from pathlib import Path
 import numpy as np
 import matplotlib.pyplot as plt
 
+from plot.latency_store import load_latencies
+from plot.rolling import rolling_stats
 from plot.style import line_styles
 
 TAG = "snapshot-compare-sort-exp"
@@ -24,12 +26,7 @@ IMPLS = [
 
 
 def read_q_latencies(stats_file: Path) -> np.ndarray:
-    latencies = []
-    with open(stats_file) as f:
-        for line in f:
-            if line.startswith("Q:"):
-                latencies.append(int(line[2:].strip()))
-    return np.array(latencies)
+    return load_latencies(stats_file, "Q")
 
 
 def read_snap_latencies(snap_file: Path) -> np.ndarray:
@@ -52,19 +49,6 @@ def read_sort_latencies(sort_file: Path) -> np.ndarray:
     return np.array(latencies)
 
 
-def rolling_stats(arr: np.ndarray, window: int):
-    half = window // 2
-    n = len(arr)
-    x, p0, p95, mean = [], [], [], []
-    for i in range(half, n - half):
-        w = arr[i - half : i + half]
-        x.append(i + 1)
-        p0.append(np.percentile(w, 0))
-        p95.append(np.percentile(w, 95))
-        mean.append(np.mean(w))
-    return np.array(x), np.array(p0), np.array(p95), np.array(mean)
-
-
 def plot_snapshot_vs_latency():
     snap_file = EXP_DIR / "vector-preallocated" / "snapshot_ns.log"
 
@@ -9,6 +9,7 @@ from matplotlib.lines import Line2D
 
 from plot import *
 from plot.style import line_styles
+from plot.utils import normalize_name
 
 TAG = "vary-buffersize-overhead-exp"
 os.makedirs(TAG, exist_ok=True)
@@ -38,29 +39,6 @@ implementations = [
 ]
 
 
-def normalize_name(name):
-    name = name.lower()
-    if "hashlinkedlist" in name:
-        return "hashlinkedlist"
-    if "hashskiplist" in name:
-        return "hashskiplist"
-    if "hashvector" in name:
-        return "hashvector"
-    if "simpleskiplist" in name:
-        return "simpleskiplist"
-    if name == "skiplist":
-        return "skiplist"
-    if "linkedlist" in name:
-        return "linkedlist"
-    if "unsortedvector" in name:
-        return "unsortedvector"
-    if "sortedvector" in name:
-        return "alwayssortedvector"
-    if "vector" in name:
-        return "vector"
-    return None
-
-
 def fmt_kb_power2(kb):
     """Return a $2^n$ KB label for a buffer size given in KB."""
     exp = round(math.log2(kb))
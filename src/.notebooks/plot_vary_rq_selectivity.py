@@ -5,7 +5,10 @@ import numpy as np
 import matplotlib.pyplot as plt
 
 from plot import *
+from plot.latency_store import load_latencies
+from plot.rolling import rolling_stats
 from plot.style import line_styles
+from plot.utils import normalize_name
 
 TAG = "vary-rq-selectivity-exp"
 os.makedirs(TAG, exist_ok=True)
@@ -49,53 +52,9 @@ implementations = [
 ]
 
 
-def normalize_name(name):
-    name = name.lower()
-    if "hashlinkedlist" in name:
-        return "hashlinkedlist"
-    if "hashskiplist" in name:
-        return "hashskiplist"
-    if "hashvector" in name:
-        return "hashvector"
-    if "simpleskiplist" in name:
-        return "simpleskiplist"
-    if name == "skiplist":
-        return "skiplist"
-    if "unsortedvector" in name:
-        return "unsortedvector"
-    if "sortedvector" in name:
-        return "alwayssortedvector"
-    if "vector" in name:
-        return "vector"
-    return None
-
-
 def read_rq_latencies(stats_file: Path) -> np.ndarray:
-    cache = stats_file.with_suffix(".S.npy")
-    if cache.exists() and cache.stat().st_mtime >= stats_file.stat().st_mtime:
-        return np.load(cache)
-    latencies = []
-    with open(stats_file) as f:
-        for line in f:
-            if line.startswith("S:"):
-                latencies.append(int(line[2:].strip()))
-    arr = np.array(latencies)
-    np.save(cache, arr)
-    return arr
-
-
-
-def rolling_stats(arr: np.ndarray, window: int):
-    half = window // 2
-    n = len(arr)
-    x, p0, p95, mean = [], [], [], []
-    for i in range(n):
-        w = arr[max(0, i - half): min(n, i + half)]
-        x.append(i + 1)
-        p0.append(np.percentile(w, 0))
-        p95.append(np.percentile(w, 95))
-        mean.append(np.mean(w))
-    return np.array(x), np.array(p0), np.array(p95), np.array(mean)
+    return load_latencies(stats_file, "S")
+
 
 
 
@@ -123,7 +82,7 @@ def plot_rq_latency_by_selectivity():
             if len(arr) < WINDOW:
                 continue
 
-            x, p0, p95, mean = rolling_stats(arr, WINDOW)
+            x, p0, p95, mean = rolling_stats(arr, WINDOW, edges="shrink")
             ax.fill_between(x, p0, p95, color=style["color"], alpha=0.15)
             ax.plot(x, mean, color=style["color"], linestyle=style["linestyle"],
                     linewidth=2, label=style["label"])
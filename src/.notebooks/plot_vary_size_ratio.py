@@ -6,6 +6,7 @@ import matplotlib.pyplot as plt
 from plot import *
 from plot.style import line_styles
 from plot.rocksdb_stats import parse_rocksdb_log
+from plot.utils import normalize_name
 
 TAG = "vary-size-ratio-exp"
 os.makedirs(TAG, exist_ok=True)
@@ -28,29 +29,6 @@ implementations = [
 ]
 
 
-def normalize_name(name):
-    name = name.lower()
-    if "hashlinkedlist" in name:
-        return "hashlinkedlist"
-    if "hashskiplist" in name:
-        return "hashskiplist"
-    if "hashvector" in name:
-        return "hashvector"
-    if "simpleskiplist" in name:
-        return "simpleskiplist"
-    if name == "skiplist":
-        return "skiplist"
-    if "linkedlist" in name:
-        return "linkedlist"
-    if "unsortedvector" in name:
-        return "unsortedvector"
-    if "sortedvector" in name:
-        return "alwayssortedvector"
-    if "vector" in name:
-        return "vector"
-    return None
-
-
 def safe_tp(count, time_ns, scale=1e6):
     if time_ns == 0:
         return 0.0
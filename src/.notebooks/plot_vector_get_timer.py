@@ -2,6 +2,9 @@ import os
 from pathlib import Path
 
 from plot import *
+from plot.cache import cached
+from plot.downsample import plot_series
+from plot.rolling import rolling_mean
 
 import numpy as np
 import matplotlib.pyplot as plt
@@ -30,24 +33,8 @@ FUNCTIONS = [
 ]
 
 
+@cached("vector_fnbreakdown")
 def load_fnbreakdown(log_file: Path) -> dict[str, np.ndarray]:
-    cache_dir = log_file.parent
-    cache_mtime = log_file.stat().st_mtime
-
-    data = {}
-    all_cached = True
-    for col, _ in FUNCTIONS:
-        cache = cache_dir / f"fnbd_{col}.npy"
-        if not cache.exists() or cache.stat().st_mtime < cache_mtime:
-            all_cached = False
-            break
-
-    if all_cached:
-        for col, _ in FUNCTIONS:
-            data[col] = np.load(cache_dir / f"fnbd_{col}.npy")
-        print(f"Loaded {len(next(iter(data.values())))} rows from cache")
-        return data
-
     print(f"Parsing {log_file} ...")
     cols = {col: [] for col, _ in FUNCTIONS}
     with open(log_file) as f:
@@ -58,25 +45,11 @@ def load_fnbreakdown(log_file: Path) -> dict[str, np.ndarray]:
             for col, _ in FUNCTIONS:
                 cols[col].append(int(parts[col_idx[col]]))
 
-    for col, _ in FUNCTIONS:
-        arr = np.array(cols[col])
-        np.save(cache_dir / f"fnbd_{col}.npy", arr)
-        data[col] = arr
-
-    print(f"Parsed and cached {len(next(iter(data.values())))} rows")
+    data = {col: np.array(cols[col]) for col, _ in FUNCTIONS}
+    print(f"Parsed {len(next(iter(data.values())))} rows")
     return data
 
 
-def rolling_mean(arr: np.ndarray, window: int) -> tuple[np.ndarray, np.ndarray]:
-    half = window // 2
-    n = len(arr)
-    x, mean = [], []
-    for i in range(half, n - half):
-        x.append(i + 1)
-        mean.append(np.mean(arr[i - half: i + half]))
-    return np.array(x), np.array(mean)
-
-
 BREAKDOWN_SHOW = [
     "getimpl_ns",
     "memtable_get_ns",
@@ -108,7 +81,7 @@ def plot_fn_breakdown():
     for (col, label), color in zip(visible, colors):
         arr = data[col][:10000]
         x, mean = rolling_mean(arr, WINDOW)
-        ax.plot(x, mean, linewidth=1.4, label=label, color=color, alpha=0.8)
+        plot_series(ax, x, mean, linewidth=1.4, label=label, color=color, alpha=0.8)
 
     n = len(data[visible[0][0]])
     # ax.set_xlim(0, n)
@@ -138,7 +111,7 @@ def _plot_inner_panel(data, series, output_name, exp_text=None,
     n = len(data[series[0][0]])
     for (col, label), color in zip(series, colors):
         x, mean = rolling_mean(data[col], WINDOW)
-        ax.plot(x, mean, linewidth=1.4, label=label, color=color, alpha=0.8)
+        plot_series(ax, x, mean, linewidth=1.4, label=label, color=color, alpha=0.8)
     step = n // 4
     ax.set_xlim(0, n)
     ax.set_ylim(bottom=0)
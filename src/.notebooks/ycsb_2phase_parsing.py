@@ -18,6 +18,7 @@ if str(SCRIPT_DIR) not in sys.path:
 
 # Import directly from style to avoid broken plot/__init__.py
 from plot.style import line_styles, hatch_map
+from plot.utils import normalize_name
 
 if plt.rcParams["font.family"][0] == "sans-serif":
     print("Error: Specified academic font not found. Aborting program.")
@@ -58,28 +59,6 @@ LATENCY_RE = re.compile(
 
 # --- Helpers matching your reference script ---
 
-def normalize_name(name):
-    """Exactly copied from your reference script for mapping consistency."""
-    name = name.lower()
-    if "hashlinkedlist" in name or "hash_linked_list" in name:
-        return "hashlinkedlist"
-    if "hashskiplist" in name or "hash_skip_list" in name:
-        return "hashskiplist"
-    if "hashvector" in name or "hash_vector" in name:
-        return "hashvector"
-    if "simpleskiplist" in name or "simple_skiplist" in name:
-        return "simpleskiplist"
-    if name == "skiplist":
-        return "skiplist"
-    if "linkedlist" in name:
-        return "linkedlist"
-    if "unsortedvector" in name:
-        return "unsortedvector"
-    if "alwayssortedvector" in name or "sortedvector" in name:
-        return "alwayssortedvector"
-    if "vector" in name:
-        return "vector"
-    return None
 
 def get_mapped_style(buf_name):
     """Applies styling: solid for vector, hollow with colored edges and hatches for others."""
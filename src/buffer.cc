@@ -5,7 +5,8 @@ std::mutex Buffer::mutex_;
 
 Buffer::Buffer(const std::string &filename, size_t limit)
     : buffer_limit(limit) {
-  output_file.open(filename, std::ios::out | std::ios::trunc);
+  output_file.open(filename,
+                   std::ios::out | std::ios::trunc | std::ios::binary);
   if (!output_file.is_open()) {
     throw std::runtime_error("Failed to open output file: " + filename);
   }
@@ -31,6 +32,14 @@ Buffer &Buffer::operator<<(std::ostream &(*manip)(std::ostream &)) {
   return *this;
 }
 
+Buffer &Buffer::write(const char *data, size_t size) {
+  buffer.write(data, size);
+  if (buffer.tellp() >= static_cast<std::streampos>(buffer_limit)) {
+    flush();
+  }
+  return *this;
+}
+
 void Buffer::flush() {
   if (buffer.tellp() > 0) {
     output_file << buffer.str();
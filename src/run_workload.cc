@@ -7,11 +7,21 @@
 #include <tuple>
 
 #include "config_options.h"
+#include "latency_histogram.h"
+#include "op_executor.h"
+#include "op_stats.h"
+#include "threaded_replay.h"
 #include "utils.h"
 #include "workload_monitor.h"
+#include "workload_reader.h"
 
 std::string buffer_file = "workload.log";
 std::string stats_file = "stats.log";
+std::string binary_stats_file = "stats.bin";
+std::string latency_hist_file = "latency.hist";
+std::string scan_stats_file = "scans.csv";
+std::string workload_file_name = "workload.txt";
+std::string binary_workload_file = "workload.bin";
 
 int runWorkload(std::unique_ptr<DBEnv> &env) {
   // Give the cost model the actual buffer geometry so it computes data-driven
@@ -31,8 +41,61 @@ int runWorkload(std::unique_ptr<DBEnv> &env) {
   configOptions(env, &options, &table_options, &write_options, &read_options,
                 &flush_options);
 
+  const bool threaded = env->replay_threads > 1 || env->reader_threads > 0;
+
+  // Open the workload first: a run that cannot read it fails before the DB
+  // is touched.
+  std::unique_ptr<WorkloadReader> workload;
+  if (env->IsBinaryWorkloadEnabled())
+    workload = std::make_unique<BinaryWorkloadReader>(binary_workload_file);
+  else
+    workload = std::make_unique<TextWorkloadReader>(workload_file_name);
+
+  // workload.bin stores its op count; workload.txt is only counted (one
+  // extra pass over the file) when the progress bar needs it.
+  if (!workload->Valid())
+    return 1;
+  size_t total_operations = 0;
+  if (env->IsBinaryWorkloadEnabled() || env->IsShowProgressEnabled())
+    total_operations = workload->Size();
+
+  // The workload is streamed to the replay threads during the run; only a
+  // --query_workload is split between the readers before the clock starts.
+  std::vector<WorkloadPartition> reader_queries;
+  if (threaded && !env->query_workload.empty()) {
+    std::unique_ptr<WorkloadReader> queries;
+    const std::string &path = env->query_workload;
+    if (path.size() > 4 && path.compare(path.size() - 4, 4, ".bin") == 0)
+      queries = std::make_unique<BinaryWorkloadReader>(path);
+    else
+      queries = std::make_unique<TextWorkloadReader>(path);
+    if (!queries->Valid())
+      return 1;
+    reader_queries = PartitionQueries(queries.get(), env->reader_threads);
+    if (!queries->Valid())
+      return 1;
+  }
+
   std::shared_ptr<Buffer> buffer = std::make_unique<Buffer>(buffer_file);
-  std::unique_ptr<Buffer> stats = std::make_unique<Buffer>(stats_file);
+  // --hist 1 keeps only the histograms, so no per-op stats file is written.
+  // Replay threads only keep histograms.
+  std::unique_ptr<Buffer> stats;
+  if (env->latency_hist != 1 && threaded)
+    std::cerr << "Warning: replay threads only record latency histograms, "
+              << (env->IsBinaryStatsEnabled() ? binary_stats_file : stats_file)
+              << " is not written" << std::endl;
+  if (env->latency_hist != 1 && !threaded) {
+    stats = std::make_unique<Buffer>(
+        env->IsBinaryStatsEnabled() ? binary_stats_file : stats_file);
+    if (env->IsBinaryStatsEnabled())
+      WriteOpStatsHeader(stats, env);
+  }
+  std::unique_ptr<LatencyHistFile> hist_file;
+  if (env->latency_hist != 0 || threaded)
+    hist_file = std::make_unique<LatencyHistFile>(latency_hist_file);
+  std::unique_ptr<ScanStatsFile> scan_stats;
+  if (env->scan_stats)
+    scan_stats = std::make_unique<ScanStatsFile>(scan_stats_file);
 
   // // Add custom listners
   // std::shared_ptr<CompactionsListner> compaction_listener =
@@ -64,25 +127,9 @@ int runWorkload(std::unique_ptr<DBEnv> &env) {
 #endif
   }
 
-  std::ifstream workload_file;
-  workload_file.open("workload.txt");
-  assert(workload_file);
-
-  size_t total_operations = 0;
-  if (env->IsShowProgressEnabled()) {
-    std::string line;
-    while (std::getline(workload_file, line)) {
-      ++total_operations;
-    }
-  }
-
-  workload_file.clear();
-  workload_file.seekg(0, std::ios::beg);
-
-#ifdef PER_OP_TIMER
-  unsigned long inserts_exec_time = 0, updates_exec_time = 0, pq_exec_time = 0,
-                pdelete_exec_time = 0, rq_exec_time = 0, merge_exec_time = 0;
-#endif // PER_OP_TIMER
+  OpExecTimes exec_times;
+  uint64_t write_batches = 0, multigets = 0;
+  std::vector<ThreadReplayResult> thread_results;
 
 #ifdef TOTAL_TIMER
   auto exec_start = std::chrono::high_resolution_clock::now();
@@ -93,217 +140,44 @@ int runWorkload(std::unique_ptr<DBEnv> &env) {
   if (env->IsIOStatEnabled())
     rocksdb::get_iostats_context()->Reset();
 
-  // Precompute whether to disable total_order_seek for prefix-bounded scans.
-  // When common_prefix_len == prefix_length, the scan is fully prefix-bounded
-  // and hash-based memtables can use the prefix extractor directly.
-  const bool use_prefix_seek =
-      (env->common_prefix_len > 0 &&
-       env->common_prefix_len >= env->prefix_length);
-
-  std::string line;
   unsigned long ith_op = 0;
-  while (std::getline(workload_file, line)) {
-    if (line.empty())
-      break;
-    bool is_last_line = (workload_file.peek() == EOF);
-
-    std::istringstream stream(line);
-    char operation;
-    stream >> operation;
-
-    switch (operation) {
-      // [Insert]
-    case 'I': {
-      std::string key, value;
-      stream >> key >> value;
 
-#ifdef PER_OP_TIMER
-      auto start = std::chrono::high_resolution_clock::now();
-#endif // PER_OP_TIMER
-      s = db->Put(write_options, key, value);
-      GlobalWorkloadMonitor().RecordInsert();
-#ifdef PER_OP_TIMER
-      auto stop = std::chrono::high_resolution_clock::now();
-      auto duration =
-          std::chrono::duration_cast<std::chrono::nanoseconds>(stop - start);
-      (*stats) << "I: " << duration.count() << std::endl;
-      inserts_exec_time += duration.count();
-#endif // PER_OP_TIMER
-      break;
-    }
-      // [Update]
-    case 'U': {
-      std::string key, value;
-      stream >> key >> value;
-
-#ifdef PER_OP_TIMER
-      auto start = std::chrono::high_resolution_clock::now();
-#endif // PER_OP_TIMER
-      s = db->Put(write_options, key, value);
-      GlobalWorkloadMonitor().RecordUpdate();
-#ifdef PER_OP_TIMER
-      auto stop = std::chrono::high_resolution_clock::now();
-      auto duration =
-          std::chrono::duration_cast<std::chrono::nanoseconds>(stop - start);
-      (*stats) << "U: " << duration.count() << std::endl;
-      updates_exec_time += duration.count();
-#endif // PER_OP_TIMER
-      break;
+  if (threaded) {
+    uint64_t workload_ops = 0;
+    thread_results = ReplayThreads(db, env, write_options, read_options,
+                                   buffer, hist_file.get(), scan_stats.get(),
+                                   workload.get(), std::move(reader_queries),
+                                   &workload_ops);
+    ith_op = workload_ops;
+    for (const ThreadReplayResult &result : thread_results) {
+      exec_times += result.times;
+      write_batches += result.write_batches;
+      multigets += result.multigets;
+      if (!result.status.ok())
+        s = result.status;
     }
-      // [PointDelete]
-    case 'D': {
-      std::string key;
-      stream >> key;
-
-#ifdef PER_OP_TIMER
-      auto start = std::chrono::high_resolution_clock::now();
-#endif // PER_OP_TIMER
-      s = db->Delete(write_options, key);
-      GlobalWorkloadMonitor().RecordPointDelete();
-#ifdef PER_OP_TIMER
-      auto stop = std::chrono::high_resolution_clock::now();
-      auto duration =
-          std::chrono::duration_cast<std::chrono::nanoseconds>(stop - start);
-      (*stats) << "D: " << duration.count() << std::endl;
-      pdelete_exec_time += duration.count();
-#endif // PER_OP_TIMER
-      break;
+  } else {
+    std::unique_ptr<OpLatencyHistograms> histograms;
+    if (hist_file)
+      histograms = std::make_unique<OpLatencyHistograms>(hist_file.get());
+    OpExecutor executor(db, env, write_options, read_options, buffer,
+                        std::move(stats), std::move(histograms),
+                        scan_stats.get());
+
+    WorkloadOp op;
+    while (workload->Next(&op)) {
+      s = executor.Execute(op, ith_op);
+      ith_op += 1;
+      UpdateProgressBar(env, ith_op, total_operations,
+                        (int)total_operations * 0.02);
     }
-      // [ProbePointQuery]
-    case 'P':
-    case 'Q': {
-      std::string key, value;
-      stream >> key;
-
-#ifdef PER_OP_TIMER
-      auto start = std::chrono::high_resolution_clock::now();
-#endif // PER_OP_TIMER
-      s = db->Get(read_options, key, &value);
-      GlobalWorkloadMonitor().RecordPointQuery();
-      // if (s.IsNotFound()) {
-      //   std::cout << key << ", Not Found" << std::endl;
-      // } else if (s.ok()) {
-      //   std::cout << key << ", " << value << std::endl;
-      // } else {
-      //   std::cout << "Error reading key " << key << ": " << s.ToString()
-      //             << std::endl;
-      // }
-
-#ifdef PER_OP_TIMER
-      auto stop = std::chrono::high_resolution_clock::now();
-      auto duration =
-          std::chrono::duration_cast<std::chrono::nanoseconds>(stop - start);
-      (*stats) << "Q: " << duration.count() << std::endl;
-      pq_exec_time += duration.count();
-#endif // PER_OP_TIMER
-      break;
-    }
-      // [ScanRangeQuery]
-      // Handles two formats produced by Tectonic:
-      //   "S  <start_key> <end_key>"   — StartEnd  (key comparison termination)
-      //   "SC <start_key> <scan_len>"  — StartCount (YCSB-style fixed-length scan)
-      // After the switch reads 'S', peek at the next character: if it is 'C'
-      // consume it and treat the second token as a step count, otherwise treat
-      // it as an end key.
-    case 'S': {
-      // Detect "SC": next char on the stream is 'C' with no whitespace between.
-      const bool is_count_scan = (stream.peek() == 'C');
-      if (is_count_scan) stream.get(); // consume the 'C'
-
-      std::string start_key;
-      stream >> start_key;
-
-      ReadOptions scan_read_options = ReadOptions(read_options);
-      scan_read_options.total_order_seek = !use_prefix_seek;
-
-      Iterator *it = db->NewIterator(scan_read_options);
-      assert(it->status().ok());
-
-#ifdef PER_OP_TIMER
-      auto start = std::chrono::high_resolution_clock::now();
-#endif // PER_OP_TIMER
-
-      if (is_count_scan) {
-        // SC <start_key> <scan_len> — iterate exactly scan_len steps.
-        uint64_t scan_len;
-        stream >> scan_len;
-
-        uint64_t steps = 0;
-        for (it->Seek(start_key); it->Valid() && steps < scan_len;
-             it->Next(), ++steps) {
-        }
-      } else {
-        // S <start_key> <end_key> — iterate until key >= end_key.
-        std::string end_key;
-        stream >> end_key;
-
-        // Synthesise a prefix-controlled end key when common_prefix_len > 0.
-        if (env->common_prefix_len > 0) {
-          const size_t prefix_bytes =
-              std::min((size_t)env->common_prefix_len, start_key.size());
-          end_key = start_key.substr(0, prefix_bytes) +
-                    end_key.substr(prefix_bytes);
-        }
-
-        for (it->Seek(start_key); it->Valid(); it->Next()) {
-          if (it->key().ToString() >= end_key) {
-            break;
-          }
-        // std::cout << "Key: " << it->key().ToString()
-        //           << " Value: " << it->value().ToString() << std::endl;
-        }
-      }
-
-      if (!it->status().ok()) {
-        (*buffer) << it->status().ToString() << std::endl << std::flush;
-      }
-#ifdef PER_OP_TIMER
-      auto stop = std::chrono::high_resolution_clock::now();
-      auto duration =
-          std::chrono::duration_cast<std::chrono::nanoseconds>(stop - start);
-      (*stats) << "S: " << duration.count() << std::endl;
-      rq_exec_time += duration.count();
-#endif // PER_OP_TIMER
-      GlobalWorkloadMonitor().RecordRangeQuery();
-      delete it;
-      break;
-    }
-    // [RangeDelete]
-    case 'R': {
-      std::string start_key, end_key;
-      stream >> start_key >> end_key;
-      s = db->DeleteRange(write_options, start_key, end_key);
-      GlobalWorkloadMonitor().RecordRangeDelete();
-      break;
-    }
-    // [ReadModifyWrite]
-    case 'M': {
-#ifdef PER_OP_TIMER
-      auto start = std::chrono::high_resolution_clock::now();
-#endif // PER_OP_TIMER
-      std::string start_key, end_key;
-      stream >> start_key >> end_key;
-      s = db->Merge(write_options, start_key, end_key);
-      GlobalWorkloadMonitor().RecordUpdate();
-#ifdef PER_OP_TIMER
-      auto stop = std::chrono::high_resolution_clock::now();
-      auto duration =
-          std::chrono::duration_cast<std::chrono::nanoseconds>(stop - start);
-      (*stats) << "M: " << duration.count() << std::endl;
-      merge_exec_time += duration.count();
-#endif // PER_OP_TIMER
-      break;
-    }
-    default:
-      (*buffer) << "ERROR: Case match NOT found !!" << std::endl;
-      break;
-    }
-
-    ith_op += 1;
-    UpdateProgressBar(env, ith_op, total_operations,
-                      (int)total_operations * 0.02);
-    if (is_last_line)
-      break;
+    Status batch_status = executor.FlushPending();
+    if (!batch_status.ok())
+      s = batch_status;
+    executor.Finish(ith_op);
+    exec_times = executor.Times();
+    write_batches = executor.WriteBatches();
+    multigets = executor.MultiGets();
   }
 
 #ifdef PROFILE
@@ -326,13 +200,34 @@ int runWorkload(std::unique_ptr<DBEnv> &env) {
   (*buffer) << "Workload Execution Time: " << total_exec_time << std::endl;
 #endif // TOTAL_TIMER
 #ifdef PER_OP_TIMER
-  (*buffer) << "Inserts Execution Time: " << inserts_exec_time << std::endl;
-  (*buffer) << "Updates Execution Time: " << updates_exec_time << std::endl;
-  (*buffer) << "PointQuery Execution Time: " << pq_exec_time << std::endl;
-  (*buffer) << "PointDelete Execution Time: " << pdelete_exec_time << std::endl;
-  (*buffer) << "RangeQuery Execution Time: " << rq_exec_time << std::endl;
-  (*buffer) << "Merge Execution Time: " << merge_exec_time << std::endl;
+  // Summed over replay threads, so these can exceed the workload time.
+  (*buffer) << "Inserts Execution Time: " << exec_times.inserts << std::endl;
+  (*buffer) << "Updates Execution Time: " << exec_times.updates << std::endl;
+  (*buffer) << "PointQuery Execution Time: " << exec_times.point_queries
+            << std::endl;
+  (*buffer) << "PointDelete Execution Time: " << exec_times.point_deletes
+            << std::endl;
+  (*buffer) << "RangeQuery Execution Time: " << exec_times.range_queries
+            << std::endl;
+  (*buffer) << "Merge Execution Time: " << exec_times.merges << std::endl;
 #endif // PER_OP_TIMER
+  (*buffer) << "RangeQuery Keys Scanned: " << exec_times.scan_keys << std::endl;
+  if (env->scan_stats)
+    (*buffer) << "RangeQuery Bytes Scanned: " << exec_times.scan_bytes
+              << std::endl;
+  if (env->write_batch_size > 1 || env->write_batch_bytes > 0)
+    (*buffer) << "Write Batches: " << write_batches << std::endl;
+  if (env->multiget_batch_size > 1)
+    (*buffer) << "MultiGet Batches: " << multigets << std::endl;
+  if (threaded) {
+    (*buffer) << "Replay Threads: " << env->replay_threads << std::endl;
+    (*buffer) << "Reader Threads: " << env->reader_threads << std::endl;
+    for (size_t t = 0; t < thread_results.size(); ++t)
+      (*buffer) << "Thread " << t << " Ops: " << thread_results[t].ops
+                << " Time: " << thread_results[t].elapsed_ns << " Role: "
+                << (t < (size_t)env->replay_threads ? "replay" : "reader")
+                << std::endl;
+  }
 
   // tree->BuildStructure(db); //rebuild structure after each input
   // tree->PrintFluidLSM(db);
@@ -351,12 +246,14 @@ int runWorkload(std::unique_ptr<DBEnv> &env) {
 
   // flush final stats and delete ptr
   buffer->flush();
-  stats->flush();
+  if (hist_file)
+    hist_file->Flush();
 #ifdef TOTAL_TIMER
   long long total_seconds = total_exec_time / 1e9;
   std::cerr << "\nExperiment completed in " << total_seconds / 3600 << "h "
             << (total_seconds % 3600) / 60 << "m " << total_seconds % 60 << "s "
             << std::endl;
 #endif // TOTAL_TIMER
-  return 0;
+  // A malformed record ends the replay early.
+  return workload->Valid() ? 0 : 1;
 }